@@ -0,0 +1 @@
+"""Núcleo do Acervo Inteligente: serviços de dados independentes da interface Streamlit."""
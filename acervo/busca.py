@@ -0,0 +1,215 @@
+"""Busca em memória, sem acentos e tolerante a erros de digitação.
+
+`IndiceBusca` mantém um índice invertido de tokens (com peso por campo) e um
+índice de trigramas sobre o vocabulário, usado para achar "machdo" -> "machado".
+`IndiceCatalogo` mantém um `IndiceBusca` sincronizado com o `CatalogoCache`,
+reaplicando só as mudanças pontuais desde a última versão vista.
+"""
+import bisect
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+CAMPOS_CATALOGO = {"titulo": 3.0, "isbn": 3.0, "autor": 2.0, "genero": 1.0}
+SIMILARIDADE_MINIMA = 0.5  # coeficiente de Dice entre trigramas para aceitar um erro de digitação
+PESO_PREFIXO = 0.9
+
+_NAO_ALFANUM = re.compile(r"[^0-9a-z]+")
+_NUMERICO = re.compile(r"^\d+x?$")                   # ISBNs e números: sem "parecidos" por trigrama
+_CONSULTA_ISBN = re.compile(r"^\d[\d .-]*[\dxX]$")
+
+
+def remover_acentos(texto):
+    texto = unicodedata.normalize("NFKD", str(texto))
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def normalizar(texto):
+    if texto is None or texto != texto:  # None ou NaN
+        return ""
+    texto = str(texto)
+    if not texto.isascii():  # a maioria dos títulos e autores não tem acento: pula o NFKD
+        texto = remover_acentos(texto)
+    return _NAO_ALFANUM.sub(" ", texto.lower()).strip()
+
+
+def tokenizar(texto, campo=None):
+    texto = normalizar(texto)
+    if campo == "isbn":  # "978-85-359-0277-1" vira um token só
+        texto = texto.replace(" ", "")
+    return [t for t in texto.split() if t]
+
+
+def parece_isbn(consulta):
+    """ISBN (completo ou começo dele) digitado com ou sem separadores: "978-85-359", "9788535902771"."""
+    texto = str(consulta).strip()
+    if not _CONSULTA_ISBN.match(texto):
+        return False
+    compacto = re.sub(r"[ .-]", "", texto)
+    return len(compacto) >= 10 or compacto != texto  # "1984" sozinho ainda pode ser título
+
+
+def trigramas(token):
+    t = f" {token} "
+    return {t[i:i + 3] for i in range(len(t) - 2)}
+
+
+class IndiceBusca:
+    def __init__(self, campos=CAMPOS_CATALOGO, chave="id"):
+        self.campos = dict(campos)
+        self.chave = chave
+        self._bits = {c: 1 << i for i, c in enumerate(self.campos)}
+        self._postings = defaultdict(dict)   # token -> {id: máscara de campos}
+        self._tokens_doc = {}                # id -> set(tokens), para remoção incremental
+        self._trigramas = defaultdict(set)   # trigrama -> tokens do vocabulário
+        self._vocab = []                     # vocabulário ordenado, para busca por prefixo
+
+    def __len__(self):
+        return len(self._tokens_doc)
+
+    @classmethod
+    def de_dataframe(cls, df, campos=CAMPOS_CATALOGO, chave="id"):
+        indice = cls(campos, chave)
+        if not df.empty:
+            cols = [c for c in indice.campos if c in df.columns]
+            for reg in df[[chave] + cols].to_dict("records"):
+                indice.indexar(reg)
+        return indice
+
+    def indexar(self, registro):
+        doc = registro[self.chave]
+        self.remover(doc)
+        mascaras = defaultdict(int)
+        for campo, bit in self._bits.items():
+            for tok in tokenizar(registro.get(campo), campo):
+                mascaras[tok] |= bit
+        for tok, mascara in mascaras.items():
+            if tok not in self._postings:
+                bisect.insort(self._vocab, tok)
+                for tri in trigramas(tok):
+                    self._trigramas[tri].add(tok)
+            self._postings[tok][doc] = mascara
+        self._tokens_doc[doc] = set(mascaras)
+
+    def remover(self, doc):
+        for tok in self._tokens_doc.pop(doc, ()):
+            docs = self._postings[tok]
+            docs.pop(doc, None)
+            if not docs:
+                del self._postings[tok]
+                del self._vocab[bisect.bisect_left(self._vocab, tok)]
+                for tri in trigramas(tok):
+                    self._trigramas[tri].discard(tok)
+
+    def _expandir(self, termo):
+        """Tokens do vocabulário que casam com `termo`: exato, prefixo ou parecido."""
+        achados = {}
+        if termo in self._postings:
+            achados[termo] = 1.0
+        i = bisect.bisect_left(self._vocab, termo)
+        while i < len(self._vocab) and self._vocab[i].startswith(termo):
+            achados.setdefault(self._vocab[i], PESO_PREFIXO)
+            i += 1
+        if len(termo) >= 3 and not _NUMERICO.match(termo):
+            tris = trigramas(termo)
+            comuns = defaultdict(int)
+            for tri in tris:
+                for tok in self._trigramas.get(tri, ()):
+                    comuns[tok] += 1
+            for tok, n in comuns.items():
+                sim = 2 * n / (len(tris) + len(trigramas(tok)))
+                if sim >= SIMILARIDADE_MINIMA and sim > achados.get(tok, 0):
+                    achados[tok] = sim * PESO_PREFIXO
+        return achados
+
+    def buscar(self, consulta, campos=None, limite=None):
+        """Ids ordenados por relevância. Todos os termos da consulta precisam casar."""
+        campos = campos or list(self.campos)
+        permitido = 0
+        for c in campos:
+            permitido |= self._bits.get(c, 0)
+        if parece_isbn(consulta):
+            ids = self._buscar_isbn(consulta, permitido)
+            if ids:
+                return ids[:limite] if limite else ids
+        pontos = None
+        for termo in set(tokenizar(consulta)):
+            por_doc = defaultdict(float)
+            for tok, sim in self._expandir(termo).items():
+                for doc, mascara in self._postings[tok].items():
+                    mascara &= permitido
+                    if not mascara:
+                        continue
+                    peso = max(p for c, p in self.campos.items() if mascara & self._bits[c])
+                    por_doc[doc] = max(por_doc[doc], sim * peso)
+            if pontos is None:
+                pontos = dict(por_doc)
+            else:
+                pontos = {d: s + por_doc[d] for d, s in pontos.items() if d in por_doc}
+            if not pontos:
+                return []
+        if not pontos:
+            return []
+        ordem = sorted(pontos, key=pontos.get, reverse=True)
+        return ordem[:limite] if limite else ordem
+
+    def _buscar_isbn(self, consulta, permitido):
+        """ISBN sem separadores, exato ou por prefixo, só no campo isbn."""
+        bit = self._bits.get("isbn", 0) & permitido
+        termo = "".join(tokenizar(consulta, "isbn"))
+        if not bit or not termo:
+            return []
+        pontos = {}
+        i = bisect.bisect_left(self._vocab, termo)
+        while i < len(self._vocab) and self._vocab[i].startswith(termo):
+            tok = self._vocab[i]
+            for doc, mascara in self._postings[tok].items():
+                if mascara & bit:
+                    pontos[doc] = max(pontos.get(doc, 0), 1.0 if tok == termo else PESO_PREFIXO)
+            i += 1
+        return sorted(pontos, key=pontos.get, reverse=True)
+
+    def filtrar(self, df, consulta, campos=None, limite=None):
+        """Linhas de `df` que casam com a consulta, na ordem de relevância."""
+        ids = self.buscar(consulta, campos, limite)
+        if not ids or df.empty:
+            return df.iloc[0:0]
+        pos = {doc: i for i, doc in enumerate(ids)}
+        res = df[df[self.chave].isin(pos)]
+        return res.iloc[res[self.chave].map(pos).argsort().values]
+
+
+class IndiceCatalogo:
+    """Índice do catálogo compartilhado entre sessões (criado via st.cache_resource)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indice = IndiceBusca()
+        self._versao = -1
+
+    def obter(self, catalogo):
+        df, versao = catalogo.snapshot()
+        with self._lock:
+            if self._versao == versao:
+                return self._indice
+            mudancas = catalogo.mudancas_desde(self._versao) if self._versao >= 0 else None
+            if mudancas is None:
+                self._indice = IndiceBusca.de_dataframe(df)
+            else:
+                for v, tipo, doc, registro in mudancas:
+                    if tipo == "remover":
+                        self._indice.remover(doc)
+                    else:
+                        self._indice.indexar(registro)
+                    versao = max(versao, v)
+            self._versao = versao
+            return self._indice
+
+    def filtrar(self, catalogo, consulta, campos=None, limite=None, df=None):
+        """Como `IndiceBusca.filtrar`, sobre o catálogo (ou um recorte dele em `df`)."""
+        indice = self.obter(catalogo)
+        if df is None:
+            df = catalogo.df()
+        with self._lock:  # o índice é alterado in-place por outras sessões
+            return indice.filtrar(df, consulta, campos, limite)
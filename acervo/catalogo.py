@@ -0,0 +1,106 @@
+"""Cache compartilhado do catálogo (`livros_acervo`).
+
+Uma única instância vive por processo (criada via `st.cache_resource` no app) e
+serve todas as sessões. Leituras saem da memória; cada escrita do app deve
+chamar `atualizar`, `inserir`, `remover` ou `invalidar` para que o estoque
+exibido nunca fique defasado.
+"""
+import threading
+import time
+from contextlib import nullcontext
+
+import pandas as pd
+
+CATALOGO_TTL = 300  # segundos até forçar nova leitura completa do banco
+
+
+class CatalogoCache:
+    def __init__(self, cliente, ttl=CATALOGO_TTL, medir=None):
+        self._cliente = cliente
+        self._ttl = ttl
+        self._medir = medir  # ex.: Metricas.medir, para cronometrar a montagem do DataFrame
+        self._lock = threading.RLock()
+        self._df = None
+        self._carregado_em = 0.0
+        self.versao = 0  # incrementa a cada mudança; serve de chave para caches derivados
+        self._base = 0  # versão da última leitura completa
+        self._log = []  # (versao, "upsert" | "remover", id, registro) desde a última leitura completa
+
+    def _expirado(self):
+        return self._df is None or (time.monotonic() - self._carregado_em) > self._ttl
+
+    def _recarregar(self):
+        res = self._cliente.table("livros_acervo").select("*").execute()
+        with self._medir("pandas", "livros_acervo") if self._medir else nullcontext():
+            df = pd.DataFrame(res.data)
+        self._carregado_em = time.monotonic()
+        if self._df is not None and df.equals(self._df):
+            return  # recarga do TTL sem mudança: mantém a versão, e com ela os caches derivados (índices, exportação)
+        self._df = df
+        self.versao += 1
+        self._base, self._log = self.versao, []
+
+    def df(self):
+        """Snapshot atual do catálogo. Não altere o DataFrame retornado."""
+        with self._lock:
+            if self._expirado():
+                self._recarregar()
+            return self._df
+
+    def snapshot(self):
+        """(DataFrame, versão) lidos de forma consistente."""
+        with self._lock:
+            return self.df(), self.versao
+
+    def invalidar(self):
+        with self._lock:
+            self._df = None
+            self.versao += 1
+            self._base, self._log = self.versao, []
+
+    def mudancas_desde(self, versao):
+        """Mudanças pontuais após `versao`, ou None se houve recarga completa desde então."""
+        with self._lock:
+            if versao < self._base:
+                return None
+            return [m for m in self._log if m[0] > versao]
+
+    def _registrar(self, tipo, id_livro, registro=None):
+        self.versao += 1
+        self._log.append((self.versao, tipo, int(id_livro), registro))
+
+    # Os métodos abaixo aplicam a escrita já confirmada pelo banco ao snapshot.
+    # Cada um gera um novo DataFrame (copy-on-write), assim quem já leu o
+    # snapshot anterior em outra sessão não é afetado no meio do rerun.
+
+    def atualizar(self, id_livro, campos):
+        with self._lock:
+            if self._df is None or self._df.empty:
+                return
+            df = self._df.copy()
+            mask = df["id"] == int(id_livro)
+            if not mask.any():
+                self.invalidar(); return
+            for col, valor in campos.items():
+                if col not in df.columns:
+                    self.invalidar(); return
+                df.loc[mask, col] = valor
+            self._df = df
+            self._registrar("upsert", id_livro, df[mask].iloc[0].to_dict())
+
+    def inserir(self, registros):
+        with self._lock:
+            if self._df is None or not registros:
+                return
+            if any("id" not in r for r in registros):
+                self.invalidar(); return
+            self._df = pd.concat([self._df, pd.DataFrame(registros)], ignore_index=True)
+            for reg in registros:
+                self._registrar("upsert", reg["id"], reg)
+
+    def remover(self, id_livro):
+        with self._lock:
+            if self._df is None or self._df.empty:
+                return
+            self._df = self._df[self._df["id"] != int(id_livro)].reset_index(drop=True)
+            self._registrar("remover", id_livro)
@@ -0,0 +1,152 @@
+"""Empréstimos e devoluções em lote, via funções do banco (sql/001_circulacao_rpc.sql).
+
+Cada chamada é uma única ida ao Supabase e uma única transação: a gravação em
+`emprestimos` e o ajuste de `quantidade` acontecem juntos no Postgres, sem
+ler-modificar-escrever do lado do app.
+"""
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+import pandas as pd
+
+from acervo.busca import IndiceBusca
+from acervo.datas import colunas_para_data, exibir
+
+
+def _estoque(res):
+    return {int(r["id_livro"]): int(r["quantidade"]) for r in (res.data or [])}
+
+
+def emprestar(cliente, itens, prazo_dias):
+    """Registra empréstimos para pares (id_livro, id_usuario).
+
+    Retorna ({id_livro: estoque_atualizado}, data_prevista em dd/mm/aaaa).
+    Falha inteira (sem gravar nada) se algum livro não tiver estoque suficiente.
+    """
+    hoje = date.today()
+    dt_p = hoje + timedelta(days=prazo_dias)
+    payload = [{"id_livro": int(l), "id_usuario": int(u), "data_saida": hoje.isoformat(),
+                "data_retorno_prevista": dt_p.isoformat()} for l, u in itens]
+    res = cliente.rpc("registrar_emprestimos", {"itens": payload}).execute()
+    return _estoque(res), exibir(dt_p)
+
+
+def faltas(itens, disponivel):
+    """Livros pedidos além do estoque, antes de gravar: {id_livro: (pedidos, disponível)}.
+
+    `itens` são pares (id_livro, id_usuario); `disponivel` é {id_livro: quantidade}.
+    """
+    pedidos = Counter(int(l) for l, _ in itens)
+    return {l: (n, int(disponivel.get(l, 0))) for l, n in pedidos.items() if n > disponivel.get(l, 0)}
+
+
+def devolver(cliente, ids_emprestimo):
+    """Devolve os empréstimos indicados. Retorna {id_livro: estoque_atualizado}."""
+    ids = [int(i) for i in ids_emprestimo]
+    if not ids:
+        return {}
+    res = cliente.rpc("registrar_devolucoes", {"ids_emprestimo": ids}).execute()
+    return _estoque(res)
+
+
+def aplicar_estoque(catalogo, estoque):
+    # Repassa ao cache os estoques que o banco devolveu
+    for id_livro, quantidade in estoque.items():
+        catalogo.atualizar(id_livro, {"quantidade": quantidade})
+
+
+def ajustar_estoque(cliente, deltas):
+    """Soma `delta` ao estoque de cada livro ({id_livro: delta}) numa única chamada."""
+    itens = [{"id_livro": int(l), "delta": int(d)} for l, d in deltas.items() if d]
+    if not itens:
+        return {}
+    return _estoque(cliente.rpc("ajustar_estoque", {"itens": itens}).execute())
+
+
+def registrar_entrada(cliente, chave, deltas, novos):
+    """Soma estoque ({id_livro: delta}) e cadastra `novos` numa única transação (sql/009_entrada_lote.sql).
+
+    `chave` identifica o lote: repetir a chamada com a mesma chave (ex.: depois
+    de um erro de rede sem resposta) não grava de novo e retorna None. Senão
+    retorna ({id_livro: estoque_atualizado}, linhas inseridas).
+    """
+    itens = [{"id_livro": int(l), "delta": int(d)} for l, d in deltas.items() if d]
+    res = cliente.rpc("registrar_entrada_lote", {"chave": chave, "ajustes": itens, "novos": novos}).execute()
+    if not res.data:
+        return None
+    return {int(r["id_livro"]): int(r["quantidade"]) for r in res.data["estoque"]}, res.data["inseridos"]
+
+
+class CacheEmprestimosAtivos:
+    """Empréstimos ativos (view `emprestimos_ativos`), guardados até o próximo empréstimo/devolução.
+
+    Sem a view (sql/005 ainda não rodado), junta empréstimos, livros e usuários no app.
+
+    O índice de busca por nome/título é montado na primeira busca e vale até a
+    próxima carga, em vez de ser refeito a cada rerun.
+    """
+
+    COLUNAS = "id, id_livro, id_usuario, titulo, nome, turma, data_retorno_prevista, dias_atraso"
+    CAMPOS_BUSCA = {"nome": 1.0, "titulo": 1.0}
+
+    def __init__(self, cliente, ttl=300):
+        self._cliente, self._ttl = cliente, ttl
+        self._lock = threading.Lock()
+        self._df = None
+        self._indice = None
+        self._carregado_em = 0.0
+
+    def _ler(self):
+        try:
+            res = self._cliente.table("emprestimos_ativos").select(self.COLUNAS).order("data_retorno_prevista").execute()
+            return res.data or []
+        except Exception:
+            # View ainda não criada (sql/005): junta aqui só os livros e usuários dos empréstimos ativos
+            return self._ler_sem_view()
+
+    def _ler_sem_view(self):
+        ativos = (self._cliente.table("emprestimos").select("id, id_livro, id_usuario, data_retorno_prevista")
+                  .eq("status", "Ativo").order("data_retorno_prevista").execute().data or [])
+        if not ativos:
+            return []
+        livros = {l["id"]: l for l in self._cliente.table("livros_acervo").select("id, titulo")
+                  .in_("id", sorted({e["id_livro"] for e in ativos})).execute().data or []}
+        usuarios = {u["id"]: u for u in self._cliente.table("usuarios").select("id, nome, turma")
+                    .in_("id", sorted({e["id_usuario"] for e in ativos})).execute().data or []}
+        hoje = pd.Timestamp(date.today())
+        linhas = []
+        for e in ativos:
+            livro, usuario = livros.get(e["id_livro"]), usuarios.get(e["id_usuario"])
+            if livro and usuario:  # junção interna, como a view
+                prevista = pd.to_datetime(e["data_retorno_prevista"], errors="coerce")
+                linhas.append({**e, "titulo": livro["titulo"], "nome": usuario["nome"], "turma": usuario.get("turma"),
+                               "dias_atraso": 0 if pd.isna(prevista) else max((hoje - prevista).days, 0)})
+        return linhas
+
+    def _carregar(self):
+        if self._df is None or time.monotonic() - self._carregado_em > self._ttl:
+            self._df = colunas_para_data(pd.DataFrame(self._ler(), columns=[c.strip() for c in self.COLUNAS.split(",")]),
+                                         datas=["data_retorno_prevista"])
+            self._indice = None
+            self._carregado_em = time.monotonic()
+        return self._df
+
+    def df(self):
+        with self._lock:
+            return self._carregar()
+
+    def filtrar(self, consulta):
+        """Empréstimos ativos cujo nome ou título casam com `consulta`, do mais relevante ao menos."""
+        with self._lock:
+            df = self._carregar()
+            if self._indice is None:
+                self._indice = IndiceBusca.de_dataframe(df, campos=self.CAMPOS_BUSCA)
+            indice = self._indice
+        return indice.filtrar(df, consulta)
+
+    def invalidar(self):
+        with self._lock:
+            self._df = None
+            self._indice = None
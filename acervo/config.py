@@ -0,0 +1,13 @@
+"""Configurações compartilhadas pelos serviços do acervo."""
+import os
+
+# Pasta para arquivos locais (checkpoints, caches em disco). Fica fora do git.
+DIR_LOCAL = os.environ.get("ACERVO_DIR_LOCAL", ".acervo_local")
+
+# Réplica local em SQLite (acervo/replica.py); ACERVO_REPLICA=0 volta a ler direto do Supabase
+REPLICA_LOCAL = os.environ.get("ACERVO_REPLICA", "1") != "0"
+
+
+def caminho_local(nome):
+    os.makedirs(DIR_LOCAL, exist_ok=True)
+    return os.path.join(DIR_LOCAL, nome)
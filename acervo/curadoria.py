@@ -0,0 +1,169 @@
+"""Motor da Curadoria Inteligente: completa autor/sinopse/gênero pendentes.
+
+Os registros são processados em blocos. Em cada bloco, as consultas ao Google
+Books rodam em paralelo (pool de threads) e o que continuar pendente vai ao
+Gemini em lotes de vários títulos por prompt, com resposta em JSON. Cada
+provedor tem seu próprio limite de taxa (token bucket) e o Google Books passa
+pelo cache persistente de `acervo.metadados`. O bloco é gravado de uma vez
+(RPC `atualizar_livros_lote`) e marcado no checkpoint, então uma execução
+interrompida retoma de onde parou. Registros cuja consulta ao Gemini falhou
+não são gravados nem marcados: ficam para a próxima execução, e `executar`
+termina com `FalhaCuradoria`. Uma resposta 429 (cota do Gemini) para tudo
+depois do bloco atual.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from acervo.config import caminho_local
+from acervo.metadados import buscar_titulo
+from acervo.taxa import LimiteTaxa
+
+URL_GEMINI = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
+
+TRABALHADORES = 8
+TAMANHO_BLOCO = 40       # registros gravados e marcados no checkpoint por vez
+TITULOS_POR_PROMPT = 10  # títulos enviados ao Gemini em cada requisição
+PENDENTE = "Pendente"
+
+LIMITE_GEMINI = LimiteTaxa(por_segundo=0.5, capacidade=2)  # cota gratuita do Gemini é baixa
+
+
+class FalhaCuradoria(Exception):
+    """Consultas ao Gemini que falharam; `atualizados` tem o que foi gravado mesmo assim."""
+
+    def __init__(self, mensagem, atualizados):
+        super().__init__(mensagem)
+        self.atualizados = atualizados
+
+
+def _status(erro):
+    return getattr(getattr(erro, "response", None), "status_code", None)
+
+
+def cota_esgotada(erro):
+    return _status(erro) == 429
+
+
+def _resumo(erro):
+    if _status(erro):
+        return f"HTTP {_status(erro)}"
+    if isinstance(erro, requests.RequestException):
+        return type(erro).__name__  # a mensagem traz a URL, com a chave da API
+    return str(erro)
+
+
+class Checkpoint:
+    """Ids já processados, persistidos em disco a cada bloco gravado."""
+
+    def __init__(self, nome="curadoria_checkpoint.json"):
+        self.caminho = caminho_local(nome)
+        self.feitos = set()
+        if os.path.exists(self.caminho):
+            with open(self.caminho, encoding="utf-8") as f:
+                self.feitos = set(json.load(f))
+
+    def marcar(self, ids):
+        self.feitos.update(int(i) for i in ids)
+        tmp = self.caminho + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(sorted(self.feitos), f)
+        os.replace(tmp, self.caminho)
+
+    def limpar(self):
+        self.feitos = set()
+        if os.path.exists(self.caminho):
+            os.remove(self.caminho)
+
+
+def consultar_gemini_lote(livros, api_key):
+    """`livros`: [{"id", "titulo"}]. Retorna {id: {"autor", "sinopse", "genero"}}.
+
+    Levanta em erro de rede, HTTP (ex.: 429 da cota) ou resposta fora do formato pedido.
+    """
+    LIMITE_GEMINI.aguardar()
+    prompt = ("Para cada livro da lista, informe o autor, uma sinopse curta (em português) e o gênero. "
+              "Responda somente um array JSON de objetos com as chaves id, autor, sinopse e genero.\n"
+              + json.dumps([{"id": int(l["id"]), "titulo": l["titulo"]} for l in livros], ensure_ascii=False))
+    corpo = {"contents": [{"parts": [{"text": prompt}]}],
+             "generationConfig": {"responseMimeType": "application/json"}}
+    resp = requests.post(URL_GEMINI, params={"key": api_key}, json=corpo, timeout=30)
+    resp.raise_for_status()
+    itens = json.loads(resp.json()["candidates"][0]["content"]["parts"][0]["text"])
+    return {int(i["id"]): i for i in itens if isinstance(i, dict) and "id" in i}
+
+
+def _tentar_gemini(lote, api_key):
+    try:
+        return consultar_gemini_lote(lote, api_key), None
+    except Exception as e:
+        return {}, e
+
+
+def _completar_bloco(bloco, api_google, api_gemini, pool, cache_meta):
+    """Retorna (registros completados, [(lote, erro)] das consultas ao Gemini que falharam)."""
+    # 1) Google Books em paralelo (via cache de metadados), só para autor/sinopse
+    resultado = {int(r["id"]): {"id": int(r["id"]), "autor": r["autor"], "sinopse": r["sinopse"], "genero": r["genero"]}
+                 for r in bloco}
+    for r, info in zip(bloco, pool.map(lambda r: buscar_titulo(r["titulo"], api_google, cache_meta), bloco)):
+        if info:
+            novo = resultado[int(r["id"])]
+            if novo["autor"] == PENDENTE: novo["autor"] = ", ".join(info.get("authors", [PENDENTE]))
+            if novo["sinopse"] == PENDENTE: novo["sinopse"] = info.get("description", PENDENTE)
+
+    # 2) O que continuar pendente vai ao Gemini, vários títulos por prompt
+    faltando = [r for r in bloco if PENDENTE in (resultado[int(r["id"])]["autor"], resultado[int(r["id"])]["sinopse"])]
+    lotes = [faltando[i:i + TITULOS_POR_PROMPT] for i in range(0, len(faltando), TITULOS_POR_PROMPT)]
+    falhas = []
+    for lote, (respostas, erro) in zip(lotes, pool.map(lambda lote: _tentar_gemini(lote, api_gemini), lotes)):
+        if erro is not None:
+            falhas.append((lote, erro))
+            for r in lote:
+                resultado.pop(int(r["id"]))
+        for id_livro, p in respostas.items():
+            novo = resultado.get(id_livro)
+            if not novo:
+                continue
+            if novo["autor"] == PENDENTE and p.get("autor"): novo["autor"] = str(p["autor"]).strip()
+            if p.get("sinopse"): novo["sinopse"] = str(p["sinopse"]).strip()
+            if p.get("genero"): novo["genero"] = str(p["genero"]).strip().capitalize()
+    return list(resultado.values()), falhas
+
+
+def executar(cliente, pendentes, api_gemini, api_google, checkpoint=None, progresso=None,
+             ao_gravar=None, cache_meta=None, trabalhadores=TRABALHADORES, tamanho_bloco=TAMANHO_BLOCO):
+    """Completa os registros `pendentes` (lista de dicts de livros_acervo).
+
+    Pula ids já marcados no checkpoint. Após cada bloco gravado chama
+    `ao_gravar(registros)` e `progresso(feitos, total)`. Retorna os registros
+    atualizados; se alguma consulta ao Gemini falhou, levanta `FalhaCuradoria`
+    depois de gravar o resto, mantendo o checkpoint para a próxima execução.
+    """
+    checkpoint = checkpoint or Checkpoint()
+    fila = [r for r in pendentes if int(r["id"]) not in checkpoint.feitos]
+    total, atualizados, falhas = len(fila), [], []
+    with ThreadPoolExecutor(max_workers=trabalhadores) as pool:
+        for inicio in range(0, total, tamanho_bloco):
+            bloco = fila[inicio:inicio + tamanho_bloco]
+            novos, erros = _completar_bloco(bloco, api_google, api_gemini, pool, cache_meta)
+            if novos:
+                cliente.rpc("atualizar_livros_lote", {"itens": novos}).execute()
+                checkpoint.marcar(r["id"] for r in novos)
+                atualizados.extend(novos)
+                if ao_gravar:
+                    ao_gravar(novos)
+            falhas.extend(erros)
+            if progresso:
+                progresso(inicio + len(bloco), total)
+            if any(cota_esgotada(e) for _, e in erros):
+                raise FalhaCuradoria(f"Cota do Gemini esgotada (HTTP 429). {len(atualizados)} registros gravados; "
+                                     f"os outros {total - len(atualizados)} seguem pendentes. Tente mais tarde.",
+                                     atualizados)
+    if falhas:
+        n = sum(len(lote) for lote, _ in falhas)
+        raise FalhaCuradoria(f"{n} registros não foram completados (Gemini: {_resumo(falhas[0][1])}). "
+                             f"{len(atualizados)} gravados; rode de novo para tentar os que faltam.", atualizados)
+    checkpoint.limpar()
+    return atualizados
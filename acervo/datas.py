@@ -0,0 +1,44 @@
+"""Datas: gravadas em ISO (colunas date/timestamptz) e exibidas em dd/mm/aaaa."""
+from datetime import date, datetime
+
+import pandas as pd
+
+FORMATO_EXIBICAO = '%d/%m/%Y'
+FUSO = "America/Sao_Paulo"
+
+
+def hoje_iso():
+    return date.today().isoformat()
+
+
+def agora_iso():
+    # Com fuso, para o timestamptz do banco guardar o instante certo
+    return datetime.now().astimezone().isoformat(timespec="seconds")
+
+
+def inicio_do_dia(dia):
+    """Meia-noite de `dia` no fuso da escola, com deslocamento ('2026-01-01T00:00:00-03:00'), para filtrar timestamptz."""
+    return pd.Timestamp(dia).tz_localize(FUSO).isoformat()
+
+
+def exibir(valor):
+    """'2026-10-18' (ou date/datetime) -> '18/10/2026'. Vazio se não der para ler."""
+    if valor is None or valor != valor:
+        return ""
+    if isinstance(valor, str):
+        valor = pd.to_datetime(valor, errors="coerce")
+        if pd.isna(valor):
+            return ""
+    return valor.strftime(FORMATO_EXIBICAO)
+
+
+def colunas_para_data(df, datas=(), instantes=()):
+    """Converte colunas ISO vindas do PostgREST: `datas` (date) e `instantes` (timestamptz, no fuso local)."""
+    df = df.copy()
+    for c in datas:
+        if c in df:
+            df[c] = pd.to_datetime(df[c], errors="coerce")
+    for c in instantes:
+        if c in df:
+            df[c] = pd.to_datetime(df[c], errors="coerce", utc=True).dt.tz_convert(FUSO).dt.tz_localize(None)
+    return df
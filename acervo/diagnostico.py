@@ -0,0 +1,246 @@
+"""Instrumentação leve: tempo, linhas e bytes de cada chamada externa.
+
+`ClienteInstrumentado` envolve o cliente Supabase (cada `execute()` vira um
+registro) e `instrumentar_requests` faz o mesmo com as chamadas HTTP do
+`requests` (Google Books, Gemini). Os registros levam a aba e o rerun em que
+aconteceram e alimentam janelas móveis para p50/p95 por alvo. Opcionalmente,
+cada registro é anexado a um arquivo JSON-lines para análise offline.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+JANELA_HISTOGRAMA = 500   # últimas amostras por alvo usadas nos percentis
+MAX_REGISTROS = 5000      # registros individuais guardados em memória
+AMOSTRA_BYTES = 20        # linhas serializadas para estimar o tamanho quando não há resposta HTTP
+ARQUIVO_JSONL = os.environ.get("ACERVO_DIAGNOSTICO_JSONL")
+
+_contexto = threading.local()  # aba/rerun da sessão; cada sessão do Streamlit roda numa thread
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    k = (len(ordenados) - 1) * p
+    i = int(k)
+    return ordenados[i] + (ordenados[min(i + 1, len(ordenados) - 1)] - ordenados[i]) * (k - i)
+
+
+class Metricas:
+    def __init__(self, arquivo_jsonl=ARQUIVO_JSONL):
+        self._lock = threading.Lock()
+        self._registros = deque(maxlen=MAX_REGISTROS)
+        self._amostras = defaultdict(lambda: deque(maxlen=JANELA_HISTOGRAMA))
+        self._proximo_rerun = 0
+        self.arquivo_jsonl = arquivo_jsonl
+
+    # --- contexto do rerun -------------------------------------------------
+
+    def iniciar_rerun(self):
+        with self._lock:
+            self._proximo_rerun += 1
+            _contexto.rerun = self._proximo_rerun
+        _contexto.aba = None
+        _contexto.inicio = time.perf_counter()
+        return _contexto.rerun
+
+    def definir_aba(self, aba):
+        _contexto.aba = aba
+
+    def finalizar_rerun(self):
+        inicio = getattr(_contexto, "inicio", None)
+        if inicio is not None:
+            self.registrar("rerun", getattr(_contexto, "aba", None) or "-", (time.perf_counter() - inicio) * 1000)
+            _contexto.inicio = None
+
+    # --- registro -----------------------------------------------------------
+
+    def registrar(self, tipo, alvo, ms, linhas=None, bytes_=None, erro=None):
+        reg = {"ts": time.time(), "rerun": getattr(_contexto, "rerun", None), "aba": getattr(_contexto, "aba", None),
+               "tipo": tipo, "alvo": alvo, "ms": round(ms, 2), "linhas": linhas, "bytes": bytes_, "erro": erro}
+        with self._lock:
+            self._registros.append(reg)
+            self._amostras[(tipo, alvo)].append(ms)
+        if self.arquivo_jsonl:
+            try:
+                with open(self.arquivo_jsonl, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(reg, ensure_ascii=False) + "\n")
+            except OSError:
+                pass
+
+    @contextmanager
+    def medir(self, tipo, alvo):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(tipo, alvo, (time.perf_counter() - inicio) * 1000)
+
+    # --- consulta -----------------------------------------------------------
+
+    def registros(self, rerun=None):
+        with self._lock:
+            regs = list(self._registros)
+        return [r for r in regs if rerun is None or r["rerun"] == rerun]
+
+    def percentis(self):
+        """[{tipo, alvo, n, p50_ms, p95_ms, max_ms}] sobre a janela móvel de cada alvo."""
+        with self._lock:
+            amostras = {k: list(v) for k, v in self._amostras.items()}
+        return [{"tipo": t, "alvo": a, "n": len(v), "p50_ms": round(_percentil(v, 0.5), 1),
+                 "p95_ms": round(_percentil(v, 0.95), 1), "max_ms": round(max(v), 1)}
+                for (t, a), v in sorted(amostras.items())]
+
+    def exportar_jsonl(self):
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.registros()).encode("utf-8")
+
+    def limpar(self):
+        with self._lock:
+            self._registros.clear()
+            self._amostras.clear()
+
+
+# --- Supabase ------------------------------------------------------------------
+
+class _ConsultaInstrumentada:
+    """Repassa o query builder do supabase-py e mede o `execute()` final."""
+
+    def __init__(self, construtor, alvo, metricas):
+        self._construtor, self._alvo, self._metricas = construtor, alvo, metricas
+
+    def __getattr__(self, nome):
+        attr = getattr(self._construtor, nome)
+        if not callable(attr):
+            return attr
+
+        def chamada(*args, **kwargs):
+            res = attr(*args, **kwargs)
+            return _ConsultaInstrumentada(res, self._alvo, self._metricas) if hasattr(res, "execute") else res
+        return chamada
+
+    def execute(self):
+        _contexto.bytes_http = None
+        inicio = time.perf_counter()
+        try:
+            res = self._construtor.execute()
+        except Exception as e:
+            self._metricas.registrar("supabase", self._alvo, (time.perf_counter() - inicio) * 1000, erro=str(e)[:200])
+            raise
+        ms = (time.perf_counter() - inicio) * 1000
+        dados = getattr(res, "data", None)
+        linhas = len(dados) if isinstance(dados, list) else None
+        tamanho = _contexto.bytes_http if _contexto.bytes_http is not None else _estimar_bytes(dados)
+        self._metricas.registrar("supabase", self._alvo, ms, linhas, tamanho)
+        return res
+
+
+def _estimar_bytes(dados):
+    # Sem resposta HTTP (ex.: cliente em memória do bench): serializa só uma amostra das linhas
+    if dados is None:
+        return 0
+    if not isinstance(dados, list) or len(dados) <= AMOSTRA_BYTES:
+        return len(json.dumps(dados, default=str))
+    passo = len(dados) // AMOSTRA_BYTES
+    amostra = dados[::passo][:AMOSTRA_BYTES]
+    return round(len(json.dumps(amostra, default=str)) * len(dados) / len(amostra))
+
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - supabase-py sempre traz httpx
+    httpx = None
+
+
+if httpx is not None:
+    class _CorpoContado(httpx.SyncByteStream):
+        def __init__(self, corpo):
+            self._corpo, self._lidos = corpo, 0
+
+        def __iter__(self):
+            for parte in self._corpo:
+                self._lidos += len(parte)
+                yield parte
+            _contexto.bytes_http = self._lidos
+
+        def close(self):
+            self._corpo.close()
+
+    class _TransporteMedido(httpx.BaseTransport):
+        """Repassa ao transporte original e guarda na thread o tamanho da resposta lida."""
+
+        def __init__(self, original):
+            self.original = original
+
+        def handle_request(self, request):
+            resp = self.original.handle_request(request)
+            return httpx.Response(resp.status_code, headers=resp.headers, stream=_CorpoContado(resp.stream),
+                                  extensions=resp.extensions)
+
+        def close(self):
+            self.original.close()
+
+
+def _instrumentar_transporte(cliente):
+    """Mede as respostas da sessão httpx do PostgREST só deste cliente (supabase-py), para o `execute()` medido."""
+    sessao = getattr(getattr(cliente, "postgrest", None), "session", None)
+    transporte = getattr(sessao, "_transport", None)
+    if httpx is None or not isinstance(transporte, httpx.BaseTransport) or isinstance(transporte, _TransporteMedido):
+        return
+    sessao._transport = _TransporteMedido(transporte)
+
+
+class ClienteInstrumentado:
+    def __init__(self, cliente, metricas):
+        self._cliente, self._metricas = cliente, metricas
+
+    def table(self, nome):
+        # A cada chamada: o supabase-py recria a sessão do PostgREST quando o login muda
+        _instrumentar_transporte(self._cliente)
+        return _ConsultaInstrumentada(self._cliente.table(nome), nome, self._metricas)
+
+    def rpc(self, nome, params=None, **kwargs):
+        _instrumentar_transporte(self._cliente)
+        return _ConsultaInstrumentada(self._cliente.rpc(nome, params or {}, **kwargs), f"rpc:{nome}", self._metricas)
+
+    def __getattr__(self, nome):
+        return getattr(self._cliente, nome)
+
+
+# --- requests ------------------------------------------------------------------
+
+_requests_instrumentado = False
+
+
+def _alvo_http(url):
+    partes = urlparse(url)
+    caminho = [p for p in partes.path.split("/") if p][:2]
+    return partes.netloc + "/" + "/".join(caminho)
+
+
+def instrumentar_requests(metricas):
+    """Mede todas as chamadas feitas com `requests` (uma vez por processo)."""
+    global _requests_instrumentado
+    if _requests_instrumentado:
+        return
+    import requests
+
+    original = requests.Session.request
+
+    def request(sessao, method, url, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            resp = original(sessao, method, url, *args, **kwargs)
+        except Exception as e:
+            metricas.registrar("http", _alvo_http(url), (time.perf_counter() - inicio) * 1000, erro=str(e)[:200])
+            raise
+        metricas.registrar("http", _alvo_http(url), (time.perf_counter() - inicio) * 1000,
+                           bytes_=len(resp.content), erro=None if resp.ok else f"HTTP {resp.status_code}")
+        return resp
+
+    requests.Session.request = request
+    _requests_instrumentado = True
@@ -0,0 +1,324 @@
+"""Detecção de duplicatas prováveis no catálogo, em memória.
+
+Cada livro ganha uma chave de título normalizada (sem acentos, artigos e
+marcas de edição: "A Hora da Estrela - 2ª edição" e "hora da estrela" viram a
+mesma chave), uma chave de autor (tokens sem partículas, em qualquer ordem) e
+uma assinatura MinHash dos trigramas do título. As assinaturas são divididas
+em faixas (LSH): só livros que coincidem em alguma faixa viram candidatos, e
+os candidatos são ordenados pela similaridade exata (Jaccard dos trigramas,
+mais o autor quando os dois são conhecidos).
+
+`DuplicatasCatalogo` mantém o índice sincronizado com o `CatalogoCache`, como
+o `IndiceCatalogo` faz com o índice de busca.
+"""
+import re
+import threading
+import zlib
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+
+from acervo.busca import normalizar, trigramas
+from acervo.importacao import normalizar_isbn
+
+NUM_PERMUTACOES = 64
+FAIXAS = 16                  # 16 faixas de 4 valores: pares com Jaccard >= ~0.6 quase sempre viram candidatos
+MAX_BALDE = 500              # faixas compartilhadas por mais livros que isso são genéricas demais e são ignoradas
+SIMILARIDADE_MINIMA = 0.6
+PESO_AUTOR = 0.25
+BLOCO_ASSINATURAS = 5000     # livros por bloco no cálculo vetorizado das assinaturas
+LOTE_BASE = 1000             # lotes a partir desse tamanho vão para a base ordenada em vez dos dicionários
+
+PARTICULAS = {"o", "a", "os", "as", "um", "uma", "uns", "umas", "the", "an", "el", "la", "los", "las", "le", "les",
+              "de", "da", "do", "das", "dos", "e", "em", "no", "na", "nos", "nas", "of", "and", "y"}
+AUTORES_VAZIOS = {"", "pendente", "desconhecido", "autor desconhecido", "varios", "varios autores"}
+
+_EDICAO = re.compile(r"\b(\d+\s*[ao]?\s*)?(ed|edicao|edicoes|reimpressao|reimp|nova edicao)\b"
+                     r"(\s+(revista|ampliada|atualizada|especial|comemorativa|de bolso|bolso|ilustrada))*")
+_SEPARADOR_SUBTITULO = re.compile(r"\s*(?::|\s-\s|\(|\[)")
+
+# Permutações por multiplicação e deslocamento ((a*x + b) mod 2^64, 32 bits altos), com a ímpar
+_rng = np.random.RandomState(20240501)
+_A = _rng.randint(0, 1 << 62, size=NUM_PERMUTACOES, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.randint(0, 1 << 62, size=NUM_PERMUTACOES, dtype=np.int64).astype(np.uint64)
+_DESLOCAMENTO = np.uint64(32)
+_CODIGOS = {}                # trigrama -> crc32 (o vocabulário de trigramas é pequeno)
+_LINHAS_FAIXA = NUM_PERMUTACOES // FAIXAS
+_MISTURA = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5],
+                    dtype=np.uint64)[:_LINHAS_FAIXA]
+_SAL_FAIXA = np.arange(FAIXAS, dtype=np.uint64) * np.uint64(0xFF51AFD7ED558CCD)  # faixas diferentes, chaves diferentes
+
+
+def chave_titulo(titulo):
+    texto = _EDICAO.sub(" ", normalizar(titulo))
+    return " ".join(t for t in texto.split() if t not in PARTICULAS)
+
+
+def chave_titulo_principal(titulo, chave=None):
+    """Chave só do título principal (antes de ':', ' - ', parênteses)."""
+    if titulo is None or titulo != titulo:
+        return ""
+    partes = _SEPARADOR_SUBTITULO.split(str(titulo), 1)
+    if len(partes) == 1 and chave is not None:
+        return chave
+    return chave_titulo(partes[0])
+
+
+@lru_cache(maxsize=50_000)
+def _chave_autor(texto):
+    texto = normalizar(texto)
+    if texto in AUTORES_VAZIOS:
+        return frozenset()
+    return frozenset(t for t in texto.split() if t not in PARTICULAS and len(t) > 1)
+
+
+def chave_autor(autor):
+    # Os mesmos autores se repetem muito no acervo
+    if autor is None or autor != autor:
+        return frozenset()
+    return _chave_autor(str(autor))
+
+
+def _isbn_real(isbn):
+    # ISBNs gerados pelo app (M-..., IMP-...) não identificam o livro
+    valor = normalizar_isbn(isbn)
+    return valor if len(valor) in (10, 13) else ""
+
+
+def _trigramas_chave(chave):
+    return {tri for tok in chave.split() for tri in trigramas(tok)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def assinaturas(conjuntos):
+    """Matriz (len(conjuntos), NUM_PERMUTACOES) de MinHash; conjuntos vazios ficam com o valor máximo."""
+    saida = np.full((len(conjuntos), NUM_PERMUTACOES), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for ini in range(0, len(conjuntos), BLOCO_ASSINATURAS):
+        bloco = conjuntos[ini:ini + BLOCO_ASSINATURAS]
+        tamanhos = np.array([len(c) for c in bloco])
+        cheios = np.flatnonzero(tamanhos)
+        if not len(cheios):
+            continue
+        valores = np.fromiter((_CODIGOS.get(s) or _CODIGOS.setdefault(s, zlib.crc32(s.encode()))
+                               for i in cheios for s in bloco[i]), dtype=np.uint64, count=int(tamanhos[cheios].sum()))
+        hashes = np.multiply(_A[:, None], valores[None, :])
+        hashes += _B[:, None]
+        hashes >>= _DESLOCAMENTO
+        inicios = np.concatenate(([0], np.cumsum(tamanhos[cheios])[:-1]))
+        saida[ini + cheios] = np.minimum.reduceat(hashes, inicios, axis=1).T
+    return saida
+
+
+def faixas(matriz):
+    """Matriz (linhas, FAIXAS) com uma chave inteira por faixa LSH de cada assinatura."""
+    return (matriz.reshape(len(matriz), FAIXAS, _LINHAS_FAIXA) * _MISTURA).sum(axis=2) + _SAL_FAIXA
+
+
+class IndiceDuplicatas:
+    def __init__(self):
+        self._docs = {}                      # id -> (chave, chave_principal, trigramas, autor, isbn, números)
+        self._faixas_doc = {}                # id -> faixas LSH dos livros indexados um a um
+        self._baldes = defaultdict(set)      # chave de faixa LSH -> ids (livros indexados um a um)
+        # Carga em lote: pares (chave de faixa, id) ordenados pela chave e consultados com searchsorted,
+        # sem um set por balde (a maioria dos baldes tem um livro só)
+        self._base_chaves = np.empty(0, dtype=np.uint64)
+        self._base_docs = np.empty(0, dtype=np.int64)
+        self._fora_da_base = set()           # ids com entradas velhas na base (removidos ou reindexados)
+        self._por_chave = defaultdict(set)   # chave de título (completa ou principal) -> ids
+        self._por_isbn = defaultdict(set)
+
+    def __len__(self):
+        return len(self._docs)
+
+    @classmethod
+    def de_dataframe(cls, df):
+        indice = cls()
+        if not df.empty:
+            cols = [c for c in ("titulo", "autor", "isbn") if c in df.columns]
+            indice.indexar_varios(df[["id"] + cols].to_dict("records"))
+        return indice
+
+    @staticmethod
+    def _preparar(registro):
+        chave = chave_titulo(registro.get("titulo"))
+        return (chave, chave_titulo_principal(registro.get("titulo"), chave), _trigramas_chave(chave),
+                chave_autor(registro.get("autor")), _isbn_real(registro.get("isbn")),
+                frozenset(t for t in chave.split() if t.isdigit()))
+
+    def indexar_varios(self, registros):
+        preparados = [(int(r["id"]), self._preparar(r)) for r in registros]
+        chaves = faixas(assinaturas([p[2] for _, p in preparados]))
+        if len(preparados) < LOTE_BASE:
+            for (doc, prep), linha in zip(preparados, chaves.tolist()):
+                self._gravar(doc, prep, linha)
+            return
+        for doc, prep in preparados:
+            self._gravar(doc, prep, None)
+        self._juntar_base(np.array([d for d, _ in preparados], dtype=np.int64),
+                          np.array([bool(p[2]) for _, p in preparados], dtype=bool), chaves)
+
+    def _juntar_base(self, ids, com_trigramas, chaves):
+        velhos = np.fromiter(self._fora_da_base, dtype=np.int64, count=len(self._fora_da_base))
+        manter = ~np.isin(self._base_docs, np.concatenate((velhos, ids)))
+        todas = np.concatenate((self._base_chaves[manter], chaves[com_trigramas].ravel()))
+        docs = np.concatenate((self._base_docs[manter], np.repeat(ids[com_trigramas], FAIXAS)))
+        ordem = np.argsort(todas, kind="stable")
+        self._base_chaves, self._base_docs = todas[ordem], docs[ordem]
+        self._fora_da_base.clear()
+
+    def indexar(self, registro):
+        self.indexar_varios([registro])
+
+    def _gravar(self, doc, prep, chaves):
+        if doc in self._docs:
+            self.remover(doc)
+        chave, principal, tris, _, isbn, _ = prep
+        self._docs[doc] = prep
+        if tris and chaves is not None:
+            baldes = self._baldes
+            for b in chaves:
+                baldes[b].add(doc)
+            self._faixas_doc[doc] = chaves
+        for c in {chave, principal} - {""}:
+            self._por_chave[c].add(doc)
+        if isbn:
+            self._por_isbn[isbn].add(doc)
+
+    def remover(self, doc):
+        prep = self._docs.pop(doc, None)
+        if prep is None:
+            return
+        chaves = self._faixas_doc.pop(doc, None)
+        if chaves is None:
+            self._fora_da_base.add(doc)
+        else:
+            for b in chaves:
+                self._baldes[b].discard(doc)
+                if not self._baldes[b]:
+                    del self._baldes[b]
+        for c in {prep[0], prep[1]} - {""}:
+            self._por_chave[c].discard(doc)
+        if prep[4]:
+            self._por_isbn[prep[4]].discard(doc)
+
+    def _pontuar(self, consulta, doc, minimo=0.0):
+        """(similaridade, motivo), ou None quando não há como chegar ao mínimo."""
+        chave, principal, tris, autor, isbn, numeros = consulta
+        d_chave, d_principal, d_tris, d_autor, d_isbn, d_numeros = self._docs[doc]
+        if isbn and isbn == d_isbn:
+            return 1.0, "ISBN"
+        if numeros and d_numeros and numeros != d_numeros:
+            return None  # "Diário de um Banana 1" e "... 2" são volumes diferentes
+        if chave and chave == d_chave:
+            sim, motivo = 1.0, "título"
+        elif principal and (principal in (d_principal, d_chave) or chave == d_principal):
+            sim, motivo = 0.9, "título principal"
+        else:
+            # Jaccard nunca passa da razão entre os tamanhos: descarta sem calcular a interseção
+            teto = min(len(tris), len(d_tris)) / max(len(tris), len(d_tris), 1)
+            if autor and d_autor:
+                teto = (1 - PESO_AUTOR) * teto + PESO_AUTOR
+            if teto < minimo:
+                return None
+            sim, motivo = jaccard(tris, d_tris), "título parecido"
+        if autor and d_autor:
+            sim = (1 - PESO_AUTOR) * sim + PESO_AUTOR * jaccard(autor, d_autor)
+            motivo += " + autor"
+        return sim, motivo
+
+    def _candidatos(self, consulta, chaves, esquerda, direita):
+        chave, principal, tris, _, isbn, _ = consulta
+        ids = set(self._por_isbn.get(isbn, ())) if isbn else set()
+        for c in {chave, principal} - {""}:
+            ids |= self._por_chave.get(c, set())
+        if tris:
+            da_base = set()
+            for b, e, d in zip(chaves, esquerda, direita):
+                if 0 < d - e <= MAX_BALDE:
+                    da_base.update(self._base_docs[e:d].tolist())
+                balde = self._baldes.get(b)
+                if balde and len(balde) <= MAX_BALDE:
+                    ids |= balde
+            ids |= da_base - self._fora_da_base
+        return ids
+
+    def parecidos(self, titulo, autor=None, isbn=None, limite=5, minimo=SIMILARIDADE_MINIMA, ignorar=()):
+        """[(id, similaridade, motivo)] do mais para o menos parecido."""
+        return self.parecidos_varios([{"titulo": titulo, "autor": autor, "isbn": isbn}], limite, minimo, ignorar)[0]
+
+    def parecidos_varios(self, registros, limite=5, minimo=SIMILARIDADE_MINIMA, ignorar=()):
+        """Como `parecidos`, para vários registros de uma vez (assinaturas calculadas em bloco)."""
+        consultas = [self._preparar(r) for r in registros]
+        saida = []
+        chaves = faixas(assinaturas([c[2] for c in consultas]))
+        esquerda = np.searchsorted(self._base_chaves, chaves, "left").tolist()
+        direita = np.searchsorted(self._base_chaves, chaves, "right").tolist()
+        ignorar = set(ignorar)
+        for consulta, ch, e, d in zip(consultas, chaves.tolist(), esquerda, direita):
+            achados = []
+            for doc in self._candidatos(consulta, ch, e, d) - ignorar:
+                ponto = self._pontuar(consulta, doc, minimo)
+                if ponto and ponto[0] >= minimo:
+                    achados.append((doc, round(ponto[0], 3), ponto[1]))
+            achados.sort(key=lambda a: -a[1])
+            saida.append(achados[:limite] if limite else achados)
+        return saida
+
+
+class DuplicatasCatalogo:
+    """Índice de duplicatas do catálogo compartilhado entre sessões (criado via st.cache_resource)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indice = IndiceDuplicatas()
+        self._versao = -1
+
+    def obter(self, catalogo):
+        df, versao = catalogo.snapshot()
+        with self._lock:
+            if self._versao == versao:
+                return self._indice
+            mudancas = catalogo.mudancas_desde(self._versao) if self._versao >= 0 else None
+            if mudancas is None:
+                self._indice = IndiceDuplicatas.de_dataframe(df)
+            else:
+                for v, tipo, doc, registro in mudancas:
+                    if tipo == "remover":
+                        self._indice.remover(doc)
+                    else:
+                        self._indice.indexar(registro)
+                    versao = max(versao, v)
+            self._versao = versao
+            return self._indice
+
+    def buscar(self, catalogo, titulo, autor=None, isbn=None, limite=5, minimo=SIMILARIDADE_MINIMA):
+        """Linhas do catálogo parecidas com o livro informado, com `similaridade` e `motivo`, da mais parecida."""
+        return self.buscar_varios(catalogo, [{"titulo": titulo, "autor": autor, "isbn": isbn}], limite, minimo)[0]
+
+    def parecidos_varios(self, catalogo, registros, limite=1, minimo=SIMILARIDADE_MINIMA):
+        """[(id, similaridade, motivo)] para cada registro, com o índice já na versão atual do catálogo."""
+        indice = self.obter(catalogo)
+        with self._lock:  # o índice é alterado in-place por outras sessões
+            return indice.parecidos_varios(registros, limite, minimo)
+
+    def buscar_varios(self, catalogo, registros, limite=1, minimo=SIMILARIDADE_MINIMA):
+        df = catalogo.df()
+        achados = self.parecidos_varios(catalogo, registros, limite, minimo)
+        if df.empty:
+            return [df.iloc[0:0] for _ in registros]
+        pos = df.reset_index(drop=True)
+        linha = dict(zip(pos["id"].astype(int), range(len(pos))))
+        saida = []
+        for lista in achados:
+            lista = [a for a in lista if a[0] in linha]
+            res = pos.iloc[[linha[a[0]] for a in lista]].copy()
+            res["similaridade"] = [a[1] for a in lista]
+            res["motivo"] = [a[2] for a in lista]
+            saida.append(res)
+        return saida
@@ -0,0 +1,175 @@
+"""Estatísticas de circulação a partir das tabelas pré-agregadas.
+
+Os contadores por livro, gênero, turma e mês são mantidos pelo banco a cada
+empréstimo/devolução (sql/008_estatisticas.sql), então `carregar` lê só
+tabelas pequenas, do tamanho do acervo e não do histórico. Uma vez por dia o
+resultado é compactado num snapshot Parquet em DIR_LOCAL/estatisticas/, que o
+painel usa quando o Supabase não responde.
+
+Compactação noturna via cron (usa o mesmo [supabase] do secrets.toml do app;
+no Python anterior ao 3.11 precisa do pacote `tomli`):
+    python -m acervo.estatisticas --secrets .streamlit/secrets.toml
+
+Devoluções anteriores ao sql/008 não têm data registrada: o backfill as conta
+no mês da data prevista de retorno (ou no mês atual, se ainda não chegou),
+então o histórico mensal de devoluções é aproximado.
+"""
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from acervo.config import caminho_local
+from acervo.datas import colunas_para_data
+from acervo.exportacao import parquet_disponivel
+
+DIAS_PARADO = 180            # títulos sem empréstimo há mais tempo que isso contam como parados
+LIMITE_LISTAS = 200          # linhas guardadas de "mais emprestados" e "parados"
+MANTER_SNAPSHOTS = 7
+
+COLUNAS_CONTADORES = "emprestimos, devolucoes"
+COLUNAS_USO = "id, titulo, autor, genero, quantidade, emprestimos, ultimo_emprestimo"
+
+_DIA = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def _df(res, colunas, datas=()):
+    return colunas_para_data(pd.DataFrame(res.data or [], columns=[c.strip() for c in colunas.split(",")]), datas)
+
+
+def carregar(cliente, limite=LIMITE_LISTAS, dias_parado=DIAS_PARADO):
+    """{nome: DataFrame} com as agregações do painel e um `resumo` de uma linha."""
+    dados = {}
+    for nome, chave in (("generos", "genero"), ("turmas", "turma")):
+        colunas = f"{chave}, {COLUNAS_CONTADORES}"
+        dados[nome] = _df(cliente.table(f"estat_{nome}").select(colunas).order("emprestimos", desc=True).execute(), colunas)
+    colunas = f"mes, {COLUNAS_CONTADORES}"
+    dados["meses"] = _df(cliente.table("estat_meses").select(colunas).order("mes").execute(), colunas, ["mes"])
+
+    res = (cliente.table("estat_uso_livros").select(COLUNAS_USO).gt("emprestimos", 0)
+           .order("emprestimos", desc=True).limit(limite).execute())
+    dados["mais_emprestados"] = _df(res, COLUNAS_USO, ["ultimo_emprestimo"])
+    corte = (date.today() - timedelta(days=dias_parado)).isoformat()
+    res = (cliente.table("estat_uso_livros").select(COLUNAS_USO, count="exact")
+           .or_(f"ultimo_emprestimo.is.null,ultimo_emprestimo.lt.{corte}")
+           .order("ultimo_emprestimo", nullsfirst=True).order("titulo").limit(limite).execute())
+    dados["parados"] = _df(res, COLUNAS_USO, ["ultimo_emprestimo"])
+    # Em aberto contado direto (índice por status), e não como empréstimos - devoluções dos contadores
+    abertos = cliente.table("emprestimos").select("id", count="exact").eq("status", "Ativo").limit(1).execute()
+
+    dados["resumo"] = pd.DataFrame([{
+        "emprestimos": int(dados["meses"]["emprestimos"].sum()),
+        "devolucoes": int(dados["meses"]["devolucoes"].sum()),
+        "em_aberto": abertos.count if abertos.count is not None else len(abertos.data or []),
+        "parados": res.count if res.count is not None else len(dados["parados"]),
+        "dias_parado": dias_parado,
+        "gerado_em": pd.Timestamp.now().floor("s"),
+    }])
+    return dados
+
+
+# =================================================================
+# Snapshots Parquet (um diretório por dia)
+# =================================================================
+def pasta_snapshots():
+    return caminho_local("estatisticas")
+
+
+def snapshots(pasta=None):
+    """Diretórios de snapshot existentes, do mais antigo para o mais recente."""
+    pasta = pasta or pasta_snapshots()
+    if not os.path.isdir(pasta):
+        return []
+    return [os.path.join(pasta, n) for n in sorted(os.listdir(pasta)) if _DIA.match(n)]
+
+
+def gravar_snapshot(dados, pasta=None, dia=None):
+    """Grava cada DataFrame como <pasta>/<aaaa-mm-dd>/<nome>.parquet e apaga os snapshots mais antigos."""
+    pasta = pasta or pasta_snapshots()
+    destino = os.path.join(pasta, (dia or date.today()).isoformat())
+    temporario = f"{destino}.tmp-{os.getpid()}"
+    os.makedirs(temporario, exist_ok=True)
+    for nome, df in dados.items():
+        df.to_parquet(os.path.join(temporario, f"{nome}.parquet"), index=False)
+    shutil.rmtree(destino, ignore_errors=True)
+    os.replace(temporario, destino)
+    for antigo in snapshots(pasta)[:-MANTER_SNAPSHOTS]:
+        shutil.rmtree(antigo, ignore_errors=True)
+    return destino
+
+
+def ler_snapshot(caminho):
+    return {n[:-len(".parquet")]: pd.read_parquet(os.path.join(caminho, n))
+            for n in os.listdir(caminho) if n.endswith(".parquet")}
+
+
+def compactar(cliente, pasta=None):
+    """Snapshot do dia a partir das tabelas agregadas (para rodar de madrugada via cron ou pelo painel)."""
+    return gravar_snapshot(carregar(cliente), pasta)
+
+
+class PainelEstatisticas:
+    """Dados do painel guardados por `ttl` segundos, com snapshot diário e fallback para o último snapshot.
+
+    Criado via st.cache_resource. `dados()` retorna ({nome: DataFrame}, origem),
+    onde origem é None para dados ao vivo ou a data do snapshot usado.
+    """
+
+    def __init__(self, cliente, ttl=120, pasta=None):
+        self._cliente, self._ttl, self._pasta = cliente, ttl, pasta
+        self._lock = threading.Lock()
+        self._dados = None
+        self._carregado_em = 0.0
+
+    def dados(self):
+        with self._lock:
+            if self._dados is None or time.monotonic() - self._carregado_em > self._ttl:
+                try:
+                    self._dados = (carregar(self._cliente), None)
+                except Exception:
+                    recentes = snapshots(self._pasta) if parquet_disponivel() else []
+                    if not recentes:
+                        raise
+                    self._dados = (ler_snapshot(recentes[-1]), os.path.basename(recentes[-1]))
+                else:
+                    self._compactar_se_preciso(self._dados[0])
+                self._carregado_em = time.monotonic()
+            return self._dados
+
+    def _compactar_se_preciso(self, dados):
+        # A primeira leitura de cada dia vira o snapshot do dia (a "compactação noturna" sem cron)
+        if not parquet_disponivel():
+            return
+        recentes = snapshots(self._pasta)
+        if not recentes or os.path.basename(recentes[-1]) < date.today().isoformat():
+            gravar_snapshot(dados, self._pasta)
+
+    def invalidar(self):
+        with self._lock:
+            self._dados = None
+
+
+def main(argv=None):
+    import argparse
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        import tomli as tomllib
+
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description="Grava o snapshot Parquet do dia das estatísticas de circulação.")
+    parser.add_argument("--secrets", default=os.path.join(".streamlit", "secrets.toml"))
+    parser.add_argument("--pasta", help="destino dos snapshots (padrão: DIR_LOCAL/estatisticas)")
+    args = parser.parse_args(argv)
+    with open(args.secrets, "rb") as f:
+        conf = tomllib.load(f)["supabase"]
+    print(compactar(create_client(conf["url"], conf["key"]), args.pasta))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Exportação do acervo em Excel (uma aba por gênero), CSV e Parquet.
+
+O catálogo é agrupado por gênero uma única vez e o Excel é escrito com o
+openpyxl em modo write-only (linha a linha, sem manter as células em
+memória). Os arquivos gerados ficam guardados por versão do catálogo: baixar
+de novo sem mudança no acervo não gera nada.
+"""
+import threading
+from io import BytesIO
+
+COLUNAS_EXPORTACAO = ['titulo', 'autor', 'genero', 'quantidade', 'isbn']
+
+FORMATOS = {
+    "xlsx": ("Excel (abas por gênero)", "Acervo_Escolar_Completo.xlsx",
+             "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV", "Acervo_Escolar_Completo.csv", "text/csv"),
+    "parquet": ("Parquet", "Acervo_Escolar_Completo.parquet", "application/octet-stream"),
+}
+
+
+def nome_aba(genero, usados):
+    # Excel: máx. 31 caracteres, sem símbolos, nomes únicos
+    base = "".join(c for c in str(genero) if c.isalnum() or c == ' ').strip()[:30] or "Sem genero"
+    nome, n = base, 2
+    while nome.lower() in usados:
+        sufixo = f" {n}"
+        nome, n = base[:30 - len(sufixo)] + sufixo, n + 1
+    usados.add(nome.lower())
+    return nome
+
+
+def gerar_xlsx(df):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    usados = set()
+    dados = df[COLUNAS_EXPORTACAO]
+    for genero, grupo in dados.groupby(dados['genero'].fillna("Sem gênero"), sort=True):
+        ws = wb.create_sheet(nome_aba(genero, usados))
+        ws.append(COLUNAS_EXPORTACAO)
+        for linha in grupo.itertuples(index=False, name=None):
+            ws.append([None if v != v else v for v in linha])  # NaN vira célula vazia
+    if not usados:
+        wb.create_sheet("Acervo").append(COLUNAS_EXPORTACAO)
+    saida = BytesIO()
+    wb.save(saida)
+    return saida.getvalue()
+
+
+def gerar_csv(df):
+    return df[COLUNAS_EXPORTACAO].to_csv(index=False).encode("utf-8-sig")  # BOM para o Excel abrir com acentos
+
+
+def gerar_parquet(df):
+    saida = BytesIO()
+    df[COLUNAS_EXPORTACAO].to_parquet(saida, index=False)
+    return saida.getvalue()
+
+
+GERADORES = {"xlsx": gerar_xlsx, "csv": gerar_csv, "parquet": gerar_parquet}
+
+
+def parquet_disponivel():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class CacheExportacao:
+    """Guarda o último arquivo gerado de cada formato, junto da versão do catálogo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._arquivos = {}  # formato -> (versao, bytes)
+
+    def obter(self, catalogo, formato):
+        df, versao = catalogo.snapshot()
+        with self._lock:
+            guardado = self._arquivos.get(formato)
+            if guardado and guardado[0] == versao:
+                return guardado[1]
+        conteudo = GERADORES[formato](df)
+        with self._lock:
+            self._arquivos[formato] = (versao, conteudo)
+        return conteudo
@@ -0,0 +1,59 @@
+"""Faceta de gêneros: nomes com número de títulos e de volumes.
+
+Lê a view `generos_contagem` (sql/004_generos.sql), que agrupa no banco, e
+guarda o resultado em memória com TTL. Cadastros feitos pelo app atualizam
+as contagens na hora (`registrar`), então um gênero novo aparece nos
+formulários sem esperar o TTL.
+"""
+import threading
+import time
+
+GENEROS_TTL = 600
+
+
+class ServicoGeneros:
+    def __init__(self, cliente, catalogo=None, ttl=GENEROS_TTL):
+        self._cliente, self._catalogo, self._ttl = cliente, catalogo, ttl
+        self._lock = threading.Lock()
+        self._contagens = None  # {genero: [titulos, volumes]}
+        self._carregado_em = 0.0
+
+    def _carregar(self):
+        try:
+            res = self._cliente.table("generos_contagem").select("genero, titulos, volumes").execute()
+            return {r["genero"]: [int(r["titulos"]), int(r["volumes"])] for r in (res.data or [])}
+        except Exception:
+            # View ainda não criada: agrupa a partir do catálogo em cache
+            if self._catalogo is None:
+                raise
+            df = self._catalogo.df()
+            if df.empty:
+                return {}
+            grupos = df[df["genero"].fillna("") != ""].groupby("genero")["quantidade"].agg(["count", "sum"])
+            return {g: [int(c), int(s)] for g, (c, s) in grupos.iterrows()}
+
+    def contagens(self):
+        """{genero: (titulos, volumes)}."""
+        with self._lock:
+            if self._contagens is None or time.monotonic() - self._carregado_em > self._ttl:
+                self._contagens = self._carregar()
+                self._carregado_em = time.monotonic()
+            return {g: tuple(v) for g, v in self._contagens.items()}
+
+    def nomes(self):
+        return sorted(self.contagens())
+
+    def registrar(self, genero, titulos=1, volumes=0):
+        """Soma um cadastro às contagens em memória (cria o gênero se for novo)."""
+        if not genero:
+            return
+        with self._lock:
+            if self._contagens is None:
+                return
+            atual = self._contagens.setdefault(genero, [0, 0])
+            atual[0] += titulos
+            atual[1] += volumes
+
+    def invalidar(self):
+        with self._lock:
+            self._contagens = None
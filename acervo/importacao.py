@@ -0,0 +1,188 @@
+"""Importação em massa da planilha do Diretor.
+
+A planilha é lida em modo read-only (linha a linha, sem carregar estilos), a
+checagem de duplicatas é feita de uma vez (conjuntos de ISBN/título
+normalizados, ou o índice de duplicatas prováveis de `acervo.duplicatas`) e a
+gravação vai em lotes limitados, com nova tentativa por lote.
+"""
+import re
+import time
+from collections import Counter
+
+import pandas as pd
+
+from acervo.datas import agora_iso
+from acervo.leitor import isbn10_para_13
+
+ABA_PADRAO = "Livros Escaneados"
+COLUNAS_PLANILHA = {"ISBN": "isbn", "Título": "titulo", "Autor(es)": "autor", "Sinopse": "sinopse", "Categorias": "genero"}
+TAMANHO_LOTE = 500
+TENTATIVAS = 3
+ANOTACOES = ("duplicata_de", "similaridade", "motivo")  # campos dos conflitos que não vão para o banco
+
+_NAO_ISBN = re.compile(r"[^0-9X]")
+
+
+def normalizar_isbn(valor):
+    if valor is None or valor != valor:  # None ou NaN
+        return ""
+    if isinstance(valor, float) and valor.is_integer():  # Excel guarda ISBN como 9788535902771.0
+        valor = int(valor)
+    return _NAO_ISBN.sub("", str(valor).strip().upper())
+
+
+def chave_isbn(valor):
+    """ISBN normalizado, com ISBN-10 convertido para 13 dígitos: "85-359-0277-5" casa com 9788535902778."""
+    isbn = normalizar_isbn(valor)
+    return (isbn10_para_13(isbn) or isbn) if len(isbn) == 10 else isbn
+
+
+def posicoes_por_isbn(df):
+    """{chave_isbn: posição} das linhas de `df` (ex.: o catálogo em memória) que têm ISBN."""
+    if df.empty or "isbn" not in df:
+        return {}
+    return {c: i for i, c in enumerate(df["isbn"].map(chave_isbn)) if c}
+
+
+def normalizar_titulo(serie):
+    return serie.fillna("").astype(str).str.strip().str.lower()
+
+
+def ler_planilha(arquivo, aba=ABA_PADRAO):
+    """Lê só as colunas conhecidas da aba indicada (nome da aba sem diferenciar maiúsculas)."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        nomes = {n.strip().lower(): n for n in wb.sheetnames}
+        if aba.lower() not in nomes:
+            raise ValueError(f"Aba '{aba}' não encontrada. Abas disponíveis: {', '.join(wb.sheetnames)}")
+        linhas = wb[nomes[aba.lower()]].iter_rows(values_only=True)
+        cabecalho = [str(c).strip() if c is not None else "" for c in next(linhas, ())]
+        posicoes = {COLUNAS_PLANILHA[c]: i for i, c in enumerate(cabecalho) if c in COLUNAS_PLANILHA}
+        dados = {campo: [] for campo in posicoes}
+        for linha in linhas:
+            if not any(v is not None for v in linha):
+                continue
+            for campo, i in posicoes.items():
+                dados[campo].append(linha[i] if i < len(linha) else None)
+    finally:
+        wb.close()
+    return pd.DataFrame(dados)
+
+
+def preparar(df_up, df_banco, parecidos=None):
+    """Separa as linhas da planilha em (novos, conflitos), já no formato de `livros_acervo`.
+
+    Linhas repetidas na própria planilha (mesmo ISBN ou, sem ISBN, mesmo
+    título) viram um registro só, com quantidade = número de linhas: cada
+    linha escaneada é um exemplar.
+
+    Sem `parecidos`, conflito é ISBN igual ou título igual (sem diferenciar
+    maiúsculas). Com `parecidos(registros)` -> [(id, similaridade, motivo)] por
+    registro (ex.: `DuplicatasCatalogo.parecidos_varios`), conflito é ter uma
+    duplicata provável, e o conflito ganha os campos de ANOTACOES.
+    """
+    if df_up.empty:
+        return [], []
+    df = pd.DataFrame(index=df_up.index)
+    isbn = df_up["isbn"].map(normalizar_isbn) if "isbn" in df_up else pd.Series("", index=df_up.index)
+    carimbo = int(time.time())
+    df["isbn"] = isbn.where(isbn != "", [f"IMP-{carimbo}-{i}" for i in range(len(df_up))])
+    df["titulo"] = df_up["titulo"].fillna("").astype(str).str.strip() if "titulo" in df_up else ""
+    for campo, padrao in (("autor", "Pendente"), ("sinopse", "Pendente"), ("genero", "Geral")):
+        df[campo] = df_up[campo].fillna(padrao).astype(str) if campo in df_up else padrao
+    chave = isbn.where(isbn != "", "T:" + normalizar_titulo(df["titulo"]))
+    chave = chave.where(chave != "T:", pd.Series([f"L:{i}" for i in range(len(df))], index=df.index))
+    df["quantidade"] = chave.map(chave.value_counts()).astype(int)
+    primeira = ~chave.duplicated()
+    df, isbn = df[primeira], isbn[primeira]
+    df["data_cadastro"] = agora_iso()
+
+    registros = df.to_dict("records")
+    if parecidos is not None and not df_banco.empty:
+        titulos = dict(zip(df_banco["id"].astype(int), df_banco["titulo"]))
+        achados = parecidos([{"titulo": r["titulo"], "autor": r["autor"], "isbn": i} for r, i in zip(registros, isbn)])
+        novos, conflitos = [], []
+        for r, lista in zip(registros, achados):
+            if not lista:
+                novos.append(r)
+                continue
+            doc, sim, motivo = lista[0]
+            conflitos.append({**r, "duplicata_de": titulos.get(doc, ""), "similaridade": sim, "motivo": motivo})
+        return novos, conflitos
+
+    if df_banco.empty:
+        duplicado = pd.Series(False, index=df.index)
+    else:
+        isbns_banco = set(df_banco["isbn"].map(normalizar_isbn))
+        isbns_banco.discard("")
+        titulos_banco = set(normalizar_titulo(df_banco["titulo"]))
+        duplicado = isbn.isin(isbns_banco) | normalizar_titulo(df["titulo"]).isin(titulos_banco)
+
+    novos = [r for r, d in zip(registros, duplicado) if not d]
+    conflitos = [r for r, d in zip(registros, duplicado) if d]
+    return novos, conflitos
+
+
+def sem_anotacoes(registros):
+    return [{k: v for k, v in r.items() if k not in ANOTACOES} for r in registros]
+
+
+def _chave_gravacao(registro):
+    instante = pd.to_datetime(registro.get("data_cadastro"), utc=True, errors="coerce")
+    return registro.get("isbn"), registro.get("titulo"), str(instante)
+
+
+def _separar_gravados(cliente, lote):
+    """(já no banco, ainda não) para um lote cujo insert pode ter sido gravado antes de falhar.
+
+    Compara ISBN, título e data_cadastro (o mesmo carimbo para toda a
+    importação); cada linha do banco conta para um único registro do lote.
+    """
+    faltam = Counter(_chave_gravacao(r) for r in lote)
+    res = cliente.table("livros_acervo").select("*").in_("isbn", sorted({r["isbn"] for r in lote})).execute()
+    gravados = []
+    for linha in res.data or []:
+        chave = _chave_gravacao(linha)
+        if faltam[chave] > 0:
+            faltam[chave] -= 1
+            gravados.append(linha)
+    restantes = []
+    for r in lote:
+        chave = _chave_gravacao(r)
+        if faltam[chave] > 0:
+            faltam[chave] -= 1
+            restantes.append(r)
+    return gravados, restantes
+
+
+def inserir_em_lotes(cliente, registros, tamanho=TAMANHO_LOTE, tentativas=TENTATIVAS, progresso=None):
+    """Insere em lotes de `tamanho`, com backoff exponencial por lote.
+
+    Antes de reenviar um lote, confere quais registros dele já estão no banco
+    (a resposta pode ter falhado depois do commit) e reenvia só o resto, para
+    a nova tentativa não duplicar livros. `progresso(feitos, total)` é chamado
+    após cada lote. Retorna as linhas inseridas; se um lote falhar de vez,
+    levanta RuntimeError informando quantos registros já tinham sido gravados.
+    """
+    inseridos = []
+    for inicio in range(0, len(registros), tamanho):
+        lote = registros[inicio:inicio + tamanho]
+        for tentativa in range(tentativas):
+            try:
+                if tentativa:
+                    gravados, lote = _separar_gravados(cliente, lote)
+                    inseridos.extend(gravados)
+                if lote:
+                    res = cliente.table("livros_acervo").insert(lote).execute()
+                    inseridos.extend(res.data or [])
+                break
+            except Exception as e:
+                if tentativa == tentativas - 1:
+                    raise RuntimeError(f"Falha no lote iniciado na linha {inicio + 1} "
+                                       f"({len(inseridos)} registros já gravados): {e}") from e
+                time.sleep(2 ** tentativa)
+        if progresso:
+            progresso(min(inicio + tamanho, len(registros)), len(registros))
+    return inseridos
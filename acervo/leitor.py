@@ -0,0 +1,122 @@
+"""Leitura de ISBN por foto para inventário de estantes.
+
+Cada imagem é reduzida, as regiões com cara de código de barras são
+recortadas (gradiente + morfologia no OpenCV) e decodificadas pelo pyzbar
+(EAN-13). Só se nada for lido entra o Tesseract em português, e apenas na
+linha onde aparece "ISBN". As imagens são distribuídas num pool de processos.
+
+OpenCV, pyzbar e pytesseract são importados dentro das funções: só quem usa
+a leitura paga o custo de carregá-los.
+"""
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+LADO_MAXIMO = 1280  # px; imagens de celular são reduzidas antes da leitura
+MAX_REGIOES = 4
+_ISBN_TEXTO = re.compile(r"(97[89][\d\- ]{10,14}|\d[\d\- ]{8,11}[\dXx])")
+
+
+def isbn13_valido(codigo):
+    if not re.fullmatch(r"97[89]\d{10}", codigo):
+        return False
+    soma = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(codigo[:12]))
+    return (10 - soma % 10) % 10 == int(codigo[12])
+
+
+def isbn10_para_13(codigo):
+    if not re.fullmatch(r"\d{9}[\dX]", codigo):
+        return None
+    if sum((10 - i) * (10 if c == "X" else int(c)) for i, c in enumerate(codigo)) % 11:
+        return None
+    base = "978" + codigo[:9]
+    soma = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(base))
+    return base + str((10 - soma % 10) % 10)
+
+
+def _isbns_no_texto(texto):
+    achados = []
+    for bruto in _ISBN_TEXTO.findall(texto.upper()):
+        cod = re.sub(r"[^\dX]", "", bruto)
+        cod = cod if len(cod) == 13 else isbn10_para_13(cod)
+        if cod and isbn13_valido(cod):
+            achados.append(cod)
+    return achados
+
+
+def _regioes_de_codigo(cinza):
+    """Recortes candidatos: regiões com muito gradiente horizontal (barras verticais)."""
+    import cv2
+
+    gx = cv2.Sobel(cinza, cv2.CV_32F, 1, 0, ksize=-1)
+    gy = cv2.Sobel(cinza, cv2.CV_32F, 0, 1, ksize=-1)
+    grad = cv2.convertScaleAbs(cv2.subtract(gx, gy))
+    _, bin_ = cv2.threshold(cv2.blur(grad, (9, 9)), 225, 255, cv2.THRESH_BINARY)
+    bin_ = cv2.morphologyEx(bin_, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (21, 7)))
+    bin_ = cv2.dilate(cv2.erode(bin_, None, iterations=4), None, iterations=4)
+    contornos, _ = cv2.findContours(bin_, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    regioes = []
+    for c in sorted(contornos, key=cv2.contourArea, reverse=True)[:MAX_REGIOES]:
+        x, y, w, h = cv2.boundingRect(c)
+        m = max(10, h // 4)  # margem: o pyzbar precisa da zona silenciosa
+        regioes.append(cinza[max(0, y - m):y + h + m, max(0, x - m):x + w + m])
+    return regioes
+
+
+def _ocr_linha_isbn(cinza):
+    import pytesseract
+
+    dados = pytesseract.image_to_data(cinza, lang="por", output_type=pytesseract.Output.DICT)
+    for i, palavra in enumerate(dados["text"]):
+        if "ISBN" not in palavra.upper():
+            continue
+        y, h = dados["top"][i], dados["height"][i]
+        linha = cinza[max(0, y - h):y + 2 * h, :]
+        texto = pytesseract.image_to_string(linha, lang="por", config="--psm 7 -c tessedit_char_whitelist=0123456789-Xx")
+        achados = _isbns_no_texto(texto) or _isbns_no_texto(palavra + texto)
+        if achados:
+            return achados
+    return []
+
+
+def decodificar_imagem(conteudo):
+    """Lê uma imagem (bytes). Retorna (lista de ISBN-13, método: 'barras' | 'ocr' | None)."""
+    import cv2
+    import numpy as np
+    from pyzbar.pyzbar import ZBarSymbol, decode
+
+    cinza = cv2.imdecode(np.frombuffer(conteudo, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if cinza is None:
+        return [], None
+    escala = LADO_MAXIMO / max(cinza.shape)
+    if escala < 1:
+        cinza = cv2.resize(cinza, None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+
+    for regiao in _regioes_de_codigo(cinza) + [cinza]:
+        if regiao.size == 0:
+            continue
+        codigos = {c.data.decode("ascii", "ignore") for c in decode(regiao, symbols=[ZBarSymbol.EAN13])}
+        isbns = sorted(c for c in codigos if isbn13_valido(c))
+        if isbns:
+            return isbns, "barras"
+    isbns = _ocr_linha_isbn(cinza)
+    return isbns, ("ocr" if isbns else None)
+
+
+def processar_lote(imagens, trabalhadores=None):
+    """Lê várias imagens em paralelo.
+
+    Retorna (por_imagem, contagem_isbn, imagens_por_segundo), em que
+    `por_imagem` é [(isbns, método)] na ordem recebida e `contagem_isbn` é um
+    Counter com quantas fotos mostraram cada ISBN.
+    """
+    inicio = time.perf_counter()
+    if len(imagens) <= 1:
+        por_imagem = [decodificar_imagem(i) for i in imagens]
+    else:
+        with ProcessPoolExecutor(max_workers=trabalhadores) as pool:
+            por_imagem = list(pool.map(decodificar_imagem, imagens))
+    decorrido = time.perf_counter() - inicio
+    contagem = Counter(isbn for isbns, _ in por_imagem for isbn in isbns)
+    return por_imagem, contagem, (len(imagens) / decorrido if decorrido > 0 else 0.0)
@@ -0,0 +1,123 @@
+"""Consultas ao Google Books com cache persistente em SQLite.
+
+As respostas ficam guardadas por ISBN e por título normalizados. Respostas
+"não encontrado" também são guardadas (cache negativo), mas com TTL menor,
+para que um ISBN desconhecido não seja consultado a cada rerun. Erros de rede
+não são guardados.
+"""
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from acervo.busca import normalizar
+from acervo.config import caminho_local
+from acervo.importacao import normalizar_isbn
+from acervo.taxa import LimiteTaxa
+
+URL_GOOGLE_BOOKS = "https://www.googleapis.com/books/v1/volumes"
+CAMPOS_VOLUME = ("title", "authors", "description", "categories")
+TTL_POSITIVO = 90 * 24 * 3600
+TTL_NEGATIVO = 3 * 24 * 3600
+TRABALHADORES = 8
+
+LIMITE_GOOGLE = LimiteTaxa(por_segundo=5)
+
+
+class CacheMetadados:
+    def __init__(self, caminho=None, ttl_positivo=TTL_POSITIVO, ttl_negativo=TTL_NEGATIVO):
+        self.ttl_positivo, self.ttl_negativo = ttl_positivo, ttl_negativo
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(caminho or caminho_local("metadados.sqlite3"), check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("CREATE TABLE IF NOT EXISTS consultas (chave TEXT PRIMARY KEY, dados TEXT, gravado_em REAL NOT NULL)")
+        self._con.commit()
+
+    def obter(self, chave):
+        """(achou, dados). `achou` False significa que é preciso consultar a API."""
+        with self._lock:
+            linha = self._con.execute("SELECT dados, gravado_em FROM consultas WHERE chave = ?", (chave,)).fetchone()
+        if linha is None:
+            return False, None
+        dados, gravado_em = linha
+        ttl = self.ttl_positivo if dados is not None else self.ttl_negativo
+        if time.time() - gravado_em > ttl:
+            return False, None
+        return True, (json.loads(dados) if dados is not None else None)
+
+    def gravar(self, chave, dados):
+        with self._lock:
+            self._con.execute("INSERT OR REPLACE INTO consultas VALUES (?, ?, ?)",
+                              (chave, json.dumps(dados, ensure_ascii=False) if dados is not None else None, time.time()))
+            self._con.commit()
+
+
+def _consultar(q, api_key):
+    """volumeInfo resumido do 1º resultado, None se não houver, ou levanta em erro de rede."""
+    LIMITE_GOOGLE.aguardar()
+    res = requests.get(URL_GOOGLE_BOOKS, params={"q": q, "key": api_key}, timeout=5)
+    res.raise_for_status()
+    itens = res.json().get("items")
+    if not itens:
+        return None
+    info = itens[0]["volumeInfo"]
+    return {k: info[k] for k in CAMPOS_VOLUME if k in info}
+
+
+def _buscar(chave, q, api_key, cache):
+    if cache is not None:
+        achou, dados = cache.obter(chave)
+        if achou:
+            return dados
+    try:
+        dados = _consultar(q, api_key)
+    except Exception:
+        return None  # falha de rede: não grava, tenta de novo na próxima
+    if cache is not None:
+        cache.gravar(chave, dados)
+    return dados
+
+
+def buscar_isbn(isbn, api_key, cache=None):
+    isbn = normalizar_isbn(isbn)
+    if not isbn:
+        return None
+    return _buscar(f"isbn:{isbn}", f"isbn:{isbn}", api_key, cache)
+
+
+def buscar_titulo(titulo, api_key, cache=None):
+    chave = normalizar(titulo)
+    if not chave:
+        return None
+    return _buscar(f"titulo:{chave}", f"intitle:{titulo}", api_key, cache)
+
+
+def prefetch_isbns(isbns, api_key, cache=None, trabalhadores=TRABALHADORES):
+    """Consulta em paralelo só os ISBNs que ainda não estão no cache. Retorna {isbn: dados}."""
+    unicos = list(dict.fromkeys(normalizar_isbn(i) for i in isbns if normalizar_isbn(i)))
+    with ThreadPoolExecutor(max_workers=trabalhadores) as pool:
+        return dict(zip(unicos, pool.map(lambda i: buscar_isbn(i, api_key, cache), unicos)))
+
+
+def para_livro(info):
+    """Converte o volumeInfo resumido nos campos de livros_acervo (gênero ainda em inglês)."""
+    info = info or {}
+    return {"titulo": info.get("title", ""), "autor": ", ".join(info.get("authors", ["Pendente"])),
+            "sinopse": info.get("description", "Pendente"), "genero": info.get("categories", ["General"])[0]}
+
+
+def completar_registros(registros, api_key, cache=None):
+    """Preenche autor/sinopse 'Pendente' dos registros que têm ISBN real, consultando em lote."""
+    alvos = [r for r in registros if not str(r["isbn"]).startswith("IMP-")
+             and "Pendente" in (r.get("autor"), r.get("sinopse"))]
+    achados = prefetch_isbns([r["isbn"] for r in alvos], api_key, cache)
+    for r in alvos:
+        info = achados.get(normalizar_isbn(r["isbn"]))
+        if info:
+            livro = para_livro(info)
+            if r.get("autor") == "Pendente": r["autor"] = livro["autor"]
+            if r.get("sinopse") == "Pendente": r["sinopse"] = livro["sinopse"]
+    return registros
@@ -0,0 +1,66 @@
+"""Consultas paginadas no Supabase (PostgREST).
+
+O filtro de busca, a ordenação e a seleção de colunas rodam no banco, e a
+paginação é por cursor (keyset) em `id`: cada página custa o mesmo payload,
+seja o catálogo de 2 mil ou de 50 mil volumes.
+"""
+import re
+
+import pandas as pd
+
+TAMANHO_PAGINA = 15
+LIMITE_BUSCA_LOCAL = 20000  # acima disso o catálogo não é baixado inteiro para busca em memória
+
+COLUNAS_LIVROS = "id, titulo, autor, genero, quantidade, isbn"
+COLUNAS_USUARIOS = "id, nome, turma"
+
+_RESERVADOS = re.compile(r'[,()"*%\\]')
+
+
+def _filtro_ilike(termo, campos):
+    # Monta "titulo.ilike.*termo*,autor.ilike.*termo*" para o or_ do PostgREST
+    termo = _RESERVADOS.sub(" ", termo).strip()
+    return ",".join(f"{c}.ilike.*{termo}*" for c in campos)
+
+
+def pagina(cliente, tabela, colunas, termo=None, campos_busca=(), cursor=None,
+           limite=TAMANHO_PAGINA, filtros=()):
+    """Retorna (linhas, próximo_cursor), da mais recente para a mais antiga.
+
+    `filtros` é uma sequência de (método, coluna, valor) do query builder,
+    ex.: ("gt", "quantidade", 0). `próximo_cursor` é None na última página.
+    """
+    q = cliente.table(tabela).select(colunas).order("id", desc=True).limit(limite + 1)
+    if cursor is not None:
+        q = q.lt("id", cursor)
+    if termo and termo.strip() and campos_busca:
+        q = q.or_(_filtro_ilike(termo, campos_busca))
+    for metodo, coluna, valor in filtros:
+        q = getattr(q, metodo)(coluna, valor)
+    dados = q.execute().data or []
+    proximo = dados[limite - 1]["id"] if len(dados) > limite else None
+    return dados[:limite], proximo
+
+
+def pagina_livros(cliente, termo=None, cursor=None, limite=TAMANHO_PAGINA,
+                  colunas=COLUNAS_LIVROS, campos_busca=("titulo", "autor", "genero", "isbn"),
+                  somente_disponiveis=False, generos=None):
+    filtros = [("gt", "quantidade", 0)] if somente_disponiveis else []
+    if generos:
+        filtros.append(("in_", "genero", list(generos)))
+    return pagina(cliente, "livros_acervo", colunas, termo, campos_busca, cursor, limite, filtros)
+
+
+def pagina_usuarios(cliente, termo=None, cursor=None, limite=TAMANHO_PAGINA,
+                    colunas=COLUNAS_USUARIOS):
+    return pagina(cliente, "usuarios", colunas, termo, ("nome", "turma"), cursor, limite)
+
+
+def contar(cliente, tabela):
+    res = cliente.table(tabela).select("id", count="exact").limit(1).execute()
+    return res.count or 0
+
+
+def como_df(linhas, colunas):
+    """DataFrame da página, com as colunas garantidas mesmo se vier vazia."""
+    return pd.DataFrame(linhas, columns=[c.strip() for c in colunas.split(",")])
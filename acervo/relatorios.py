@@ -0,0 +1,46 @@
+"""Relatórios de circulação: filtros e ordenação por data rodam no banco.
+
+Dependem das colunas tipadas e índices de sql/006_datas_tipadas.sql.
+"""
+from datetime import timedelta
+
+import pandas as pd
+
+from acervo.datas import colunas_para_data, hoje_iso, inicio_do_dia
+
+LIMITE_RELATORIO = 500
+
+
+def _resultado(res, datas=(), instantes=()):
+    df = colunas_para_data(pd.DataFrame(res.data or []), datas, instantes)
+    return df, (res.count if res.count is not None else len(df))
+
+
+def atrasados(cliente, limite=LIMITE_RELATORIO):
+    """Empréstimos ativos vencidos, do mais atrasado para o mais recente. Retorna (df, total)."""
+    res = (cliente.table("emprestimos_ativos")
+           .select("id, titulo, nome, turma, data_saida, data_retorno_prevista, dias_atraso", count="exact")
+           .lt("data_retorno_prevista", hoje_iso())
+           .order("data_retorno_prevista").limit(limite).execute())
+    return _resultado(res, datas=["data_saida", "data_retorno_prevista"])
+
+
+def circulacao_periodo(cliente, inicio, fim, status=None, limite=LIMITE_RELATORIO):
+    """Empréstimos com saída entre `inicio` e `fim` (datas, inclusive). Retorna (df, total)."""
+    q = (cliente.table("emprestimos_detalhados")
+         .select("id, titulo, genero, nome, turma, data_saida, data_retorno_prevista, status", count="exact")
+         .gte("data_saida", inicio.isoformat()).lte("data_saida", fim.isoformat()))
+    if status:
+        q = q.eq("status", status)
+    res = q.order("data_saida", desc=True).limit(limite).execute()
+    return _resultado(res, datas=["data_saida", "data_retorno_prevista"])
+
+
+def cadastrados_periodo(cliente, inicio, fim, limite=LIMITE_RELATORIO):
+    """Livros cadastrados entre `inicio` e `fim` (datas, inclusive, no fuso da escola). Retorna (df, total)."""
+    # data_cadastro é timestamptz: data sem fuso seria meia-noite UTC, 21h da véspera em São Paulo
+    res = (cliente.table("livros_acervo")
+           .select("id, titulo, autor, genero, quantidade, data_cadastro", count="exact")
+           .gte("data_cadastro", inicio_do_dia(inicio)).lt("data_cadastro", inicio_do_dia(fim + timedelta(days=1)))
+           .order("data_cadastro", desc=True).limit(limite).execute())
+    return _resultado(res, instantes=["data_cadastro"])
@@ -0,0 +1,827 @@
+"""Réplica local (SQLite) de `livros_acervo`, `usuarios` e `emprestimos`.
+
+`ClienteReplica` tem a mesma interface do cliente Supabase usada pelo app:
+as leituras (inclusive das views de empréstimos e gêneros) saem do SQLite
+local, e as escritas vão direto ao banco quando há conexão. Sem conexão, a
+escrita é aplicada localmente e guardada numa fila em disco (`saida`), que é
+reenviada em lotes, na ordem, assim que a conexão volta.
+
+A sincronização baixa só o que mudou, pela coluna `versao` (sql/007_replica.sql).
+Como a versão é tirada de uma sequence antes do commit, uma transação lenta
+pode aparecer no banco com versão menor que a já baixada; por isso cada
+sincronização relê tudo a partir da marca que valia JANELA_RELEITURA segundos
+atrás (o histórico de marcas fica em `marcas_historico`), e não a partir da
+última.
+Empréstimos, devoluções, ajustes de estoque e cadastros levam uma chave e
+vão ao banco por `replica_executar` (sql/010_replica_idempotente.sql), que
+ignora a chave repetida: uma escrita cuja resposta se perdeu pode ficar na
+fila e ser reenviada sem duplicar nada. Só falhas ao abrir a conexão contam
+como "sem conexão"; uma escrita sem chave (edição, exclusão) que falha depois
+de enviada não é enfileirada, porque pode já ter sido gravada.
+Conflitos de estoque (empréstimo sem exemplar disponível no banco, ou
+quantidade editada offline sobre um valor que outra pessoa já mudou) não
+bloqueiam a fila: a operação vai para a lista de conflitos e as linhas
+afetadas voltam ao valor do banco.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import date
+from functools import lru_cache
+
+from acervo.config import caminho_local
+
+try:
+    import httpx
+    ERROS_REDE = (OSError, httpx.TransportError)
+    # Falhas antes de o pedido sair: o banco com certeza não recebeu nada
+    ERROS_CONEXAO = (ConnectionRefusedError, httpx.ConnectError, httpx.ConnectTimeout)
+except ImportError:  # pragma: no cover - supabase-py sempre traz httpx
+    ERROS_REDE = (OSError,)
+    ERROS_CONEXAO = (ConnectionRefusedError,)
+
+ESQUEMA = {
+    "livros_acervo": {"id": "INTEGER PRIMARY KEY", "isbn": "TEXT", "titulo": "TEXT", "autor": "TEXT", "sinopse": "TEXT",
+                      "genero": "TEXT", "quantidade": "INTEGER", "data_cadastro": "TEXT", "versao": "INTEGER"},
+    "usuarios": {"id": "INTEGER PRIMARY KEY", "nome": "TEXT", "turma": "TEXT", "versao": "INTEGER"},
+    "emprestimos": {"id": "INTEGER PRIMARY KEY", "id_livro": "INTEGER", "id_usuario": "INTEGER", "data_saida": "TEXT",
+                    "data_retorno_prevista": "TEXT", "status": "TEXT", "versao": "INTEGER"},
+}
+
+# Mesmas views de sql/004 e sql/006
+VIEWS = {
+    "emprestimos_ativos": """
+        SELECT e.id, e.id_livro, e.id_usuario, e.data_saida, e.data_retorno_prevista,
+               MAX(CAST(julianday(date('now', 'localtime')) - julianday(e.data_retorno_prevista) AS INTEGER), 0) AS dias_atraso,
+               l.titulo, u.nome, u.turma
+        FROM emprestimos e JOIN livros_acervo l ON l.id = e.id_livro JOIN usuarios u ON u.id = e.id_usuario
+        WHERE e.status = 'Ativo'""",
+    "emprestimos_detalhados": """
+        SELECT e.id, e.id_livro, e.id_usuario, e.data_saida, e.data_retorno_prevista, e.status,
+               l.titulo, l.genero, u.nome, u.turma
+        FROM emprestimos e JOIN livros_acervo l ON l.id = e.id_livro JOIN usuarios u ON u.id = e.id_usuario""",
+    "generos_contagem": """
+        SELECT genero, COUNT(*) AS titulos, COALESCE(SUM(quantidade), 0) AS volumes
+        FROM livros_acervo WHERE genero IS NOT NULL AND genero <> '' GROUP BY genero""",
+}
+
+# Tabelas que cada função do banco altera (para baixar logo após a chamada)
+TABELAS_RPC = {
+    "registrar_emprestimos": ("emprestimos", "livros_acervo"),
+    "registrar_devolucoes": ("emprestimos", "livros_acervo"),
+    "ajustar_estoque": ("livros_acervo",),
+    "registrar_entrada_lote": ("livros_acervo",),
+    "atualizar_livros_lote": ("livros_acervo",),
+}
+
+TAMANHO_PAGINA_SYNC = 1000
+TAMANHO_LOTE_SAIDA = 50
+JANELA_RELEITURA = 120     # segundos relidos a cada sincronização (commits fora de ordem no Postgres)
+INTERVALO_SINCRONIA = 30   # segundos entre ciclos do processo em segundo plano
+MAX_TENTATIVAS = 5         # erros que não são de rede antes de a operação virar conflito
+CODIGOS_CONFLITO = {"P0001", "23503", "23505"}  # raise exception, chave estrangeira, duplicidade
+
+_IDENTIFICADOR = re.compile(r"^[a-z_][a-z0-9_]*$")
+_INSTANTE = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:\d{2})$")
+
+
+class Resultado:
+    def __init__(self, data, count=None):
+        self.data, self.count = data, count
+
+
+class Conflito(Exception):
+    pass
+
+
+def erro_de_rede(erro):
+    return isinstance(erro, ERROS_REDE)
+
+
+def sem_conexao(erro):
+    """Falha ao conectar. Outros erros de rede (ex.: resposta perdida) podem vir depois do commit."""
+    return isinstance(erro, ERROS_CONEXAO)
+
+
+def _eh_conflito(erro):
+    return isinstance(erro, Conflito) or getattr(erro, "code", None) in CODIGOS_CONFLITO \
+        or "Estoque insuficiente" in str(erro)
+
+
+@lru_cache(maxsize=256)
+def _regex_ilike(padrao):
+    partes = re.split(r"[*%]", padrao)
+    return re.compile("^" + ".*".join(re.escape(p) for p in partes) + "$", re.IGNORECASE | re.DOTALL)
+
+
+def _ilike(valor, padrao):
+    return valor is not None and _regex_ilike(padrao).match(str(valor)) is not None
+
+
+def _coluna(nome):
+    nome = nome.strip()
+    if not _IDENTIFICADOR.match(nome):
+        raise ValueError(f"Coluna inválida: {nome!r}")
+    return nome
+
+
+_OPERADORES = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _condicao(metodo, coluna, valor):
+    coluna = _coluna(coluna)
+    if metodo in _OPERADORES:
+        if metodo not in ("eq", "neq") and isinstance(valor, str) and _INSTANTE.match(valor):
+            # Instante com fuso (timestamptz): compara o momento, não o texto; o SQLite converte para UTC
+            return f"julianday({coluna}) {_OPERADORES[metodo]} julianday(?)", [valor]
+        return f"{coluna} {_OPERADORES[metodo]} ?", [valor]
+    if metodo == "ilike":
+        return f"ilike({coluna}, ?)", [valor]
+    if metodo in ("in", "in_"):
+        valores = list(valor)
+        return (f"{coluna} IN ({','.join('?' * len(valores))})", valores) if valores else ("0", [])
+    raise ValueError(f"Filtro não suportado na réplica: {metodo}")
+
+
+def _where(filtros):
+    """Traduz [(método, args)] do query builder para (sql, parâmetros)."""
+    partes, params = [], []
+    for metodo, args in filtros:
+        if metodo == "or_":
+            subs = []
+            for parte in args[0].split(","):
+                coluna, op, valor = parte.split(".", 2)
+                sql, p = _condicao(op, coluna, valor)
+                subs.append(sql); params.extend(p)
+            partes.append("(" + " OR ".join(subs) + ")")
+        else:
+            sql, p = _condicao(metodo, *args)
+            partes.append(sql); params.extend(p)
+    return (" WHERE " + " AND ".join(partes)) if partes else "", params
+
+
+class Replica:
+    def __init__(self, cliente, caminho=None):
+        self._cliente = cliente
+        self._lock = threading.RLock()
+        self._envio = threading.RLock()  # um único envio por vez (app e segundo plano)
+        self._db = sqlite3.connect(caminho or caminho_local("replica.sqlite3"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.create_function("ilike", 2, _ilike, deterministic=True)
+        self._criar_esquema()
+        self.online = True
+        self.ultima_sincronia = None
+        self.ao_mudar = None  # callback(tabelas) para mudanças baixadas em segundo plano
+        self._thread = None
+
+    def _criar_esquema(self):
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            for tabela, colunas in ESQUEMA.items():
+                defs = ", ".join(f"{c} {t}" for c, t in colunas.items())
+                self._db.execute(f"CREATE TABLE IF NOT EXISTS {tabela} ({defs})")
+            self._db.execute("CREATE INDEX IF NOT EXISTS emprestimos_status_idx ON emprestimos (status)")
+            for nome, sql in VIEWS.items():
+                self._db.execute(f"CREATE VIEW IF NOT EXISTS {nome} AS {sql}")
+            self._db.execute("CREATE TABLE IF NOT EXISTS marcas (tabela TEXT PRIMARY KEY, versao INTEGER NOT NULL)")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS marcas_historico (
+                tabela TEXT NOT NULL, versao INTEGER NOT NULL, em REAL NOT NULL)""")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS saida (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, operacao TEXT NOT NULL, criado_em REAL NOT NULL,
+                estado TEXT NOT NULL DEFAULT 'pendente', tentativas INTEGER NOT NULL DEFAULT 0, erro TEXT)""")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS ids_provisorios (
+                tabela TEXT NOT NULL, provisorio INTEGER NOT NULL, real INTEGER NOT NULL,
+                PRIMARY KEY (tabela, provisorio))""")
+
+    # --- leitura local --------------------------------------------------------
+
+    def colunas(self, tabela):
+        with self._lock:
+            return [r["name"] for r in self._db.execute(f"PRAGMA table_info({_coluna(tabela)})")]
+
+    def consultar(self, tabela, colunas="*", filtros=(), ordem=(), limite=None, contar=False):
+        tabela = _coluna(tabela)
+        cols = ", ".join(_coluna(c) for c in colunas.split(",")) if colunas.strip() != "*" else "*"
+        where, params = _where(filtros)
+        sql = f"SELECT {cols} FROM {tabela}{where}"
+        if ordem:
+            sql += " ORDER BY " + ", ".join(
+                f"{_coluna(c)} IS NULL {'DESC' if desc else ''}, {_coluna(c)} {'DESC' if desc else ''}" for c, desc in ordem)
+        if limite is not None:
+            sql += f" LIMIT {int(limite)}"
+        with self._lock:
+            linhas = [dict(r) for r in self._db.execute(sql, params)]
+            total = self._db.execute(f"SELECT COUNT(*) FROM {tabela}{where}", params).fetchone()[0] if contar else None
+        return Resultado(linhas, total)
+
+    # --- sincronização (banco -> local) ----------------------------------------
+
+    def _marca(self, tabela):
+        r = self._db.execute("SELECT versao FROM marcas WHERE tabela = ?", (tabela,)).fetchone()
+        return r[0] if r else 0
+
+    def _inicio_releitura(self, tabela, marca):
+        # Marca mais recente registrada há pelo menos JANELA_RELEITURA segundos
+        limite = time.time() - JANELA_RELEITURA
+        r = self._db.execute("SELECT MAX(versao) FROM marcas_historico WHERE tabela = ? AND em <= ?",
+                             (tabela, limite)).fetchone()[0]
+        if r is None:  # réplica mais nova que a janela: relê desde a primeira marca registrada
+            r = self._db.execute("SELECT MIN(versao) FROM marcas_historico WHERE tabela = ?", (tabela,)).fetchone()[0]
+        return min(marca, r if r is not None else marca)
+
+    def _registrar_marca(self, tabela):
+        agora = time.time()
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO marcas_historico VALUES (?, ?, ?)", (tabela, self._marca(tabela), agora))
+            # Só a última marca de fora da janela ainda é útil
+            self._db.execute("""DELETE FROM marcas_historico WHERE tabela = ? AND em < (
+                SELECT MAX(em) FROM marcas_historico WHERE tabela = ? AND em <= ?)""",
+                             (tabela, tabela, agora - JANELA_RELEITURA))
+
+    def _versao_local(self, tabela, linha):
+        # Linha relida na janela: só conta como mudança se a réplica ainda não a tinha nessa versão
+        if tabela not in ESQUEMA:
+            return None
+        r = self._db.execute(f"SELECT versao FROM {tabela} WHERE id = ?", (linha["id"],)).fetchone()
+        return r[0] if r else None
+
+    def _gravar_linhas(self, tabela, linhas):
+        colunas = list(ESQUEMA[tabela])
+        self._db.executemany(
+            f"INSERT OR REPLACE INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+            [tuple(l.get(c) for c in colunas) for l in linhas])
+
+    def _baixar(self, tabela, origem, ao_receber):
+        """Baixa de `origem`, em páginas, as linhas com versão acima do início da janela de releitura de `tabela`."""
+        with self._lock:
+            marca = self._marca(tabela)
+            desde, recebidas = self._inicio_releitura(tabela, marca), 0
+        while True:
+            res = (self._cliente.table(origem).select("*").gt("versao", desde)
+                   .order("versao").limit(TAMANHO_PAGINA_SYNC).execute())
+            linhas = res.data or []
+            if not linhas:
+                break
+            desde = linhas[-1]["versao"]
+            with self._lock, self._db:
+                novas = [l for l in linhas if l["versao"] > marca or self._versao_local(tabela, l) != l["versao"]]
+                ao_receber(linhas)
+                self._db.execute("INSERT OR REPLACE INTO marcas VALUES (?, ?)", (tabela, max(marca, desde)))
+            recebidas += len(novas)
+            if len(linhas) < TAMANHO_PAGINA_SYNC:
+                break
+        self._registrar_marca(tabela)
+        return recebidas
+
+    def sincronizar(self, tabelas=tuple(ESQUEMA)):
+        """Baixa as mudanças do banco. Retorna {tabela: linhas novas/alteradas/removidas}."""
+        mudancas = {t: self._baixar(t, t, lambda linhas, t=t: self._gravar_linhas(t, linhas)) for t in tabelas}
+
+        def remover(linhas):
+            for l in linhas:
+                if l["tabela"] in ESQUEMA and \
+                        self._db.execute(f"DELETE FROM {l['tabela']} WHERE id = ?", (l["id_registro"],)).rowcount:
+                    mudancas[l["tabela"]] = mudancas.get(l["tabela"], 0) + 1
+        self._baixar("replica_remocoes", "replica_remocoes", remover)
+        self.online, self.ultima_sincronia = True, time.time()
+        return {t: n for t, n in mudancas.items() if n}
+
+    def _recarregar_linhas(self, tabela, ids):
+        # Desfaz a aplicação otimista: volta as linhas ao que está no banco
+        ids = [i for i in ids if i > 0]
+        if not ids:
+            return
+        try:
+            linhas = self._cliente.table(tabela).select("*").in_("id", ids).execute().data or []
+        except ERROS_REDE:
+            self.online = False
+            return
+        with self._lock, self._db:
+            encontrados = {l["id"] for l in linhas}
+            self._gravar_linhas(tabela, linhas)
+            for i in set(ids) - encontrados:
+                self._db.execute(f"DELETE FROM {tabela} WHERE id = ?", (i,))
+
+    # --- escrita ---------------------------------------------------------------
+
+    def escrever(self, operacao):
+        """Envia ao banco ou, sem conexão, aplica localmente e enfileira. Retorna `data`."""
+        with self._envio:
+            return self._escrever(operacao)
+
+    def _escrever(self, operacao):
+        if _com_chave(operacao):
+            operacao["chave"] = uuid.uuid4().hex
+        if self.online and self.pendentes():
+            self.replicar()
+        if self.online and not self.pendentes():
+            try:
+                res = self._enviar(operacao)
+            except ERROS_REDE as e:
+                if sem_conexao(e):
+                    self.online = False
+                elif "chave" not in operacao:
+                    raise  # pode ter sido gravada; sem chave, reenviar poderia repetir
+                # Com chave, vai para a fila: se o banco já gravou, o reenvio só devolve o resultado
+            else:
+                try:
+                    self.sincronizar(self._tabelas_de(operacao))
+                except ERROS_REDE:
+                    self.online = False
+                return res.data
+        if operacao["tipo"] == "rpc" and operacao["nome"] not in _APLICAR_RPC:
+            raise ConnectionError("Sem conexão com o banco; tente novamente quando a internet voltar.")
+        with self._lock, self._db:
+            dados, tocados = self._aplicar_local(operacao)
+            self._db.execute("INSERT INTO saida (operacao, criado_em) VALUES (?, ?)",
+                             (json.dumps({**operacao, "tocados": tocados}, ensure_ascii=False, default=str), time.time()))
+        return dados
+
+    @staticmethod
+    def _tabelas_de(operacao):
+        if operacao["tipo"] == "tabela":
+            return (operacao["tabela"],) if operacao["tabela"] in ESQUEMA else ()
+        return TABELAS_RPC.get(operacao["nome"], tuple(ESQUEMA))
+
+    def _enviar(self, operacao):
+        if operacao["tipo"] == "lote" or "chave" in operacao:
+            ops = operacao["operacoes"] if operacao["tipo"] == "lote" else [operacao]
+            res = self._cliente.rpc("replica_executar", {"operacoes": [_chamada(o) for o in ops]}).execute()
+            return Resultado(res.data if operacao["tipo"] == "lote" else (res.data or [None])[0])
+        if operacao["tipo"] == "rpc":
+            return self._cliente.rpc(operacao["nome"], operacao["params"]).execute()
+        q = self._cliente.table(operacao["tabela"])
+        q = q.delete() if operacao["acao"] == "delete" else getattr(q, operacao["acao"])(operacao["dados"])
+        for metodo, args in operacao.get("filtros", ()):
+            q = getattr(q, metodo)(*args)
+        return q.execute()
+
+    # --- aplicação otimista (sem conexão) ---------------------------------------
+
+    def _provisorio(self, tabela):
+        # Ids negativos até a fila ser enviada e o banco devolver o id real; nunca reaproveitados
+        menor = self._db.execute(f"SELECT MIN(id) FROM {tabela}").fetchone()[0]
+        mapeado = self._db.execute("SELECT MIN(provisorio) FROM ids_provisorios WHERE tabela = ?", (tabela,)).fetchone()[0]
+        return min(menor or 0, mapeado or 0, 0) - 1
+
+    def _ids_alvo(self, tabela, filtros):
+        where, params = _where(filtros)
+        return [r[0] for r in self._db.execute(f"SELECT id FROM {tabela}{where}", params)]
+
+    def _linhas(self, tabela, ids):
+        if not ids:
+            return []
+        return [dict(r) for r in self._db.execute(
+            f"SELECT * FROM {tabela} WHERE id IN ({','.join('?' * len(ids))})", list(ids))]
+
+    def _aplicar_local(self, op):
+        """Aplica `op` ao SQLite. Retorna (data como o banco devolveria, {tabela: ids tocados})."""
+        if op["tipo"] == "rpc":
+            return _APLICAR_RPC[op["nome"]](self, op["params"])
+        tabela = op["tabela"]
+        if tabela not in ESQUEMA:
+            raise ConnectionError(f"Sem conexão: '{tabela}' não está na réplica local.")
+        colunas = set(ESQUEMA[tabela])
+        if op["acao"] in ("insert", "upsert"):
+            registros = op["dados"] if isinstance(op["dados"], list) else [op["dados"]]
+            existentes = {r["id"] for r in registros if r.get("id") is not None}
+            existentes = {l["id"] for l in self._linhas(tabela, list(existentes))}
+            saida = []
+            for reg in registros:
+                reg = {k: v for k, v in reg.items() if k in colunas}
+                if op["acao"] == "upsert" and reg.get("id") in existentes:
+                    self._atualizar_local(tabela, [reg["id"]], reg)
+                    saida.extend(self._linhas(tabela, [reg["id"]]))
+                    continue
+                reg["id"] = self._provisorio(tabela)
+                self._gravar_linhas(tabela, [reg])
+                saida.append(reg)
+            op["dados"] = saida  # a fila guarda os ids provisórios atribuídos
+            return saida, {tabela: [r["id"] for r in saida]}
+        ids = self._ids_alvo(tabela, op.get("filtros", ()))
+        op["ids"], op["filtros"] = ids, []
+        if op["acao"] == "update":
+            op["versoes"] = {str(l["id"]): l["versao"] for l in self._linhas(tabela, ids)}
+            self._atualizar_local(tabela, ids, op["dados"])
+            return self._linhas(tabela, ids), {tabela: ids}
+        linhas = self._linhas(tabela, ids)
+        if ids:
+            self._db.execute(f"DELETE FROM {tabela} WHERE id IN ({','.join('?' * len(ids))})", ids)
+        return linhas, {tabela: ids}
+
+    def _atualizar_local(self, tabela, ids, campos):
+        campos = {_coluna(k): v for k, v in campos.items() if k in ESQUEMA[tabela] and k != "id"}
+        if ids and campos:
+            self._db.execute(f"UPDATE {tabela} SET {', '.join(f'{c} = ?' for c in campos)} "
+                             f"WHERE id IN ({','.join('?' * len(ids))})", list(campos.values()) + list(ids))
+
+    def _estoques(self, ids):
+        return [{"id_livro": l["id"], "quantidade": l["quantidade"]} for l in self._linhas("livros_acervo", ids)]
+
+    def _rpc_registrar_emprestimos(self, params):
+        itens = params["itens"]
+        pedido = Counter(int(i["id_livro"]) for i in itens)
+        livros = {l["id"]: l for l in self._linhas("livros_acervo", list(pedido))}
+        falta = [livros[l]["titulo"] if l in livros else str(l) for l, n in pedido.items()
+                 if l not in livros or (livros[l]["quantidade"] or 0) < n]
+        if falta:
+            raise Conflito(f"Estoque insuficiente: {', '.join(falta)}")
+        novos = []
+        for i in itens:
+            reg = {"id": self._provisorio("emprestimos"), "id_livro": int(i["id_livro"]), "id_usuario": int(i["id_usuario"]),
+                   "data_saida": i.get("data_saida") or date.today().isoformat(),
+                   "data_retorno_prevista": i["data_retorno_prevista"], "status": "Ativo"}
+            self._gravar_linhas("emprestimos", [reg])
+            novos.append(reg["id"])
+        for l, n in pedido.items():
+            self._db.execute("UPDATE livros_acervo SET quantidade = quantidade - ? WHERE id = ?", (n, l))
+        return self._estoques(list(pedido)), {"emprestimos": novos, "livros_acervo": list(pedido)}
+
+    def _rpc_registrar_devolucoes(self, params):
+        ids = [int(i) for i in params["ids_emprestimo"]]
+        if any(i < 0 for i in ids):
+            raise ConnectionError("Empréstimo feito sem conexão: devolva depois que a fila for enviada.")
+        ativos = [e for e in self._linhas("emprestimos", ids) if e["status"] == "Ativo"]
+        por_livro = Counter(e["id_livro"] for e in ativos)
+        self._atualizar_local("emprestimos", [e["id"] for e in ativos], {"status": "Devolvido"})
+        for l, n in por_livro.items():
+            self._db.execute("UPDATE livros_acervo SET quantidade = quantidade + ? WHERE id = ?", (n, l))
+        return self._estoques(list(por_livro)), {"emprestimos": ids, "livros_acervo": list(por_livro)}
+
+    def _rpc_ajustar_estoque(self, params):
+        deltas = Counter()
+        for i in params["itens"]:
+            deltas[int(i["id_livro"])] += int(i["delta"])
+        for l, d in deltas.items():
+            self._db.execute("UPDATE livros_acervo SET quantidade = quantidade + ? WHERE id = ?", (d, l))
+        return self._estoques(list(deltas)), {"livros_acervo": list(deltas)}
+
+    # --- fila de saída (local -> banco) ----------------------------------------
+
+    def pendentes(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM saida WHERE estado = 'pendente'").fetchone()[0]
+
+    def conflitos(self):
+        with self._lock:
+            linhas = self._db.execute("SELECT id, operacao, criado_em, erro FROM saida WHERE estado = 'conflito' ORDER BY id").fetchall()
+        return [{"id": r["id"], "operacao": _descrever(json.loads(r["operacao"])), "criado_em": r["criado_em"], "erro": r["erro"]}
+                for r in linhas]
+
+    def descartar(self, id_saida):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM saida WHERE id = ? AND estado = 'conflito'", (int(id_saida),))
+
+    def _traduzir(self, tabela, i, obrigatorio=True):
+        if i is None or int(i) >= 0:
+            return i
+        with self._lock:
+            r = self._db.execute("SELECT real FROM ids_provisorios WHERE tabela = ? AND provisorio = ?",
+                                 (tabela, int(i))).fetchone()
+        if r is None and obrigatorio:
+            raise Conflito(f"Registro provisório {i} de {tabela} não foi gravado no banco.")
+        return r[0] if r else None
+
+    def _preparar_envio(self, op):
+        """Troca ids provisórios pelos reais e monta a chamada como o banco espera."""
+        op = json.loads(json.dumps(op))
+        if op["tipo"] == "lote":
+            return {"tipo": "lote", "operacoes": [self._preparar_envio(o) for o in op["operacoes"]]}
+        if op["tipo"] == "rpc":
+            if op["nome"] in ("registrar_emprestimos", "ajustar_estoque"):
+                for item in op["params"]["itens"]:
+                    item["id_livro"] = self._traduzir("livros_acervo", item["id_livro"])
+                    if "id_usuario" in item:
+                        item["id_usuario"] = self._traduzir("usuarios", item["id_usuario"])
+            return op
+        tabela = op["tabela"]
+        if op["acao"] == "insert":
+            op["dados"] = [{k: v for k, v in r.items() if k not in ("id", "versao")} for r in op["dados"]]
+        elif op["acao"] == "upsert":
+            dados = []
+            for r in op["dados"]:
+                r = {k: v for k, v in r.items() if k != "versao"}
+                r["id"] = self._traduzir(tabela, r["id"], obrigatorio=False)
+                dados.append(r if r["id"] is not None else {k: v for k, v in r.items() if k != "id"})
+            op["dados"] = dados
+        else:
+            op["ids"] = [self._traduzir(tabela, i) for i in op["ids"]]
+            op["filtros"] = [("in_", ("id", op["ids"]))]
+        return op
+
+    def _enviar_da_fila(self, op):
+        envio = self._preparar_envio(op)
+        if envio["tipo"] == "tabela" and envio["acao"] == "update" and "quantidade" in envio["dados"]:
+            # Estoque editado offline: só grava se a linha ainda estiver na versão que foi editada
+            for original, real in zip(op["ids"], envio["ids"]):
+                q = self._cliente.table(envio["tabela"]).update(envio["dados"]).eq("id", real)
+                versao = op["versoes"].get(str(original))
+                if versao is not None:
+                    q = q.eq("versao", versao)
+                if not q.execute().data and not self._ja_gravado(envio["tabela"], real, envio["dados"]):
+                    raise Conflito("Estoque alterado no banco depois da edição feita sem conexão.")
+            return
+        if envio["tipo"] == "tabela" and envio["acao"] in ("update", "delete") and not envio["ids"]:
+            return  # nenhum alvo
+        res = self._enviar(envio)
+        if envio["tipo"] == "tabela" and envio["acao"] == "insert":
+            with self._lock, self._db:
+                for reg, criado in zip(op["dados"], res.data or []):
+                    self._db.execute("INSERT OR REPLACE INTO ids_provisorios VALUES (?, ?, ?)",
+                                     (envio["tabela"], reg["id"], criado["id"]))
+
+    def _ja_gravado(self, tabela, id_registro, campos):
+        # Reenvio de uma edição cuja resposta se perdeu: a versão mudou, mas pela própria edição
+        linha = self._cliente.table(tabela).select("*").eq("id", id_registro).execute().data
+        return bool(linha) and all(linha[0].get(k) == v for k, v in campos.items())
+
+    def _versoes_banco(self, tabela, ids):
+        res = self._cliente.table(tabela).select("id, versao").in_("id", sorted(ids)).execute()
+        return {l["id"]: l["versao"] for l in res.data or []}
+
+    def _enviar_rebaseando(self, entradas, op, carregadas=None):
+        """Envia `op` (feita das `entradas` da fila) e atualiza as versões esperadas pelas edições posteriores.
+
+        Uma edição offline de estoque guarda a versão da linha no momento da
+        edição; se uma operação anterior da fila mexe na mesma linha (um
+        empréstimo, por exemplo), o banco muda a versão ao recebê-la. Se a linha
+        estava na versão esperada logo antes do envio, as edições seguintes
+        passam a esperar a versão de depois dele; se não estava, outra pessoa
+        mexeu nela e elas continuam indo para conflito. `carregadas` ({id: op}
+        já lidas da fila) recebe as versões novas no lugar.
+        """
+        tocados = {}
+        for _, o, _ in entradas:
+            for tabela, ids in o.get("tocados", {}).items():
+                tocados.setdefault(tabela, set()).update(i for i in ids if i > 0)
+        with self._lock:
+            linhas = self._db.execute("SELECT id, operacao FROM saida WHERE estado = 'pendente' AND id > ? "
+                                      "AND operacao LIKE '%\"versoes\"%' ORDER BY id", (entradas[-1][0],)).fetchall()
+        guardas, alvos = [], {}
+        for r in linhas:
+            o = json.loads(r["operacao"])
+            comuns = {int(i) for i in o.get("versoes", {})} & tocados.get(o["tabela"], set())
+            if comuns:
+                guardas.append((r["id"], o))
+                alvos.setdefault(o["tabela"], set()).update(comuns)
+        antes = {t: self._versoes_banco(t, ids) for t, ids in alvos.items()}
+        self._enviar_da_fila(op)
+        if not guardas:
+            return
+        depois = {t: self._versoes_banco(t, ids) for t, ids in alvos.items()}
+        with self._lock, self._db:
+            for id_saida, o in guardas:
+                for i, versao in o["versoes"].items():
+                    i = int(i)
+                    if i in depois[o["tabela"]] and versao is not None and antes[o["tabela"]].get(i) == versao:
+                        o["versoes"][str(i)] = depois[o["tabela"]][i]
+                self._db.execute("UPDATE saida SET operacao = ? WHERE id = ?",
+                                 (json.dumps(o, ensure_ascii=False, default=str), id_saida))
+                if carregadas and id_saida in carregadas:
+                    carregadas[id_saida]["versoes"] = o["versoes"]
+
+    def _concluir(self, id_saida, op, estado=None, erro=None):
+        with self._lock, self._db:
+            if estado is None:
+                self._db.execute("DELETE FROM saida WHERE id = ?", (id_saida,))
+            else:
+                self._db.execute("UPDATE saida SET estado = ?, erro = ? WHERE id = ?", (estado, erro, id_saida))
+            # Linhas provisórias somem; as reais chegam na próxima sincronização
+            for tabela, ids in op.get("tocados", {}).items():
+                provisorios = [i for i in ids if i < 0]
+                if provisorios:
+                    self._db.execute(f"DELETE FROM {tabela} WHERE id IN ({','.join('?' * len(provisorios))})", provisorios)
+        if estado == "conflito":
+            for tabela, ids in op.get("tocados", {}).items():
+                self._recarregar_linhas(tabela, ids)
+
+    def replicar(self, tamanho_lote=TAMANHO_LOTE_SAIDA):
+        """Envia a fila em ordem. Retorna (enviadas, conflitos). Para na primeira falha de rede."""
+        with self._envio:
+            return self._replicar(tamanho_lote)
+
+    def _replicar(self, tamanho_lote):
+        enviadas = conflitos = 0
+        while True:
+            with self._lock:
+                lote = self._db.execute("SELECT id, operacao, tentativas FROM saida WHERE estado = 'pendente' "
+                                        "ORDER BY id LIMIT ?", (tamanho_lote,)).fetchall()
+            if not lote:
+                break
+            entradas = [(r["id"], self._garantir_chave(r["id"], json.loads(r["operacao"])), r["tentativas"]) for r in lote]
+            carregadas = {id_saida: op for id_saida, op, _ in entradas}
+            for grupo in _agrupar(entradas):
+                try:
+                    if len(grupo) > 1:
+                        self._enviar_rebaseando(grupo, _juntar([op for _, op, _ in grupo]), carregadas)
+                        for id_saida, op, _ in grupo:
+                            self._concluir(id_saida, op)
+                        enviadas += len(grupo)
+                        continue
+                except ERROS_REDE as e:
+                    if sem_conexao(e):
+                        self.online = False
+                    return enviadas, conflitos
+                except Exception:
+                    pass  # reenvia uma a uma para isolar a que falhou
+                for id_saida, op, tentativas in grupo:
+                    try:
+                        self._enviar_rebaseando([(id_saida, op, tentativas)], op, carregadas)
+                    except ERROS_REDE as e:
+                        if sem_conexao(e):
+                            self.online = False
+                        return enviadas, conflitos
+                    except Exception as e:
+                        if _eh_conflito(e) or tentativas + 1 >= MAX_TENTATIVAS:
+                            self._concluir(id_saida, op, "conflito", str(e)[:300])
+                            conflitos += 1
+                        else:
+                            with self._lock, self._db:
+                                self._db.execute("UPDATE saida SET tentativas = tentativas + 1, erro = ? WHERE id = ?",
+                                                 (str(e)[:300], id_saida))
+                            return enviadas, conflitos
+                    else:
+                        self._concluir(id_saida, op)
+                        enviadas += 1
+        return enviadas, conflitos
+
+    def _garantir_chave(self, id_saida, op):
+        # Operação enfileirada antes de haver chaves: recebe uma agora, gravada na fila para os reenvios
+        if _com_chave(op) and "chave" not in op:
+            op["chave"] = uuid.uuid4().hex
+            with self._lock, self._db:
+                self._db.execute("UPDATE saida SET operacao = ? WHERE id = ?",
+                                 (json.dumps(op, ensure_ascii=False, default=str), id_saida))
+        return op
+
+    # --- segundo plano -----------------------------------------------------------
+
+    def ciclo(self):
+        """Envia a fila e baixa as mudanças. Retorna {tabela: n} baixadas."""
+        try:
+            self.replicar()
+            if self.pendentes():
+                return {}
+            mudancas = self.sincronizar()
+        except ERROS_REDE:
+            self.online = False
+            return {}
+        if mudancas and self.ao_mudar:
+            self.ao_mudar(mudancas)
+        return mudancas
+
+    def iniciar(self, intervalo=INTERVALO_SINCRONIA):
+        if self._thread is not None:
+            return
+
+        def laco():
+            while True:
+                time.sleep(intervalo)
+                try:
+                    self.ciclo()
+                except Exception:
+                    pass  # o próximo ciclo tenta de novo; o erro fica na fila/estado
+
+        self._thread = threading.Thread(target=laco, name="replica-acervo", daemon=True)
+        self._thread.start()
+
+    def estado(self):
+        with self._lock:
+            conflitos = self._db.execute("SELECT COUNT(*) FROM saida WHERE estado = 'conflito'").fetchone()[0]
+        return {"online": self.online, "pendentes": self.pendentes(), "conflitos": conflitos,
+                "ultima_sincronia": self.ultima_sincronia}
+
+
+_APLICAR_RPC = {
+    "registrar_emprestimos": Replica._rpc_registrar_emprestimos,
+    "registrar_devolucoes": Replica._rpc_registrar_devolucoes,
+    "ajustar_estoque": Replica._rpc_ajustar_estoque,
+}
+
+# Operações consecutivas destes tipos vão juntas numa chamada a replica_executar no envio da fila
+_JUNTAVEIS = {("rpc", "registrar_emprestimos"), ("rpc", "registrar_devolucoes"), ("rpc", "ajustar_estoque")}
+
+
+def _chave(op):
+    return (op["tipo"], op["nome"]) if op["tipo"] == "rpc" else (op["tipo"], op["tabela"], op["acao"])
+
+
+def _agrupar(entradas):
+    grupos = []
+    for entrada in entradas:
+        chave = _chave(entrada[1])
+        if grupos and chave in _JUNTAVEIS and _chave(grupos[-1][-1][1]) == chave:
+            grupos[-1].append(entrada)
+        else:
+            grupos.append([entrada])
+    return grupos
+
+
+def _juntar(ops):
+    return {"tipo": "lote", "operacoes": ops}
+
+
+def _com_chave(op):
+    """Operações que o banco deduplica pela chave (sql/010): as RPCs aplicáveis offline e os inserts."""
+    if op["tipo"] == "rpc":
+        return op["nome"] in _APLICAR_RPC
+    return op["acao"] == "insert" and op["tabela"] in ESQUEMA
+
+
+def _chamada(op):
+    if op["tipo"] == "rpc":
+        return {"chave": op["chave"], "nome": op["nome"], "params": op["params"]}
+    return {"chave": op["chave"], "tabela": op["tabela"],
+            "linhas": op["dados"] if isinstance(op["dados"], list) else [op["dados"]]}
+
+
+def _descrever(op):
+    if op["tipo"] == "rpc":
+        n = len(next(iter(op["params"].values()), []) or [])
+        return f"{op['nome']} ({n} itens)"
+    alvo = len(op.get("ids") or op.get("dados") or [])
+    return f"{op['acao']} em {op['tabela']} ({alvo} linhas)"
+
+
+# --- interface de cliente ----------------------------------------------------------
+
+class _ConsultaReplica:
+    """Query builder com o subconjunto usado pelo app; `execute()` lê do SQLite ou grava via fila."""
+
+    def __init__(self, replica, tabela):
+        self._replica, self._tabela = replica, tabela
+        self._acao, self._dados = "select", None
+        self._colunas, self._contar = "*", False
+        self._filtros, self._ordem, self._limite = [], [], None
+
+    def select(self, colunas="*", count=None):
+        self._colunas, self._contar = colunas, count == "exact"
+        return self
+
+    def _filtro(self, metodo, *args):
+        self._filtros.append((metodo, args))
+        return self
+
+    def eq(self, c, v): return self._filtro("eq", c, v)
+    def neq(self, c, v): return self._filtro("neq", c, v)
+    def gt(self, c, v): return self._filtro("gt", c, v)
+    def gte(self, c, v): return self._filtro("gte", c, v)
+    def lt(self, c, v): return self._filtro("lt", c, v)
+    def lte(self, c, v): return self._filtro("lte", c, v)
+    def ilike(self, c, v): return self._filtro("ilike", c, v)
+    def in_(self, c, v): return self._filtro("in_", c, list(v))
+    def or_(self, expressao): return self._filtro("or_", expressao)
+
+    def order(self, coluna, desc=False):
+        self._ordem.append((coluna, desc))
+        return self
+
+    def limit(self, n):
+        self._limite = n
+        return self
+
+    def insert(self, dados): return self._escrita("insert", dados)
+    def upsert(self, dados): return self._escrita("upsert", dados)
+    def update(self, dados): return self._escrita("update", dados)
+    def delete(self): return self._escrita("delete", None)
+
+    def _escrita(self, acao, dados):
+        self._acao, self._dados = acao, dados
+        return self
+
+    def execute(self):
+        if self._acao == "select":
+            return self._replica.consultar(self._tabela, self._colunas, self._filtros, self._ordem,
+                                           self._limite, self._contar)
+        return Resultado(self._replica.escrever({"tipo": "tabela", "tabela": self._tabela, "acao": self._acao,
+                                                 "dados": self._dados, "filtros": self._filtros}))
+
+
+class _RpcReplica:
+    def __init__(self, replica, nome, params):
+        self._replica, self._nome, self._params = replica, nome, params
+
+    def execute(self):
+        return Resultado(self._replica.escrever({"tipo": "rpc", "nome": self._nome, "params": self._params}))
+
+
+class ClienteReplica:
+    """Cliente com a interface do Supabase que lê da réplica local."""
+
+    def __init__(self, replica, remoto):
+        self.replica, self.remoto = replica, remoto
+
+    def table(self, nome):
+        if nome in ESQUEMA or nome in VIEWS:
+            return _ConsultaReplica(self.replica, nome)
+        return self.remoto.table(nome)
+
+    def rpc(self, nome, params=None, **kwargs):
+        return _RpcReplica(self.replica, nome, params or {})
+
+    def __getattr__(self, nome):
+        return getattr(self.remoto, nome)
@@ -0,0 +1,26 @@
+"""Limite de taxa compartilhado entre threads (token bucket)."""
+import threading
+import time
+
+
+class LimiteTaxa:
+    """Token bucket: até `capacidade` chamadas de uma vez, repondo `por_segundo`."""
+
+    def __init__(self, por_segundo, capacidade=None):
+        self.por_segundo = por_segundo
+        self.capacidade = capacidade or max(1, int(por_segundo))
+        self._fichas = float(self.capacidade)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def aguardar(self):
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.por_segundo)
+                self._ultimo = agora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                espera = (1 - self._fichas) / self.por_segundo
+            time.sleep(espera)
@@ -0,0 +1,64 @@
+"""Sincronização da lista de usuários por diferença.
+
+Compara o DataFrame original com o que saiu do `st.data_editor` (pela coluna
+`id`) e grava só o que mudou: inserções, um upsert com as linhas alteradas e
+um delete com os ids removidos. Os ids existentes são preservados, então os
+empréstimos continuam apontando para as pessoas certas.
+"""
+CAMPOS = ["nome", "turma"]
+
+
+def _texto(serie):
+    return serie.fillna("").astype(str).str.strip()
+
+
+def calcular_alteracoes(original, editado):
+    """Retorna {"inserir": [...], "atualizar": [...], "remover": [ids]}.
+
+    Linhas existentes com o nome apagado contam como remoção; linhas novas sem
+    nome são ignoradas.
+    """
+    orig = original.set_index(original["id"].astype(int))[CAMPOS]
+    ed = editado.copy()
+    for c in CAMPOS:
+        ed[c] = _texto(ed[c]) if c in ed else ""
+
+    novos = ed[ed["id"].isna() & (ed["nome"] != "")]
+    inserir = novos[CAMPOS].to_dict("records")
+
+    existentes = ed[ed["id"].notna()]
+    existentes = existentes.set_index(existentes["id"].astype(int))[CAMPOS]
+    esvaziados = existentes.index[existentes["nome"] == ""]
+    existentes = existentes.drop(esvaziados)
+    remover = sorted(set(orig.index.difference(existentes.index)) | set(esvaziados))
+
+    comuns = existentes.index.intersection(orig.index)
+    antes = orig.loc[comuns].apply(_texto)
+    depois = existentes.loc[comuns]
+    mudou = (antes != depois).any(axis=1)
+    atualizar = [{"id": int(i), **depois.loc[i].to_dict()} for i in comuns[mudou.values]]
+    return {"inserir": inserir, "atualizar": atualizar, "remover": [int(i) for i in remover]}
+
+
+def aplicar_alteracoes(cliente, alteracoes):
+    """Grava a diferença. Não remove quem tem empréstimo ativo.
+
+    Retorna (alteracoes_aplicadas, ids_bloqueados).
+    """
+    remover = alteracoes["remover"]
+    bloqueados = []
+    if remover:
+        res = cliente.table("emprestimos").select("id_usuario").eq("status", "Ativo").in_("id_usuario", remover).execute()
+        bloqueados = sorted({int(r["id_usuario"]) for r in (res.data or [])})
+        remover = [i for i in remover if i not in bloqueados]
+        if remover:
+            cliente.table("usuarios").delete().in_("id", remover).execute()
+    if alteracoes["atualizar"]:
+        cliente.table("usuarios").upsert(alteracoes["atualizar"]).execute()
+    if alteracoes["inserir"]:
+        cliente.table("usuarios").insert(alteracoes["inserir"]).execute()
+    return {**alteracoes, "remover": remover}, bloqueados
+
+
+def vazio(alteracoes):
+    return not any(alteracoes.values())
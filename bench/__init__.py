@@ -0,0 +1 @@
+"""Benchmarks reprodutíveis do acervo, sem rede (ver `python -m bench.executar --help`)."""
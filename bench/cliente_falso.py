@@ -0,0 +1,342 @@
+"""Supabase em memória com o subconjunto do query builder usado pelo app.
+
+Implementa `table().select/eq/neq/gt/gte/lt/lte/ilike/in_/or_/order/limit/
+insert/update/upsert/delete/execute`, as views (`emprestimos_ativos`,
+`emprestimos_detalhados`, `generos_contagem`, `estat_uso_livros`), as funções
+RPC dos scripts em `sql/`, a coluna `versao`/`replica_remocoes` de sql/007 e
+os contadores `estat_*` de sql/008 (mantidos a cada empréstimo/devolução, como
+os triggers), com a mesma semântica, para que os caminhos de dados do app
+rodem sem rede.
+"""
+import copy
+import re
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+
+
+class Resultado:
+    def __init__(self, data, count=None):
+        self.data, self.count = data, count
+
+
+def _como_regex(padrao):
+    partes = re.split(r"[*%]", padrao)
+    return re.compile("^" + ".*".join(re.escape(p) for p in partes) + "$", re.IGNORECASE | re.DOTALL)
+
+
+def _igual(v, x):
+    # Filtros vindos de or_() chegam como texto ("autor.eq.Pendente")
+    return v is not None and str(v) == x if isinstance(x, str) else v == x
+
+
+_INSTANTE = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:\d{2})$")
+
+
+def _instantes(v, x):
+    # Filtro com instante e fuso (timestamptz): compara momentos; valor gravado sem fuso conta como UTC, como no banco
+    if not (isinstance(v, str) and isinstance(x, str) and _INSTANTE.match(x)):
+        return v, x
+    v = datetime.fromisoformat(v)
+    return v if v.tzinfo else v.replace(tzinfo=timezone.utc), datetime.fromisoformat(x)
+
+
+def _comparar(op):
+    return lambda v, x: v is not None and op(*_instantes(v, x))
+
+
+def _comparavel(v, nulos_primeiro=False):
+    return ((v is None) != nulos_primeiro, v if not isinstance(v, (int, float)) else float(v))
+
+
+_OPERADORES = {
+    "eq": _igual,
+    "neq": lambda v, x: v != x,
+    "gt": _comparar(lambda v, x: v > x),
+    "gte": _comparar(lambda v, x: v >= x),
+    "lt": _comparar(lambda v, x: v < x),
+    "lte": _comparar(lambda v, x: v <= x),
+    "ilike": lambda v, x: v is not None and bool(_como_regex(x).match(str(v))),
+    "in": lambda v, x: v in x,
+    "is": lambda v, x: v is None if x == "null" else str(v).lower() == x,
+}
+
+
+class Consulta:
+    def __init__(self, banco, tabela):
+        self._banco, self._tabela = banco, tabela
+        self._acao, self._payload = "select", None
+        self._colunas, self._contar = "*", False
+        self._filtros, self._ordem, self._limite = [], [], None
+
+    # --- construção ---------------------------------------------------------
+
+    def select(self, colunas="*", count=None):
+        self._colunas, self._contar = colunas, count == "exact"
+        return self
+
+    def _filtro(self, op, coluna, valor):
+        self._filtros.append(lambda r: _OPERADORES[op](r.get(coluna), valor))
+        return self
+
+    def eq(self, c, v): return self._filtro("eq", c, v)
+    def neq(self, c, v): return self._filtro("neq", c, v)
+    def gt(self, c, v): return self._filtro("gt", c, v)
+    def gte(self, c, v): return self._filtro("gte", c, v)
+    def lt(self, c, v): return self._filtro("lt", c, v)
+    def lte(self, c, v): return self._filtro("lte", c, v)
+    def ilike(self, c, v): return self._filtro("ilike", c, v)
+    def in_(self, c, v): return self._filtro("in", c, list(v))
+
+    def or_(self, expressao):
+        condicoes = []
+        for parte in expressao.split(","):
+            coluna, op, valor = parte.split(".", 2)
+            condicoes.append((coluna, op, valor))
+        self._filtros.append(lambda r: any(_OPERADORES[op](r.get(c), v) for c, op, v in condicoes))
+        return self
+
+    def order(self, coluna, desc=False, nullsfirst=False):
+        self._ordem.append((coluna, desc, nullsfirst and not desc))
+        return self
+
+    def limit(self, n):
+        self._limite = n
+        return self
+
+    def insert(self, dados):
+        self._acao, self._payload = "insert", dados
+        return self
+
+    def upsert(self, dados):
+        self._acao, self._payload = "upsert", dados
+        return self
+
+    def update(self, dados):
+        self._acao, self._payload = "update", dados
+        return self
+
+    def delete(self):
+        self._acao = "delete"
+        return self
+
+    # --- execução -----------------------------------------------------------
+
+    def _linhas(self):
+        return [r for r in self._banco.linhas(self._tabela) if all(f(r) for f in self._filtros)]
+
+    def execute(self):
+        acao = getattr(self, f"_executar_{self._acao}")
+        return acao()
+
+    def _executar_select(self):
+        linhas = self._linhas()
+        total = len(linhas) if self._contar else None
+        for coluna, desc, nulos_primeiro in reversed(self._ordem):
+            linhas.sort(key=lambda r: _comparavel(r.get(coluna), nulos_primeiro), reverse=desc)
+        if self._limite is not None:
+            linhas = linhas[:self._limite]
+        if self._colunas.strip() != "*":
+            cols = [c.strip() for c in self._colunas.split(",")]
+            linhas = [{c: r.get(c) for c in cols} for r in linhas]
+        else:
+            linhas = [dict(r) for r in linhas]
+        return Resultado(linhas, total)
+
+    def _executar_insert(self):
+        registros = self._payload if isinstance(self._payload, list) else [self._payload]
+        return Resultado([self._banco.inserir(self._tabela, r) for r in registros])
+
+    def _executar_upsert(self):
+        registros = self._payload if isinstance(self._payload, list) else [self._payload]
+        tabela = self._banco.tabelas[self._tabela]
+        saida = []
+        for r in registros:
+            if r.get("id") in tabela:
+                self._banco.alterar(tabela[r["id"]], r)
+                saida.append(dict(tabela[r["id"]]))
+            else:
+                saida.append(self._banco.inserir(self._tabela, r))
+        return Resultado(saida)
+
+    def _executar_update(self):
+        alvos = self._linhas()
+        for r in alvos:
+            self._banco.alterar(r, self._payload)
+        return Resultado([dict(r) for r in alvos])
+
+    def _executar_delete(self):
+        alvos = self._linhas()
+        tabela = self._banco.tabelas[self._tabela]
+        for r in alvos:
+            del tabela[r["id"]]
+            self._banco.inserir("replica_remocoes", {"tabela": self._tabela, "id_registro": r["id"]})
+        return Resultado([dict(r) for r in alvos])
+
+
+class ChamadaRpc:
+    def __init__(self, funcao, params):
+        self._funcao, self._params = funcao, params
+
+    def execute(self):
+        return Resultado(self._funcao(**self._params))
+
+
+class SupabaseFalso:
+    def __init__(self, tabelas=None):
+        # tabela -> {id: linha}
+        self.tabelas = defaultdict(dict)
+        self._proximo_id = defaultdict(int)
+        self._versao = 0  # sequência replica_versao de sql/007
+        self._entradas_lote = set()  # tabela entradas_lote de sql/009
+        self._replica_operacoes = {}  # tabela replica_operacoes de sql/010: chave -> resultado
+        for nome, linhas in (tabelas or {}).items():
+            for r in linhas:
+                self.inserir(nome, r)
+
+    # --- armazenamento ------------------------------------------------------
+
+    def inserir(self, tabela, registro):
+        r = copy.copy(registro)
+        if r.get("id") is None:
+            self._proximo_id[tabela] += 1
+            r["id"] = self._proximo_id[tabela]
+        else:
+            self._proximo_id[tabela] = max(self._proximo_id[tabela], r["id"])
+        self._versao += 1
+        r["versao"] = self._versao
+        self.tabelas[tabela][r["id"]] = r
+        if tabela == "emprestimos":
+            self._estat_somar(r, 1, int(r.get("status") == "Devolvido"), r.get("data_saida"))
+        return dict(r)
+
+    def alterar(self, linha, campos):
+        devolvido = linha.get("status") == "Devolvido"
+        self._versao += 1
+        linha.update(campos, versao=self._versao)
+        if "id_livro" in linha and "status" in campos and (campos["status"] == "Devolvido") != devolvido:
+            self._estat_somar(linha, 0, -1 if devolvido else 1, date.today().isoformat())
+
+    def _estat_somar(self, emprestimo, emprestimos, devolucoes, dia):
+        # Triggers de sql/008: contadores por livro, gênero, turma e mês
+        livro = self.tabelas["livros_acervo"].get(emprestimo["id_livro"])
+        usuario = self.tabelas["usuarios"].get(emprestimo["id_usuario"]) or {}
+        mes = (dia or date.today().isoformat())[:8] + "01"
+        chaves = [("estat_meses", "mes", mes), ("estat_turmas", "turma", (usuario.get("turma") or "").strip() or "Sem turma")]
+        if livro:
+            chaves += [("estat_livros", "id_livro", livro["id"]), ("estat_generos", "genero", livro.get("genero") or "Geral")]
+        for tabela, coluna, chave in chaves:
+            linha = self.tabelas[tabela].setdefault(chave, {coluna: chave, "emprestimos": 0, "devolucoes": 0})
+            linha["emprestimos"] += emprestimos
+            linha["devolucoes"] += devolucoes
+            if tabela == "estat_livros" and emprestimos and dia:
+                linha["ultimo_emprestimo"] = max(linha.get("ultimo_emprestimo") or dia, dia)
+
+    def linhas(self, tabela):
+        visao = getattr(self, f"_view_{tabela}", None)
+        return visao() if visao else list(self.tabelas[tabela].values())
+
+    def _emprestimos_unidos(self):
+        livros, usuarios = self.tabelas["livros_acervo"], self.tabelas["usuarios"]
+        for e in self.tabelas["emprestimos"].values():
+            l, u = livros.get(e["id_livro"]), usuarios.get(e["id_usuario"])
+            if l and u:
+                yield {**e, "titulo": l["titulo"], "genero": l.get("genero"), "nome": u["nome"], "turma": u.get("turma")}
+
+    def _view_emprestimos_ativos(self):
+        hoje = date.today()
+        return [{**e, "dias_atraso": max((hoje - date.fromisoformat(e["data_retorno_prevista"])).days, 0)}
+                for e in self._emprestimos_unidos() if e["status"] == "Ativo"]
+
+    def _view_emprestimos_detalhados(self):
+        return list(self._emprestimos_unidos())
+
+    def _view_generos_contagem(self):
+        titulos, volumes = Counter(), Counter()
+        for l in self.tabelas["livros_acervo"].values():
+            if l.get("genero"):
+                titulos[l["genero"]] += 1
+                volumes[l["genero"]] += l.get("quantidade") or 0
+        return [{"genero": g, "titulos": n, "volumes": volumes[g]} for g, n in titulos.items()]
+
+    def _view_estat_uso_livros(self):
+        estat = self.tabelas["estat_livros"]
+        return [{**l, "emprestimos": estat.get(l["id"], {}).get("emprestimos", 0),
+                 "ultimo_emprestimo": estat.get(l["id"], {}).get("ultimo_emprestimo")}
+                for l in self.tabelas["livros_acervo"].values()]
+
+    # --- API do cliente -----------------------------------------------------
+
+    def table(self, nome):
+        return Consulta(self, nome)
+
+    def rpc(self, nome, params=None):
+        return ChamadaRpc(getattr(self, f"_rpc_{nome}"), params or {})
+
+    # --- funções de sql/ ----------------------------------------------------
+
+    def _rpc_registrar_emprestimos(self, itens):
+        livros = self.tabelas["livros_acervo"]
+        pedido = Counter(int(i["id_livro"]) for i in itens)
+        falta = [livros[l]["titulo"] for l, n in pedido.items() if livros[l]["quantidade"] < n]
+        if falta:
+            raise Exception(f"Estoque insuficiente: {', '.join(falta)}")
+        for i in itens:
+            self.inserir("emprestimos", {"id_livro": int(i["id_livro"]), "id_usuario": int(i["id_usuario"]),
+                                         "data_saida": i.get("data_saida") or date.today().isoformat(),
+                                         "data_retorno_prevista": i["data_retorno_prevista"], "status": "Ativo"})
+        for l, n in pedido.items():
+            self.alterar(livros[l], {"quantidade": livros[l]["quantidade"] - n})
+        return [{"id_livro": l, "quantidade": livros[l]["quantidade"]} for l in pedido]
+
+    def _rpc_registrar_devolucoes(self, ids_emprestimo):
+        emprestimos, livros = self.tabelas["emprestimos"], self.tabelas["livros_acervo"]
+        por_livro = Counter()
+        for i in ids_emprestimo:
+            e = emprestimos.get(i)
+            if e and e["status"] == "Ativo":
+                self.alterar(e, {"status": "Devolvido"})
+                por_livro[e["id_livro"]] += 1
+        for l, n in por_livro.items():
+            self.alterar(livros[l], {"quantidade": livros[l]["quantidade"] + n})
+        return [{"id_livro": l, "quantidade": livros[l]["quantidade"]} for l in por_livro]
+
+    def _rpc_ajustar_estoque(self, itens):
+        livros = self.tabelas["livros_acervo"]
+        deltas = Counter()
+        for i in itens:
+            deltas[int(i["id_livro"])] += int(i["delta"])
+        for l, d in deltas.items():
+            self.alterar(livros[l], {"quantidade": livros[l]["quantidade"] + d})
+        return [{"id_livro": l, "quantidade": livros[l]["quantidade"]} for l in deltas]
+
+    def _rpc_registrar_entrada_lote(self, chave, ajustes, novos):
+        if chave in self._entradas_lote:
+            return None
+        self._entradas_lote.add(chave)
+        return {"estoque": self._rpc_ajustar_estoque(ajustes),
+                "inseridos": [self.inserir("livros_acervo", n) for n in novos]}
+
+    def _rpc_replica_executar(self, operacoes):
+        # Uma transação: se uma operação falha, nada do lote fica gravado
+        antes = copy.deepcopy((self.tabelas, self._proximo_id, self._versao, self._replica_operacoes))
+        try:
+            resultados = []
+            for op in operacoes:
+                if op["chave"] not in self._replica_operacoes:
+                    if "nome" in op:
+                        saida = getattr(self, f"_rpc_{op['nome']}")(**op["params"])
+                    else:
+                        saida = [self.inserir(op["tabela"], linha) for linha in op["linhas"]]
+                    self._replica_operacoes[op["chave"]] = saida
+                resultados.append(self._replica_operacoes[op["chave"]])
+            return resultados
+        except Exception:
+            self.tabelas, self._proximo_id, self._versao, self._replica_operacoes = antes
+            raise
+
+    def _rpc_atualizar_livros_lote(self, itens):
+        livros = self.tabelas["livros_acervo"]
+        for i in itens:
+            if i["id"] in livros:
+                self.alterar(livros[i["id"]], {k: i[k] for k in ("autor", "sinopse", "genero")})
+        return None
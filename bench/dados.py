@@ -0,0 +1,62 @@
+"""Conjuntos sintéticos determinísticos (mesma semente => mesmos dados)."""
+import random
+from datetime import date, timedelta
+
+TAMANHOS = {"2k": 2_000, "20k": 20_000, "100k": 100_000}
+
+GENEROS = ["Ficção", "Infantil", "Juvenil", "Didático", "Poesia", "História", "Ciências", "Artes", "Gibis/HQ", "Religião", "Filosofia"]
+PALAVRAS = ["casa", "menino", "estrela", "rio", "sertão", "cidade", "noite", "segredo", "viagem", "jardim", "mar",
+            "coração", "floresta", "caminho", "memórias", "tempo", "lua", "guerra", "amizade", "aventura"]
+NOMES = ["Ana", "João", "Maria", "Pedro", "Luíza", "Gabriel", "Júlia", "Lucas", "Beatriz", "Rafael", "Sofia", "Mateus"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Carvalho", "Gomes", "Ribeiro", "Almeida"]
+TURMAS = [f"{a}º{t}" for a in range(6, 10) for t in "ABC"]
+
+
+def _isbn13(rng):
+    base = "978" + "".join(str(rng.randrange(10)) for _ in range(9))
+    soma = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(base))
+    return base + str((10 - soma % 10) % 10)
+
+
+def livros(n, rng):
+    registros = []
+    for i in range(1, n + 1):
+        titulo = " ".join(rng.choice(PALAVRAS) for _ in range(rng.randint(2, 4))).capitalize()
+        pendente = rng.random() < 0.05
+        registros.append({
+            "id": i, "isbn": _isbn13(rng), "titulo": f"{titulo} {i}",
+            "autor": "Pendente" if pendente else f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}",
+            "sinopse": "Pendente" if pendente else "Sinopse sintética.",
+            "genero": rng.choice(GENEROS), "quantidade": rng.randint(0, 6),
+            "data_cadastro": (date(2023, 1, 1) + timedelta(days=rng.randrange(1000))).isoformat() + "T10:00:00+00:00",
+        })
+    return registros
+
+
+def usuarios(n, rng):
+    return [{"id": i, "nome": f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {i}", "turma": rng.choice(TURMAS)}
+            for i in range(1, n + 1)]
+
+
+def emprestimos(n, n_livros, n_usuarios, rng):
+    hoje = date.today()
+    registros = []
+    for i in range(1, n + 1):
+        saida = hoje - timedelta(days=rng.randrange(400))
+        registros.append({
+            "id": i, "id_livro": rng.randint(1, n_livros), "id_usuario": rng.randint(1, n_usuarios),
+            "data_saida": saida.isoformat(), "data_retorno_prevista": (saida + timedelta(days=15)).isoformat(),
+            "status": "Ativo" if rng.random() < 0.1 else "Devolvido",
+        })
+    return registros
+
+
+def gerar(n_livros, semente=42):
+    """Tabelas com `n_livros` livros, n/10 usuários e n/2 empréstimos."""
+    rng = random.Random(semente)
+    n_usuarios, n_emprestimos = max(50, n_livros // 10), n_livros // 2
+    return {
+        "livros_acervo": livros(n_livros, rng),
+        "usuarios": usuarios(n_usuarios, rng),
+        "emprestimos": emprestimos(n_emprestimos, n_livros, n_usuarios, rng),
+    }
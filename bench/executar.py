@@ -0,0 +1,178 @@
+"""Mede os caminhos de dados de cada aba contra o Supabase em memória.
+
+Uso:
+    python -m bench.executar --tamanhos 2k 20k --saida bench_resultados.json
+    python -m bench.executar --tamanhos 2k --comparar bench_resultados.json
+
+Cada cenário roda `--repeticoes` vezes e guarda mediana e mínimo em ms. Os
+dados são gerados com semente fixa e as APIs externas são stubs, então duas
+execuções na mesma máquina são comparáveis.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("ACERVO_DIR_LOCAL", tempfile.mkdtemp(prefix="acervo_bench_"))
+
+import pandas as pd  # noqa: E402
+
+from acervo import circulacao, curadoria, estatisticas, exportacao, importacao, metadados  # noqa: E402
+from acervo.busca import IndiceCatalogo  # noqa: E402
+from acervo.catalogo import CatalogoCache  # noqa: E402
+from acervo.duplicatas import DuplicatasCatalogo  # noqa: E402
+from acervo.paginacao import pagina_livros  # noqa: E402
+from acervo.replica import ClienteReplica, Replica  # noqa: E402
+from acervo.taxa import LimiteTaxa  # noqa: E402
+from bench import dados, stubs  # noqa: E402
+from bench.cliente_falso import SupabaseFalso  # noqa: E402
+
+CONSULTAS = ["casa", "menino estrela", "sertao", "jardim do mar", "coracao", "aventra", "memorias tempo", "lua 12"]
+
+
+def _cronometrar(funcao, repeticoes, preparar=None):
+    tempos = []
+    for _ in range(repeticoes):
+        contexto = preparar() if preparar else None
+        inicio = time.perf_counter()
+        funcao(contexto)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {"mediana_ms": round(statistics.median(tempos), 2), "min_ms": round(min(tempos), 2), "repeticoes": repeticoes}
+
+
+def cenarios(n_livros, repeticoes):
+    tabelas = dados.gerar(n_livros)
+    cliente = SupabaseFalso(tabelas)
+    res = {}
+
+    # --- Consulta / Gestão -----------------------------------------------------
+    res["catalogo_carga"] = _cronometrar(lambda _: CatalogoCache(cliente).df(), repeticoes)
+    catalogo = CatalogoCache(cliente)
+    res["indice_construcao"] = _cronometrar(lambda _: IndiceCatalogo().obter(catalogo), repeticoes)
+    indice = IndiceCatalogo()
+    indice.obter(catalogo)
+    res["busca_local_8_consultas"] = _cronometrar(
+        lambda _: [indice.filtrar(catalogo, q, campos=["titulo", "autor", "genero"]) for q in CONSULTAS], repeticoes)
+    res["busca_paginada_8_consultas"] = _cronometrar(
+        lambda _: [pagina_livros(cliente, q) for q in CONSULTAS], repeticoes)
+    res["duplicatas_construcao"] = _cronometrar(lambda _: DuplicatasCatalogo().obter(catalogo), repeticoes)
+    duplicatas = DuplicatasCatalogo()
+    duplicatas.obter(catalogo)
+    res["duplicatas_8_consultas"] = _cronometrar(
+        lambda _: [duplicatas.buscar(catalogo, q) for q in CONSULTAS], repeticoes)
+
+    # --- Réplica local ----------------------------------------------------------
+    def replica_vazia():
+        return Replica(cliente, caminho=os.path.join(os.environ["ACERVO_DIR_LOCAL"], f"r_{time.time_ns()}.sqlite3"))
+
+    res["replica_sincronizacao_inicial"] = _cronometrar(lambda r: r.sincronizar(), repeticoes, preparar=replica_vazia)
+    replica = replica_vazia()
+    replica.sincronizar()
+    local = ClienteReplica(replica, cliente)
+    res["replica_sincronizacao_vazia"] = _cronometrar(lambda _: replica.sincronizar(), repeticoes)
+    res["replica_busca_paginada_8_consultas"] = _cronometrar(
+        lambda _: [pagina_livros(local, q) for q in CONSULTAS], repeticoes)
+    res["replica_catalogo_carga"] = _cronometrar(lambda _: CatalogoCache(local).df(), repeticoes)
+
+    # --- Circulação ------------------------------------------------------------
+    def livros_disponiveis(k):
+        return [l["id"] for l in cliente.tabelas["livros_acervo"].values() if l["quantidade"] > 0][:k]
+
+    res["emprestimo_turma_35"] = _cronometrar(
+        lambda ids: circulacao.emprestar(cliente, [(l, 1 + i % 50) for i, l in enumerate(ids)], 15),
+        repeticoes, preparar=lambda: livros_disponiveis(35))
+    res["devolucao_lote_30"] = _cronometrar(
+        lambda ids: circulacao.devolver(cliente, ids), repeticoes,
+        preparar=lambda: [e["id"] for e in cliente.tabelas["emprestimos"].values() if e["status"] == "Ativo"][:30])
+    ativos = circulacao.CacheEmprestimosAtivos(cliente)
+    res["emprestimos_ativos_carga"] = _cronometrar(lambda _: (ativos.invalidar(), ativos.df()), repeticoes)
+    res["estatisticas_carga"] = _cronometrar(lambda _: estatisticas.carregar(cliente), repeticoes)
+
+    # --- Importação ------------------------------------------------------------
+    existentes = tabelas["livros_acervo"][: n_livros // 20]
+    planilha = pd.DataFrame(
+        [{"isbn": l["isbn"], "titulo": l["titulo"], "autor": l["autor"]} for l in existentes]
+        + [{"isbn": f"97865{i:08d}", "titulo": f"Importado {i}", "autor": "Pendente"} for i in range(n_livros // 20)])
+    res["importacao_preparar"] = _cronometrar(lambda _: importacao.preparar(planilha, catalogo.df()), repeticoes)
+    res["importacao_preparar_duplicatas"] = _cronometrar(
+        lambda _: importacao.preparar(planilha, catalogo.df(),
+                                      parecidos=lambda regs: duplicatas.parecidos_varios(catalogo, regs)), repeticoes)
+    novos, _ = importacao.preparar(planilha, catalogo.df())
+    res["importacao_inserir_lotes"] = _cronometrar(
+        lambda _: importacao.inserir_em_lotes(SupabaseFalso(), novos), repeticoes)
+
+    # --- Exportação ------------------------------------------------------------
+    df = catalogo.df()
+    formatos = ["csv"]
+    try:
+        import openpyxl  # noqa: F401
+        formatos.append("xlsx")
+    except ImportError:
+        pass
+    if exportacao.parquet_disponivel():
+        formatos.append("parquet")
+    for fmt in formatos:
+        res[f"exportacao_{fmt}"] = _cronometrar(lambda _, f=fmt: exportacao.GERADORES[f](df), repeticoes)
+
+    # --- Curadoria (APIs stubadas, sem limite de taxa) ---------------------------
+    pendentes = [dict(l) for l in cliente.tabelas["livros_acervo"].values() if l["autor"] == "Pendente"][:200]
+    with stubs.apis_externas():
+        res["curadoria_200"] = _cronometrar(
+            lambda _: curadoria.executar(cliente, pendentes, "gemini", "google",
+                                         checkpoint=curadoria.Checkpoint(f"bench_{time.time_ns()}.json")),
+            repeticoes)
+        res["metadados_prefetch_500"] = _cronometrar(
+            lambda c: metadados.prefetch_isbns([l["isbn"] for l in tabelas["livros_acervo"][:500]], "google", c),
+            repeticoes, preparar=lambda: metadados.CacheMetadados(os.path.join(os.environ["ACERVO_DIR_LOCAL"], f"m_{time.time_ns()}.sqlite3")))
+    return res
+
+
+def comparar(atual, anterior):
+    linhas = []
+    for tamanho, cenarios_atuais in atual["resultados"].items():
+        for nome, r in cenarios_atuais.items():
+            antes = anterior.get("resultados", {}).get(tamanho, {}).get(nome)
+            if antes:
+                razao = r["mediana_ms"] / antes["mediana_ms"] if antes["mediana_ms"] else float("nan")
+                linhas.append(f"{tamanho:>5} {nome:<30} {antes['mediana_ms']:>10.1f} -> {r['mediana_ms']:>10.1f} ms  ({razao:.2f}x)")
+    return "\n".join(linhas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", nargs="+", default=["2k", "20k"], choices=list(dados.TAMANHOS))
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args(argv)
+
+    # Os limites de taxa reais deixariam o benchmark medindo sleep
+    metadados.LIMITE_GOOGLE = LimiteTaxa(por_segundo=1e9)
+    curadoria.LIMITE_GEMINI = LimiteTaxa(por_segundo=1e9)
+
+    resultado = {
+        "meta": {"data": datetime.now().isoformat(timespec="seconds"), "python": sys.version.split()[0],
+                 "plataforma": platform.platform(), "pandas": pd.__version__, "repeticoes": args.repeticoes},
+        "resultados": {},
+    }
+    for tamanho in args.tamanhos:
+        print(f"== {tamanho} livros", file=sys.stderr)
+        resultado["resultados"][tamanho] = cenarios(dados.TAMANHOS[tamanho], args.repeticoes)
+        for nome, r in resultado["resultados"][tamanho].items():
+            print(f"{tamanho:>5} {nome:<30} {r['mediana_ms']:>10.1f} ms (mín {r['min_ms']:.1f})")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            print("\n" + comparar(resultado, json.load(f)))
+
+
+if __name__ == "__main__":
+    main()
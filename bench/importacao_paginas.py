@@ -0,0 +1,74 @@
+"""Tempo de importação na partida do app e ao abrir cada aba.
+
+Cada medida roda num processo Python novo (importação a frio), `--repeticoes`
+vezes, e guarda a mediana. "antes" reproduz as importações do Inicio.py
+monolítico (tudo carregado na partida); "partida" é o que o Inicio.py atual
+importa antes do menu; cada "aba:*" é o custo adicional de abrir a aba pela
+primeira vez no processo.
+
+Uso:
+    python -m bench.importacao_paginas --saida importacao.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from paginas import PAGINAS
+
+ANTES = ["streamlit", "pandas", "supabase", "requests", "acervo.catalogo", "acervo.busca", "acervo.paginacao",
+         "acervo.circulacao", "acervo.curadoria", "acervo.datas", "acervo.diagnostico", "acervo.exportacao",
+         "acervo.importacao", "acervo.leitor", "acervo.metadados", "acervo.relatorios", "acervo.usuarios",
+         "acervo.generos", "acervo.replica"]
+PARTIDA = ["streamlit", "acervo.diagnostico", "paginas", "paginas.comum"]
+PESADOS = ["requests", "openpyxl", "cv2", "numpy", "pyzbar", "pytesseract", "pyarrow"]
+
+_SONDA = """
+import importlib, json, sys, time
+for m in {pre!r}:
+    importlib.import_module(m)
+antes = set(sys.modules)
+t = time.perf_counter()
+for m in {alvo!r}:
+    importlib.import_module(m)
+ms = (time.perf_counter() - t) * 1000
+print(json.dumps({{"ms": ms, "modulos": len(set(sys.modules) - antes),
+                  "pesados": [p for p in {pesados!r} if p in sys.modules and p not in antes]}}))
+"""
+
+
+def medir(alvo, pre=(), repeticoes=5):
+    codigo = _SONDA.format(pre=list(pre), alvo=list(alvo), pesados=PESADOS)
+    env = {**os.environ, "ACERVO_REPLICA": "0", "ACERVO_DIR_LOCAL": tempfile.mkdtemp(prefix="acervo_imp_")}
+    amostras = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, env=env, check=True)
+        amostras.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return {"mediana_ms": round(statistics.median(a["ms"] for a in amostras), 1),
+            "modulos": amostras[-1]["modulos"], "pesados": amostras[-1]["pesados"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    resultados = {"antes": medir(ANTES, repeticoes=args.repeticoes),
+                  "partida": medir(PARTIDA, repeticoes=args.repeticoes)}
+    for menu, modulo in PAGINAS.items():
+        resultados[f"aba:{menu}"] = medir([modulo], pre=PARTIDA, repeticoes=args.repeticoes)
+
+    for nome, r in resultados.items():
+        pesados = f"  [{', '.join(r['pesados'])}]" if r["pesados"] else ""
+        print(f"{nome:<38} {r['mediana_ms']:>8.1f} ms  {r['modulos']:>4} módulos{pesados}")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Respostas fixas do Google Books e do Gemini, com latência simulada opcional."""
+import json
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+
+
+class RespostaFalsa:
+    def __init__(self, corpo, status=200):
+        self._corpo, self.status_code = corpo, status
+        self.content = json.dumps(corpo).encode("utf-8")
+        self.ok = status < 400
+
+    def json(self):
+        return self._corpo
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"HTTP {self.status_code}", response=self)
+
+
+def _google_books(params):
+    q = params.get("q", "")
+    if q.endswith("0"):  # ~10% sem resultado, para exercitar o cache negativo
+        return {"totalItems": 0}
+    return {"items": [{"volumeInfo": {"title": f"Livro {q}", "authors": ["Autor Sintético"],
+                                      "description": "Descrição sintética.", "categories": ["Fiction"]}}]}
+
+
+def _gemini(corpo):
+    prompt = corpo["contents"][0]["parts"][0]["text"]
+    livros = json.loads(prompt[prompt.index("["):])
+    texto = json.dumps([{"id": l["id"], "autor": "Autor IA", "sinopse": "Sinopse IA.", "genero": "ficção"} for l in livros])
+    return {"candidates": [{"content": {"parts": [{"text": texto}]}}]}
+
+
+@contextmanager
+def apis_externas(latencia_ms=0):
+    """Substitui `requests.get`/`requests.post` enquanto o bloco roda."""
+    get_original, post_original = requests.get, requests.post
+
+    def get(url, params=None, **kwargs):
+        time.sleep(latencia_ms / 1000)
+        return RespostaFalsa(_google_books(params or {}))
+
+    def post(url, params=None, json=None, **kwargs):
+        time.sleep(latencia_ms / 1000)
+        if "generativelanguage" in urlparse(url).netloc:
+            return RespostaFalsa(_gemini(json))
+        return RespostaFalsa({}, 404)
+
+    requests.get, requests.post = get, post
+    try:
+        yield
+    finally:
+        requests.get, requests.post = get_original, post_original
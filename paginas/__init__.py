@@ -0,0 +1,33 @@
+"""Páginas do app, uma por item do menu, importadas só quando abertas.
+
+Cada módulo expõe `exibir()`. Um aluno que só abre a Consulta não paga a
+importação de requests, openpyxl ou OpenCV, usados pelas outras abas. O
+tempo da primeira importação de cada página vai para as métricas de
+Diagnóstico (tipo "import").
+"""
+import importlib
+import sys
+import time
+
+PAGINAS = {
+    "Consulta do Acervo": "paginas.consulta",
+    "Entrada de Livros": "paginas.entrada",
+    "Circulação (Empréstimos)": "paginas.circulacao",
+    "Gestão do Acervo": "paginas.gestao",
+    "Relatórios de Circulação": "paginas.relatorios",
+    "Estatísticas": "paginas.estatisticas",
+    "Curadoria Inteligente (IA)": "paginas.curadoria",
+    "Diagnóstico": "paginas.diagnostico",
+}
+
+
+def carregar(menu, metricas=None):
+    """Módulo da aba `menu`, importado uma vez por processo."""
+    nome = PAGINAS[menu]
+    if nome in sys.modules:
+        return sys.modules[nome]
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(nome)
+    if metricas:
+        metricas.registrar("import", nome, (time.perf_counter() - inicio) * 1000)
+    return modulo
@@ -0,0 +1,177 @@
+"""Circulação: empréstimos, devoluções e cadastro de pessoas."""
+import time
+
+import pandas as pd
+import streamlit as st
+
+from acervo import circulacao, usuarios
+from acervo.paginacao import COLUNAS_USUARIOS, como_df, pagina_livros, pagina_usuarios
+from paginas.comum import busca_local, catalogo, emprestimos_ativos, indice, supabase
+
+# =================================================================
+# ABA: CIRCULAÇÃO (EMPRÉSTIMOS COM BUSCA INTELIGENTE)
+# =================================================================
+def exibir():
+    st.header("📑 Circulação de Livros")
+    aba_emp, aba_turma, aba_dev, aba_pes = st.tabs(["📤 Emprestar", "🏫 Por Turma", "📥 Devolver", "👤 Pessoas"])
+
+    with aba_pes:
+        st.subheader("👤 Gestão de Usuários")
+        with st.form("cad_u", clear_on_submit=True):
+            nu = st.text_input("Nome Completo *")
+            tu = st.text_input("Turma (Ex: 6ºA, Professor, Funcionário)")
+            if st.form_submit_button("🚀 Cadastrar Usuário"):
+                if nu:
+                    try:
+                        supabase.table("usuarios").insert({"nome": nu, "turma": tu}).execute()
+                        st.success(f"{nu} cadastrado!"); time.sleep(1); st.rerun()
+                    except Exception as e: st.error(f"Erro ao cadastrar usuário: {e}")
+                else: st.error("Nome é obrigatório.")
+        
+        st.divider()
+        res_u = supabase.table("usuarios").select("*").execute()
+        if res_u.data:
+            df_u = pd.DataFrame(res_u.data)
+            st.write("### Lista de Usuários")
+            ed_u = st.data_editor(df_u, num_rows="dynamic", use_container_width=True, hide_index=True, disabled=["id"])
+            if st.button("💾 Sincronizar Lista de Usuários"):
+                try:
+                    # Grava só a diferença (inserções, alterações e exclusões), preservando os ids
+                    alt = usuarios.calcular_alteracoes(df_u, ed_u)
+                    if usuarios.vazio(alt):
+                        st.info("Nenhuma alteração para sincronizar.")
+                    else:
+                        feito, bloqueados = usuarios.aplicar_alteracoes(supabase, alt)
+                        emprestimos_ativos.invalidar()  # nomes/turmas exibidos na devolução
+                        if bloqueados:
+                            nomes = df_u[df_u['id'].isin(bloqueados)]['nome'].tolist()
+                            st.warning(f"⚠️ Não removidos (empréstimo ativo): {', '.join(nomes)}")
+                        st.success(f"Sincronizado! {len(feito['inserir'])} novo(s), {len(feito['atualizar'])} alterado(s), {len(feito['remover'])} removido(s).")
+                        time.sleep(1 if not bloqueados else 3); st.rerun()
+                except Exception as e: st.error(f"Erro: {e}")
+
+    with aba_emp:
+        st.subheader("📤 Novo Empréstimo")
+        if "emprestimo_ok" in st.session_state:
+            st.success(st.session_state.pop("emprestimo_ok"))
+        
+        # 1. BUSCA DE USUÁRIO
+        u_id = None
+        busca_u = st.text_input("🔍 Buscar Pessoa (Nome ou Turma):", placeholder="Digite para filtrar...")
+        # Filtro no banco; sem termo mostra os 5 últimos cadastrados
+        linhas_u, _ = pagina_usuarios(supabase, busca_u, limite=20 if busca_u else 5)
+        df_u_filt = como_df(linhas_u, COLUNAS_USUARIOS)
+        u_map = {row['id']: f"{row['nome']} ({row['turma']})" for _, row in df_u_filt.iterrows()}
+        if u_map:
+            u_id = st.selectbox("Selecione a Pessoa:", options=list(u_map.keys()), format_func=lambda x: u_map[x])
+        else:
+            st.warning("Nenhuma pessoa encontrada com esse nome.")
+        
+        st.divider()
+
+        # 2. BUSCA DE LIVRO
+        l_id = None
+        busca_l = st.text_input("🔍 Buscar Livro (Título ou Autor):", placeholder="Digite o nome do livro...")
+        if busca_l and busca_local():
+            df_cat = catalogo.df()
+            df_l_filt = indice.filtrar(catalogo, busca_l, campos=["titulo", "autor"], df=df_cat[df_cat['quantidade'] > 0]).head(20)
+        else:
+            # Filtro no banco; sem termo mostra os 5 últimos disponíveis
+            linhas_l, _ = pagina_livros(supabase, busca_l, limite=20 if busca_l else 5, colunas="id, titulo, autor, quantidade",
+                                        campos_busca=("titulo", "autor"), somente_disponiveis=True)
+            df_l_filt = como_df(linhas_l, "id, titulo, autor, quantidade")
+        l_map = {row['id']: f"{row['titulo']} - {row['autor']} (Disp: {row['quantidade']})" for _, row in df_l_filt.iterrows()}
+        if l_map:
+            l_id = st.selectbox("Selecione o Livro:", options=list(l_map.keys()), format_func=lambda x: l_map[x])
+        else:
+            st.warning("Nenhum livro disponível encontrado com esse título.")
+
+        # 3. PRAZO E CONFIRMAÇÃO
+        if u_id and l_id:
+            prazo = st.select_slider("Prazo de devolução (dias):", options=[7, 15, 30, 45], value=15)
+            if st.button("🚀 Confirmar Empréstimo"):
+                try:
+                    # Registra o empréstimo e baixa o estoque na mesma transação (RPC)
+                    estoque, dt_p = circulacao.emprestar(supabase, [(l_id, u_id)], prazo)
+                    circulacao.aplicar_estoque(catalogo, estoque); emprestimos_ativos.invalidar()
+                    # Mensagem exibida no próximo rerun, sem segurar a tela
+                    st.session_state.emprestimo_ok = f"✅ Empréstimo realizado! Devolução prevista: {dt_p}"
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Erro técnico: {e}")
+
+    with aba_turma:
+        st.subheader("🏫 Empréstimo por Turma")
+        if "turma_lote_n" not in st.session_state: st.session_state.turma_lote_n = 0
+        if "turma_ok" in st.session_state:
+            st.success(st.session_state.pop("turma_ok"))
+
+        res_tu = supabase.table("usuarios").select("turma").execute()
+        turmas = sorted({r['turma'] for r in res_tu.data or [] if r.get('turma')})
+        if not turmas:
+            st.info("Cadastre as pessoas com a turma na aba 👤 Pessoas.")
+        else:
+            turma = st.selectbox("Turma:", turmas, key="turma_lote")
+            res_al = supabase.table("usuarios").select(COLUNAS_USUARIOS).eq("turma", turma).order("nome").execute()
+            df_al = como_df(res_al.data, COLUNAS_USUARIOS)
+
+            # Livros disponíveis no catálogo em memória; rótulo com o id para não confundir títulos iguais
+            df_cat = catalogo.df()
+            df_disp = df_cat[df_cat['quantidade'] > 0].sort_values('titulo') if not df_cat.empty else df_cat
+            rotulos = {f"{r.titulo} — {r.autor} (#{r.id})": int(r.id) for r in df_disp.itertuples()}
+            disponivel = dict(zip(df_disp['id'].astype(int), df_disp['quantidade'].astype(int))) if not df_disp.empty else {}
+
+            abertos = emprestimos_ativos.df()['id_usuario'].value_counts()
+            df_al["em_aberto"] = df_al['id'].map(abertos).fillna(0).astype(int)
+            df_al["livro"] = None
+            st.caption("Escolha o livro de cada aluno; quem ficar em branco não leva livro.")
+            grid_t = st.data_editor(df_al, hide_index=True, use_container_width=True, column_order=["nome", "em_aberto", "livro"],
+                                    disabled=["nome", "em_aberto"], key=f"grid_turma_{turma}_{st.session_state.turma_lote_n}",
+                                    column_config={"nome": "Aluno", "em_aberto": st.column_config.NumberColumn("Em aberto"),
+                                                   "livro": st.column_config.SelectboxColumn("Livro", options=list(rotulos), width="large")})
+
+            itens = [(rotulos[r.livro], int(r.id)) for r in grid_t.itertuples() if r.livro in rotulos]
+            if itens:
+                # Confere o estoque antes de gravar: nenhum livro pode ficar negativo
+                falta = circulacao.faltas(itens, disponivel)
+                if falta:
+                    titulos = dict(zip(df_disp['id'].astype(int), df_disp['titulo']))
+                    for l, (pedidos, disp) in falta.items():
+                        st.error(f"❌ {titulos.get(l, l)}: {pedidos} pedido(s), só {disp} disponível(is).")
+                else:
+                    prazo_t = st.select_slider("Prazo de devolução (dias):", options=[7, 15, 30, 45], value=15, key="prazo_turma")
+                    if st.button(f"🚀 Confirmar {len(itens)} Empréstimo(s)"):
+                        try:
+                            # Todos os empréstimos e baixas de estoque numa única chamada (RPC)
+                            estoque, dt_p = circulacao.emprestar(supabase, itens, prazo_t)
+                            circulacao.aplicar_estoque(catalogo, estoque); emprestimos_ativos.invalidar()
+                            st.session_state.turma_ok = f"✅ {len(itens)} empréstimo(s) para a turma {turma}. Devolução prevista: {dt_p}"
+                            st.session_state.turma_lote_n += 1; st.rerun()
+                        except Exception as e:
+                            st.error(f"Erro técnico: {e}")
+
+    with aba_dev:
+        st.subheader("📥 Registrar Devolução")
+        # View já unida (título + nome), guardada em cache até o próximo empréstimo/devolução
+        df_m = emprestimos_ativos.df().copy()
+        if not df_m.empty:
+            st.write("Busque pelo nome da pessoa para devolver:")
+            busca_dev = st.text_input("🔍 Filtrar devoluções por nome:")
+            if busca_dev:
+                df_m = emprestimos_ativos.filtrar(busca_dev).copy()  # índice guardado junto com a view
+            
+            df_m["Selecionar"] = False
+            grid = st.data_editor(df_m[["Selecionar", "titulo", "nome", "data_retorno_prevista"]], 
+                                  hide_index=True, use_container_width=True, disabled=["titulo", "nome", "data_retorno_prevista"],
+                                  column_config={"data_retorno_prevista": st.column_config.DateColumn("Devolução prevista", format="DD/MM/YYYY")})
+            
+            sel = grid[grid["Selecionar"] == True]
+            if not sel.empty and st.button(f"Confirmar Retorno de {len(sel)} item(ns)"):
+                try:
+                    # Toda a seleção volta numa única chamada (status + estoque no banco)
+                    estoque = circulacao.devolver(supabase, df_m.loc[sel.index, 'id'].tolist())
+                    circulacao.aplicar_estoque(catalogo, estoque); emprestimos_ativos.invalidar()
+                    st.success("Devolução concluída!"); time.sleep(1); st.rerun()
+                except Exception as e: st.error(f"Erro: {e}")
+        else:
+            st.info("Não há empréstimos ativos.")
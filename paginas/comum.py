@@ -0,0 +1,166 @@
+"""Recursos compartilhados pelas páginas: conexão, caches e funções de apoio.
+
+Os `st.cache_resource` vivem uma vez por processo; este módulo é importado
+pelo Inicio.py depois do `set_page_config` e pelas páginas em `paginas/`.
+"""
+import streamlit as st
+from supabase import create_client
+
+from acervo import circulacao, diagnostico
+from acervo.busca import IndiceCatalogo
+from acervo.catalogo import CatalogoCache
+from acervo.config import REPLICA_LOCAL
+from acervo.duplicatas import DuplicatasCatalogo
+from acervo.generos import ServicoGeneros
+from acervo.paginacao import LIMITE_BUSCA_LOCAL, contar
+from acervo.replica import ClienteReplica, Replica, erro_de_rede
+
+# =================================================================
+# CONEXÃO COM O BANCO DE DADOS (SUPABASE)
+# =================================================================
+@st.cache_resource
+def conectar_supabase():
+    try:
+        url = st.secrets["supabase"]["url"]
+        key = st.secrets["supabase"]["key"]
+        return create_client(url, key)
+    except Exception as e:
+        st.error(f"⚠️ Erro de conexão na nuvem: {e}")
+        return None
+
+@st.cache_resource
+def obter_metricas():
+    # Tempos de Supabase, HTTP externo e pandas, para a página de Diagnóstico
+    return diagnostico.Metricas()
+
+metricas = obter_metricas()
+
+@st.cache_resource
+def obter_cliente():
+    cliente = conectar_supabase()
+    if not cliente: return None
+    if not REPLICA_LOCAL: return diagnostico.ClienteInstrumentado(cliente, metricas)
+    # Réplica em SQLite: leituras locais, escritas enfileiradas enquanto a internet estiver fora
+    replica = Replica(cliente)
+    try:
+        replica.sincronizar()
+        cliente.table("replica_operacoes").select("chave").limit(1).execute()
+    except Exception as e:
+        if not erro_de_rede(e):
+            st.warning(f"⚠️ Réplica local desativada (rode sql/007_replica.sql e sql/010_replica_idempotente.sql "
+                       f"no Supabase): {e}")
+            return diagnostico.ClienteInstrumentado(cliente, metricas)
+        replica.online = False
+    replica.iniciar()
+    # Medido por fora, para o Diagnóstico ver também as leituras servidas pelo SQLite
+    return diagnostico.ClienteInstrumentado(ClienteReplica(replica, cliente), metricas)
+
+supabase = obter_cliente()
+replica = getattr(supabase, "replica", None)
+# Sem a fila da réplica: para escritas que precisam ver o erro do banco (importação em lotes)
+supabase_remoto = diagnostico.ClienteInstrumentado(supabase.remoto, metricas) if replica else supabase
+
+def atualizar_replica(*tabelas):
+    # Traz para a réplica local o que foi gravado por supabase_remoto
+    if not replica: return
+    try: replica.sincronizar(tabelas)
+    except Exception: pass  # o ciclo em segundo plano tenta de novo
+
+@st.cache_resource
+def obter_catalogo():
+    # Snapshot único de livros_acervo compartilhado por todas as sessões
+    return CatalogoCache(supabase, medir=metricas.medir)
+
+catalogo = obter_catalogo()
+
+@st.cache_resource
+def obter_indice():
+    # Índice de busca (sem acentos / tolerante a erros) sincronizado com o catálogo
+    return IndiceCatalogo()
+
+indice = obter_indice()
+
+@st.cache_resource
+def obter_duplicatas():
+    # Índice de duplicatas prováveis (título/autor normalizados + MinHash), sincronizado com o catálogo
+    return DuplicatasCatalogo()
+
+duplicatas = obter_duplicatas()
+
+@st.cache_resource
+def obter_cache_metadados():
+    # Respostas do Google Books (positivas e negativas) persistidas em SQLite.
+    # Só as páginas que consultam o Google Books chamam: acervo.metadados importa requests.
+    from acervo import metadados
+    return metadados.CacheMetadados()
+
+@st.cache_resource
+def obter_generos():
+    # Faceta de gêneros com contagens, agrupada no banco
+    return ServicoGeneros(supabase, catalogo)
+
+generos = obter_generos()
+
+@st.cache_resource
+def obter_emprestimos_ativos():
+    return circulacao.CacheEmprestimosAtivos(supabase)
+
+emprestimos_ativos = obter_emprestimos_ativos()
+
+@st.cache_resource
+def ligar_replica():
+    # Mudanças feitas em outros computadores, baixadas em segundo plano, renovam os caches
+    def ao_mudar(tabelas):
+        if "livros_acervo" in tabelas:
+            catalogo.invalidar(); generos.invalidar()
+        emprestimos_ativos.invalidar()
+    if replica: replica.ao_mudar = ao_mudar
+
+ligar_replica()
+
+# =================================================================
+# FUNÇÕES DE APOIO
+# =================================================================
+GENEROS_BASE = ["Ficção", "Infantil", "Juvenil", "Didático", "Poesia", "História", "Ciências", "Artes", "Gibis/HQ", "Religião", "Filosofia"]
+TRADUCAO_GENEROS = {"Fiction": "Ficção", "Education": "Didático", "History": "História", "General": "Geral"}
+
+def traduzir_genero(genero_ingles):
+    if not genero_ingles: return "Geral"
+    return TRADUCAO_GENEROS.get(genero_ingles, genero_ingles)
+
+def registrar_inseridos(registros):
+    # Repassa livros recém-gravados ao cache do catálogo e à faceta de gêneros
+    catalogo.inserir(registros)
+    for reg in registros or []:
+        generos.registrar(reg.get('genero'), volumes=int(reg.get('quantidade') or 0))
+
+def get_generos_dinamicos():
+    try:
+        lista_final = list(set(GENEROS_BASE + generos.nomes()))
+        lista_final = [g for g in lista_final if g]; lista_final.sort(); lista_final.append("➕ CADASTRAR NOVO GÊNERO")
+        return lista_final
+    except: return GENEROS_BASE + ["➕ CADASTRAR NOVO GÊNERO"]
+
+@st.cache_data(ttl=300)
+def total_livros():
+    return contar(supabase, "livros_acervo")
+
+def busca_local():
+    # Catálogos até LIMITE_BUSCA_LOCAL são buscados no índice em memória; acima disso, direto no banco
+    return total_livros() <= LIMITE_BUSCA_LOCAL
+
+def cursor_atual(chave, termo):
+    # Pilha de cursores (keyset em id) por lista; volta à 1ª página quando o termo muda
+    estado = st.session_state.setdefault(f"pag_{chave}", {"termo": termo, "pilha": [None]})
+    if estado["termo"] != termo:
+        estado.update(termo=termo, pilha=[None])
+    return estado["pilha"][-1]
+
+def controles_pagina(chave, proximo):
+    pilha = st.session_state[f"pag_{chave}"]["pilha"]
+    c_ant, c_prox, c_info = st.columns([1, 1, 2])
+    if len(pilha) > 1 and c_ant.button("◀ Anterior", key=f"ant_{chave}"):
+        pilha.pop(); st.rerun()
+    if proximo is not None and c_prox.button("Próxima ▶", key=f"prox_{chave}"):
+        pilha.append(proximo); st.rerun()
+    c_info.caption(f"Página {len(pilha)}")
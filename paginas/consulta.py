@@ -0,0 +1,28 @@
+"""Consulta do acervo (todos os perfis)."""
+import streamlit as st
+
+from acervo.paginacao import COLUNAS_LIVROS, como_df, pagina_livros
+from paginas.comum import busca_local, catalogo, controles_pagina, cursor_atual, generos, indice, supabase
+
+# =================================================================
+# ABA: CONSULTA
+# =================================================================
+def exibir():
+    st.header("🔍 Pesquisa de Títulos")
+    termo = st.text_input("Busque por Título, Autor ou Gênero:")
+    contagens = generos.contagens()
+    gen_sel = st.multiselect("Filtrar por gênero:", sorted(contagens, key=lambda g: -contagens[g][0]),
+                             format_func=lambda g: f"{g} ({contagens[g][0]})")
+    proximo = None
+    if termo and busca_local():
+        df_res = indice.filtrar(catalogo, termo, campos=["titulo", "autor", "genero"])
+        if gen_sel: df_res = df_res[df_res['genero'].isin(gen_sel)]
+    else:
+        linhas, proximo = pagina_livros(supabase, termo, cursor_atual("consulta", (termo, tuple(gen_sel))),
+                                        campos_busca=("titulo", "autor", "genero"), generos=gen_sel)
+        df_res = como_df(linhas, COLUNAS_LIVROS)
+    if not df_res.empty:
+        st.dataframe(df_res[['titulo', 'autor', 'genero', 'quantidade']], use_container_width=True)
+        if not (termo and busca_local()): controles_pagina("consulta", proximo)
+    elif termo or gen_sel: st.info("Nenhum título encontrado.")
+    else: st.info("O acervo está vazio.")
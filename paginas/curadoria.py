@@ -0,0 +1,42 @@
+"""Curadoria por IA dos registros com autor/sinopse pendentes (Diretor)."""
+import pandas as pd
+import streamlit as st
+
+from acervo import curadoria
+from paginas.comum import catalogo, generos, obter_cache_metadados, supabase
+
+cache_meta = obter_cache_metadados()
+
+# =================================================================
+# ABA: CURADORIA INTELIGENTE (IA - MANTIDA)
+# =================================================================
+def exibir():
+    st.header("🪄 Inteligência Artificial")
+    api_k = st.text_input("Insira sua Gemini API Key:", type="password")
+    if api_k:
+        res = supabase.table("livros_acervo").select("*").or_("autor.eq.Pendente,sinopse.eq.Pendente").execute()
+        df_p = pd.DataFrame(res.data)
+        if not df_p.empty:
+            st.warning(f"Existem {len(df_p)} registros com dados pendentes.")
+            checkpoint = curadoria.Checkpoint()
+            ja_feitos = sum(1 for i in df_p['id'] if int(i) in checkpoint.feitos)
+            if ja_feitos:
+                st.info(f"♻️ Execução anterior interrompida: {ja_feitos} registros já processados serão pulados.")
+            if st.button("✨ Iniciar Correção via IA"):
+                prog = st.progress(0.0, text="Consultando Google Books e Gemini...")
+
+                def ao_gravar(registros):
+                    for r in registros:
+                        catalogo.atualizar(r['id'], {"autor": r['autor'], "sinopse": r['sinopse'], "genero": r['genero']})
+                    generos.invalidar()
+
+                try:
+                    curadoria.executar(
+                        supabase, df_p.to_dict("records"), api_k, st.secrets["google"]["books_api_key"],
+                        checkpoint=checkpoint, ao_gravar=ao_gravar, cache_meta=cache_meta,
+                        progresso=lambda feitos, total: prog.progress(feitos / total, text=f"{feitos}/{total} registros processados"))
+                except curadoria.FalhaCuradoria as e:
+                    st.error(f"⚠️ {e}")
+                else:
+                    st.success("Curadoria concluída!"); st.rerun()
+        else: st.success("Banco de dados 100% completo!")
@@ -0,0 +1,63 @@
+"""Diagnóstico de desempenho e estado da réplica local (Diretor)."""
+import time
+
+import pandas as pd
+import streamlit as st
+
+from paginas.comum import metricas, replica
+
+# =================================================================
+# ABA: DIAGNÓSTICO DE DESEMPENHO (DIRETOR)
+# =================================================================
+def exibir():
+    st.header("🩺 Diagnóstico de Desempenho")
+    rerun_ant = st.session_state.get("rerun_anterior")
+    regs_ant = pd.DataFrame(metricas.registros(rerun_ant)) if rerun_ant else pd.DataFrame()
+
+    st.write("### ⏱️ Última execução desta sessão")
+    if regs_ant.empty: st.info("Navegue por outra aba e volte para ver o detalhamento.")
+    else:
+        chamadas = regs_ant[regs_ant['tipo'] != "rerun"]
+        total_rerun = regs_ant.loc[regs_ant['tipo'] == "rerun", 'ms'].sum()
+        c_t, c_n, c_b = st.columns(3)
+        c_t.metric("Tempo total", f"{total_rerun:.0f} ms" if total_rerun else "—")
+        c_n.metric("Chamadas externas", len(chamadas))
+        c_b.metric("Payload", f"{chamadas['bytes'].fillna(0).sum() / 1024:.1f} KB")
+        st.caption(f"Aba: {regs_ant['aba'].dropna().iloc[0] if regs_ant['aba'].notna().any() else '-'}")
+        st.dataframe(chamadas[['tipo', 'alvo', 'ms', 'linhas', 'bytes', 'erro']], hide_index=True, use_container_width=True)
+
+    regs = pd.DataFrame(metricas.registros())
+    if not regs.empty:
+        st.write("### 🗂️ Por aba")
+        por_aba = regs[regs['tipo'] != "rerun"].groupby(regs['aba'].fillna("(segundo plano)")).agg(
+            chamadas=('ms', 'size'), ms_total=('ms', 'sum'), linhas=('linhas', 'sum'), bytes=('bytes', 'sum'))
+        reruns = regs[regs['tipo'] == "rerun"].groupby('alvo')['ms'].agg(['count', 'median'])
+        por_aba = por_aba.join(reruns.rename(columns={"count": "reruns", "median": "rerun_p50_ms"}))
+        st.dataframe(por_aba.round(1), use_container_width=True)
+
+    st.write("### 📈 Latência por alvo (janela móvel)")
+    st.dataframe(pd.DataFrame(metricas.percentis()), hide_index=True, use_container_width=True)
+
+    if replica:
+        st.write("### 🔄 Réplica local")
+        est = replica.estado()
+        c_on, c_fila, c_conf = st.columns(3)
+        c_on.metric("Conexão", "Online" if est["online"] else "Offline")
+        c_fila.metric("Na fila", est["pendentes"])
+        c_conf.metric("Conflitos", est["conflitos"])
+        if est["ultima_sincronia"]:
+            st.caption(f"Última sincronização: {time.strftime('%d/%m/%Y %H:%M:%S', time.localtime(est['ultima_sincronia']))}")
+        if st.button("🔄 Sincronizar agora"):
+            mudancas = replica.ciclo()
+            st.success(f"Baixadas: {mudancas}" if mudancas else "Nada novo no banco.")
+        for conf in replica.conflitos():
+            c_txt, c_btn = st.columns([4, 1])
+            c_txt.warning(f"**{conf['operacao']}** em {time.strftime('%d/%m %H:%M', time.localtime(conf['criado_em']))}: {conf['erro']}")
+            if c_btn.button("Descartar", key=f"conf_{conf['id']}"):
+                replica.descartar(conf['id']); st.rerun()
+
+    c_exp, c_limpa = st.columns(2)
+    c_exp.download_button("📥 Exportar JSON-lines", metricas.exportar_jsonl(), "diagnostico_acervo.jsonl", mime="application/x-ndjson")
+    if c_limpa.button("🧹 Limpar métricas"):
+        metricas.limpar(); st.rerun()
+    if metricas.arquivo_jsonl: st.caption(f"Gravando também em: {metricas.arquivo_jsonl}")
@@ -0,0 +1,171 @@
+"""Entrada de livros: por ISBN, cadastro manual e leitura de estantes em lote."""
+import time
+import uuid
+
+import pandas as pd
+import streamlit as st
+
+from acervo import circulacao, datas, importacao, leitor, metadados
+from paginas.comum import (catalogo, duplicatas, get_generos_dinamicos, obter_cache_metadados, registrar_inseridos,
+                           supabase, traduzir_genero)
+
+cache_meta = obter_cache_metadados()
+
+# =================================================================
+# ABA: ENTRADA DE LIVROS (INCREMENTO COM CONFIRMAÇÃO)
+# =================================================================
+def exibir():
+    st.header("🚚 Registro de Novos Volumes")
+    tab_isbn, tab_manual, tab_lote = st.tabs(["🔍 Por Código ISBN", "✍️ Cadastro Manual", "📷 Leitura em Lote"])
+
+    with tab_isbn:
+        st.info("Insira o ISBN para busca automática.")
+        isbn_input = st.text_input("Digite o ISBN:", key=f"isb_in_{st.session_state.reset_count}")
+        if isbn_input:
+            isbn_limpo = str(isbn_input).strip()
+            res_check = supabase.table("livros_acervo").select("*").eq("isbn", isbn_limpo).execute()
+            
+            if res_check.data:
+                item = res_check.data[0]
+                st.warning(f"📢 Título já cadastrado: **{item['titulo']}**")
+                st.write(f"Estoque atual: {item['quantidade']} exemplares.")
+                
+                with st.form("confirm_inc_isbn"):
+                    qtd_add = st.number_input("Quantos novos volumes deseja adicionar?", min_value=1, value=1)
+                    st.write("---")
+                    if st.form_submit_button("✅ Confirmar Adição ao Estoque"):
+                        # Soma no banco (sql/003): o estoque lido acima pode já ter mudado
+                        estoque = circulacao.ajustar_estoque(supabase, {int(item['id']): qtd_add})
+                        circulacao.aplicar_estoque(catalogo, estoque)
+                        if estoque: st.success(f"Estoque atualizado! Agora são {estoque[int(item['id'])]} exemplares.")
+                        else: st.error("Título não encontrado no banco (pode ter sido excluído).")
+                        time.sleep(1.5); st.session_state.reset_count += 1; st.rerun()
+            else:
+                # Busca na API (Google Books), passando pelo cache local de ISBNs
+                with st.spinner("Buscando dados na Web..."):
+                    info = metadados.buscar_isbn(isbn_limpo, st.secrets["google"]["books_api_key"], cache_meta)
+                    dados = metadados.para_livro(info)
+                    dados["genero"] = traduzir_genero(dados["genero"]) if info else "Geral"
+                    
+                    with st.form("form_novo_isbn_confirm"):
+                        st.write("### ✨ Novo Título Detectado")
+                        t_f = st.text_input("Título", dados['titulo'])
+                        a_f = st.text_input("Autor", dados['autor'])
+                        gs = st.selectbox("Gênero", options=get_generos_dinamicos())
+                        gn = st.text_input("Novo Gênero?")
+                        sf = st.text_area("Sinopse", dados['sinopse'], height=100)
+                        q_f = st.number_input("Quantidade inicial", min_value=1, value=1)
+                        if st.form_submit_button("🚀 Confirmar Cadastro Novo"):
+                            gen_final = gn.strip().capitalize() if gs == "➕ CADASTRAR NOVO GÊNERO" else gs
+                            res_ins = supabase.table("livros_acervo").insert({"isbn": isbn_limpo, "titulo": t_f, "autor": a_f, "sinopse": sf, "genero": gen_final, "quantidade": q_f, "data_cadastro": datas.agora_iso()}).execute()
+                            registrar_inseridos(res_ins.data)
+                            st.success("Livro cadastrado com sucesso!"); time.sleep(1.5); st.session_state.reset_count += 1; st.rerun()
+
+    with tab_manual:
+        st.write("### ✍️ Cadastro Manual")
+        m_titulo = st.text_input("Título do Livro *", key="man_t")
+        
+        if m_titulo:
+            # Duplicatas prováveis (sem acentos, artigos e marcas de edição), da mais parecida
+            df_sim = duplicatas.buscar(catalogo, m_titulo.strip(), limite=5)
+            
+            if not df_sim.empty:
+                st.warning(f"⚠️ {len(df_sim)} título(s) parecido(s) já cadastrado(s):")
+                opcoes_sim = {f"{r['titulo']} — {r['autor']} | Estoque: {r['quantidade']} ({r['similaridade']:.0%}, {r['motivo']})": r
+                              for _, r in df_sim.iterrows()}
+                escolha_sim = st.radio("É o mesmo livro?", list(opcoes_sim), key="man_sim")
+                item_s = opcoes_sim[escolha_sim]
+                
+                col_m1, col_m2 = st.columns(2)
+                with col_m1:
+                    if st.button("➕ Somar ao Estoque Existente"):
+                        circulacao.aplicar_estoque(catalogo, circulacao.ajustar_estoque(supabase, {int(item_s['id']): 1}))
+                        st.success("Quantidade incrementada!"); time.sleep(1.5); st.rerun()
+                with col_m2:
+                    st.info("Ou preencha abaixo para cadastrar como um novo registro.")
+
+            with st.form("form_manual_puro_confirm"):
+                m_autor = st.text_input("Autor *", value="Pendente")
+                m_isbn = st.text_input("ISBN (Opcional)")
+                m_gen_sel = st.selectbox("Gênero", options=get_generos_dinamicos())
+                m_gen_novo = st.text_input("Novo Gênero?")
+                m_sinopse = st.text_area("Sinopse", value="Pendente")
+                m_qtd = st.number_input("Quantidade", min_value=1, value=1)
+                
+                if st.form_submit_button("🚀 Confirmar Novo Cadastro Manual"):
+                    gen_f = m_gen_novo.strip().capitalize() if m_gen_sel == "➕ CADASTRAR NOVO GÊNERO" else m_gen_sel
+                    res_ins = supabase.table("livros_acervo").insert({
+                        "isbn": m_isbn if m_isbn else f"M-{int(time.time())}", 
+                        "titulo": m_titulo, "autor": m_autor, "sinopse": m_sinopse, 
+                        "genero": gen_f, "quantidade": m_qtd, "data_cadastro": datas.agora_iso()
+                    }).execute()
+                    registrar_inseridos(res_ins.data)
+                    st.success("Cadastrado com sucesso!"); time.sleep(1.5); st.session_state.reset_count += 1; st.rerun()
+
+    with tab_lote:
+        st.write("### 📷 Leitura de Estante em Lote")
+        if "entrada_lote_ok" in st.session_state:
+            st.success(st.session_state.pop("entrada_lote_ok"))
+        st.info("Envie fotos das contracapas: o código de barras (EAN-13) é lido automaticamente e, se não houver, o ISBN impresso é lido por OCR.")
+        if "fotos_camera" not in st.session_state: st.session_state.fotos_camera = []
+        fotos = st.file_uploader("Fotos dos livros", type=["jpg", "jpeg", "png", "webp"], accept_multiple_files=True, key=f"fotos_{st.session_state.reset_count}")
+        foto_cam = st.camera_input("Ou fotografe agora (cada foto entra no lote)", key=f"cam_{st.session_state.reset_count}")
+        if foto_cam and foto_cam.getvalue() not in st.session_state.fotos_camera:
+            st.session_state.fotos_camera.append(foto_cam.getvalue())
+        imagens = [f.getvalue() for f in (fotos or [])] + st.session_state.fotos_camera
+
+        if imagens and st.button(f"🔎 Ler {len(imagens)} imagem(ns)"):
+            with st.spinner("Decodificando códigos..."):
+                por_imagem, contagem, ips = leitor.processar_lote(imagens)
+            with st.spinner("Consultando o acervo e o Google Books..."):
+                isbns = list(contagem)
+                # Casa com o catálogo em memória pelo ISBN normalizado (hífens e ISBN-10 do acervo incluídos)
+                df_cat = catalogo.df()
+                posicoes = importacao.posicoes_por_isbn(df_cat)
+                existentes = {i: df_cat.iloc[posicoes[importacao.chave_isbn(i)]] for i in isbns if importacao.chave_isbn(i) in posicoes}
+                infos = metadados.prefetch_isbns([i for i in isbns if i not in existentes], st.secrets["google"]["books_api_key"], cache_meta)
+            linhas = []
+            for isbn, qtd in contagem.items():
+                if isbn in existentes:
+                    ex = existentes[isbn]
+                    linhas.append({"isbn": isbn, "situacao": "Já no acervo", "titulo": ex['titulo'], "autor": ex['autor'], "genero": ex['genero'], "sinopse": "", "quantidade": qtd})
+                else:
+                    dados = metadados.para_livro(infos.get(isbn))
+                    dados["genero"] = traduzir_genero(dados["genero"]) if infos.get(isbn) else "Geral"
+                    linhas.append({"isbn": isbn, "situacao": "Novo", **dados, "quantidade": qtd})
+            st.session_state.leitura_lote = {
+                "linhas": linhas, "ids": {i: int(r['id']) for i, r in existentes.items()}, "ips": ips, "chave": uuid.uuid4().hex,
+                "ocr": sum(1 for _, m in por_imagem if m == "ocr"), "sem_leitura": sum(1 for i, _ in por_imagem if not i)}
+
+        leitura = st.session_state.get("leitura_lote")
+        if leitura:
+            c_ips, c_isbn, c_ocr, c_falha = st.columns(4)
+            c_ips.metric("Imagens/s", f"{leitura['ips']:.1f}")
+            c_isbn.metric("ISBNs distintos", len(leitura['linhas']))
+            c_ocr.metric("Lidos por OCR", leitura['ocr'])
+            c_falha.metric("Sem leitura", leitura['sem_leitura'])
+            if leitura['linhas']:
+                ed_lote = st.data_editor(pd.DataFrame(leitura['linhas']), hide_index=True, use_container_width=True,
+                                         disabled=["isbn", "situacao"], column_config={"sinopse": None})
+                if st.button("🚀 Confirmar Entrada do Lote"):
+                    try:
+                        # Estoque dos existentes e cadastro dos novos numa única transação; a chave do lote evita gravar duas vezes
+                        ja = ed_lote[ed_lote['situacao'] == "Já no acervo"]
+                        novos_l = [{"isbn": r['isbn'], "titulo": r['titulo'], "autor": r['autor'], "sinopse": r['sinopse'], "genero": r['genero'],
+                                    "quantidade": int(r['quantidade']), "data_cadastro": datas.agora_iso()}
+                                   for _, r in ed_lote[ed_lote['situacao'] == "Novo"].iterrows()]
+                        feito = circulacao.registrar_entrada(supabase, leitura['chave'],
+                                                             {leitura['ids'][r['isbn']]: r['quantidade'] for _, r in ja.iterrows()}, novos_l)
+                        if feito is None:
+                            catalogo.invalidar()
+                            st.session_state.entrada_lote_ok = "ℹ️ Este lote já tinha sido registrado."
+                        else:
+                            estoque, inseridos = feito
+                            circulacao.aplicar_estoque(catalogo, estoque)
+                            registrar_inseridos(inseridos)
+                            st.session_state.entrada_lote_ok = f"✅ {len(ja)} títulos com estoque somado e {len(novos_l)} novos cadastrados."
+                        del st.session_state.leitura_lote
+                        st.session_state.fotos_camera = []; st.session_state.reset_count += 1; st.rerun()
+                    except Exception as e: st.error(f"Erro ao gravar o lote: {e}")
+            else:
+                st.warning("Nenhum ISBN encontrado nas imagens.")
@@ -0,0 +1,66 @@
+"""Painel de estatísticas de circulação (Diretor), lido dos contadores pré-agregados."""
+import streamlit as st
+
+from acervo.datas import exibir as exibir_data
+from acervo.estatisticas import PainelEstatisticas
+from paginas.comum import supabase
+
+
+@st.cache_resource
+def obter_painel():
+    # Contadores de sql/008, guardados por 2 min, com snapshot Parquet diário para quando estiver offline
+    return PainelEstatisticas(supabase)
+
+# =================================================================
+# ABA: ESTATÍSTICAS DE CIRCULAÇÃO (DIRETOR)
+# =================================================================
+def exibir():
+    st.header("📊 Estatísticas de Circulação")
+    painel = obter_painel()
+    if st.button("🔄 Atualizar"): painel.invalidar()
+    try:
+        dados, origem = painel.dados()
+    except Exception as e:
+        st.error(f"❌ Estatísticas indisponíveis (rode sql/008_estatisticas.sql no Supabase): {e}")
+        return
+    if origem: st.warning(f"📴 Sem conexão: exibindo o snapshot de {exibir_data(origem)}.")
+
+    resumo = dados["resumo"].iloc[0]
+    dias = int(resumo["dias_parado"])
+    c_e, c_d, c_a, c_p = st.columns(4)
+    c_e.metric("Empréstimos", int(resumo["emprestimos"]))
+    c_d.metric("Devoluções", int(resumo["devolucoes"]))
+    c_a.metric("Em aberto", int(resumo.get("em_aberto", resumo["emprestimos"] - resumo["devolucoes"])))
+    c_p.metric(f"Parados (+{dias} dias)", int(resumo["parados"]))
+    st.caption(f"Atualizado em {resumo['gerado_em']:%d/%m/%Y %H:%M}")
+
+    tab_mes, tab_gen, tab_turma, tab_top, tab_parados = st.tabs(
+        ["📆 Por Mês", "📚 Por Gênero", "🏫 Por Turma", "🏆 Mais Emprestados", "💤 Parados"])
+    colunas_cont = {"emprestimos": "Empréstimos", "devolucoes": "Devoluções"}
+
+    with tab_mes:
+        df_m = dados["meses"]
+        if df_m.empty: st.info("Nenhum empréstimo registrado ainda.")
+        else:
+            st.caption("ℹ️ Devoluções anteriores à ativação das estatísticas não têm data registrada e contam no mês da "
+                       "devolução prevista: nesses meses, as devoluções são aproximadas.")
+            st.bar_chart(df_m.set_index(df_m["mes"].dt.strftime("%Y-%m"))[["emprestimos", "devolucoes"]].rename(columns=colunas_cont))
+
+    for aba, nome, chave, rotulo in ((tab_gen, "generos", "genero", "Gênero"), (tab_turma, "turmas", "turma", "Turma")):
+        with aba:
+            df_g = dados[nome]
+            if df_g.empty: st.info("Nenhum empréstimo registrado ainda.")
+            else:
+                st.bar_chart(df_g.set_index(chave)["emprestimos"].rename("Empréstimos"), horizontal=True)
+                st.dataframe(df_g.rename(columns={chave: rotulo, **colunas_cont}), hide_index=True, use_container_width=True)
+
+    fmt_uso = {"ultimo_emprestimo": st.column_config.DateColumn("Último empréstimo", format="DD/MM/YYYY"),
+               "emprestimos": "Empréstimos"}
+    with tab_top:
+        st.dataframe(dados["mais_emprestados"].drop(columns=["id"]).head(50), hide_index=True, use_container_width=True,
+                     column_config=fmt_uso)
+
+    with tab_parados:
+        st.write(f"**{int(resumo['parados'])}** título(s) sem empréstimo há mais de {dias} dias (os nunca emprestados primeiro).")
+        st.dataframe(dados["parados"].drop(columns=["id"]).head(50), hide_index=True, use_container_width=True,
+                     column_config=fmt_uso)
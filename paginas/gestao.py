@@ -0,0 +1,164 @@
+"""Gestão do acervo: lista, edição, exportação e importação de planilhas."""
+import time
+from io import BytesIO
+
+import pandas as pd
+import streamlit as st
+
+from acervo import exportacao, importacao, metadados
+from acervo.paginacao import COLUNAS_LIVROS, como_df, pagina_livros
+from paginas.comum import (atualizar_replica, busca_local, catalogo, controles_pagina, cursor_atual, duplicatas,
+                           emprestimos_ativos, generos, indice, obter_cache_metadados, registrar_inseridos, supabase,
+                           supabase_remoto)
+
+cache_meta = obter_cache_metadados()
+
+
+@st.cache_resource
+def obter_exportador():
+    # Arquivos de exportação guardados pela versão do catálogo
+    return exportacao.CacheExportacao()
+
+
+@st.cache_data(show_spinner="Lendo planilha...")
+def ler_planilha_diretor(conteudo):
+    # Cacheado pelo conteúdo do arquivo: os reruns dos botões não releem a planilha
+    return importacao.ler_planilha(BytesIO(conteudo))
+
+# =================================================================
+# ABA: GESTÃO DO ACERVO (PESQUISA, EDIÇÃO E IMPORTAÇÃO)
+# =================================================================
+def exibir():
+    st.header("📊 Painel de Controle")
+    tab_list, tab_import = st.tabs(["📋 Lista e Busca", "📥 Importação Diretor"])
+    
+    with tab_list:
+        st.write("### 🔍 Pesquisar no Acervo")
+        termo = st.text_input("Localizar por Título, Autor ou ISBN:", placeholder="Ex: Machado de Assis...", key="busca_gestao_final")
+        proximo = None
+
+        if termo and busca_local():
+            # Busca no índice em memória (ignora acentos e pequenos erros de digitação)
+            df_display = indice.filtrar(catalogo, termo, campos=["titulo", "autor", "isbn"])
+            st.write(f"✅ {len(df_display)} registros encontrados.")
+        else:
+            # Busca e paginação no banco: só a página exibida é baixada
+            linhas, proximo = pagina_livros(supabase, termo, cursor_atual("gestao", termo), campos_busca=("titulo", "autor", "isbn"))
+            df_display = como_df(linhas, COLUNAS_LIVROS)
+            if termo: st.write(f"✅ {len(df_display)} registros nesta página.")
+            else: st.info("💡 Digite algo acima para filtrar o acervo. Abaixo os mais recentes:")
+
+        if not df_display.empty:
+            st.dataframe(df_display[['titulo', 'autor', 'genero', 'quantidade', 'isbn']], use_container_width=True)
+            if not (termo and busca_local()): controles_pagina("gestao", proximo)
+            
+            # --- BLOCO DE EDIÇÃO E EXCLUSÃO ---
+            with st.expander("📝 Editar ou Excluir Registro Selecionado"):
+                opcoes = df_display.apply(lambda x: f"{x['titulo']} | ID:{x['id']}", axis=1).tolist()
+                livro_sel = st.selectbox("Selecione o livro para modificar:", ["..."] + opcoes)
+                
+                if livro_sel != "...":
+                    id_sel = int(livro_sel.split("| ID:")[1])
+                    res_item = supabase.table("livros_acervo").select("*").eq("id", id_sel).execute().data
+                    if not res_item:  # excluído por outra pessoa depois que a lista foi montada
+                        catalogo.remover(id_sel)
+                        st.warning("⚠️ Este livro não existe mais no acervo. Atualize a busca.")
+                    else:
+                        item = res_item[0]
+                    
+                        with st.form("form_edicao_gestao"):
+                            col_ed1, col_ed2 = st.columns(2)
+                            nt = col_ed1.text_input("Título", item['titulo'])
+                            na = col_ed2.text_input("Autor", item['autor'])
+                            ni = col_ed1.text_input("ISBN", item['isbn'])
+                            ng = col_ed2.text_input("Gênero", item['genero'])
+                            ns = st.text_area("Sinopse", item['sinopse'], height=100)
+                            nq = st.number_input("Estoque Total", value=int(item['quantidade']))
+                        
+                            st.divider()
+                            st.warning("⚠️ **Atenção:** Para excluir, marque a confirmação abaixo.")
+                            confirmar_exc = st.checkbox("Confirmo que desejo apagar este registro permanentemente.")
+                        
+                            btn_salvar, btn_excluir = st.columns(2)
+                        
+                            if btn_salvar.form_submit_button("💾 Salvar Alterações", use_container_width=True):
+                                supabase.table("livros_acervo").update({
+                                    "titulo": nt, "autor": na, "isbn": ni, 
+                                    "genero": ng, "sinopse": ns, "quantidade": nq
+                                }).eq("id", id_sel).execute()
+                                catalogo.atualizar(id_sel, {"titulo": nt, "autor": na, "isbn": ni, "genero": ng, "sinopse": ns, "quantidade": nq})
+                                generos.invalidar(); emprestimos_ativos.invalidar()
+                                st.success("✅ Atualizado com sucesso!")
+                                time.sleep(1); st.rerun()
+                        
+                            if btn_excluir.form_submit_button("🗑️ Excluir Livro", use_container_width=True):
+                                if confirmar_exc:
+                                    supabase.table("livros_acervo").delete().eq("id", id_sel).execute()
+                                    catalogo.remover(id_sel); generos.invalidar()
+                                    st.success("🗑️ Registro removido!"); time.sleep(1); st.rerun()
+                                else:
+                                    st.error("❌ Marque a caixa de confirmação para excluir.")
+
+            # --- EXPORTAÇÃO (EXCEL POR GÊNERO, CSV OU PARQUET) ---
+            formatos = [f for f in exportacao.FORMATOS if f != "parquet" or exportacao.parquet_disponivel()]
+            fmt = st.radio("Formato da exportação:", formatos, format_func=lambda f: exportacao.FORMATOS[f][0], horizontal=True)
+            if st.button("📥 Gerar Arquivo do Acervo"):
+                rotulo, nome_arq, mime = exportacao.FORMATOS[fmt]
+                with st.spinner("Gerando arquivo..."):
+                    conteudo = obter_exportador().obter(catalogo, fmt)  # instantâneo se o acervo não mudou
+                st.download_button(f"Baixar {rotulo}", conteudo, nome_arq, mime=mime)
+
+    with tab_import:
+        if st.session_state.perfil != "Diretor":
+            st.warning("⚠️ Acesso restrito ao Diretor para importação de planilhas.")
+        else:
+            st.subheader("📥 Importação em Massa (Diretor)")
+            st.info("O arquivo deve ser um Excel (.xlsx) contendo a aba 'livros escaneados'.")
+            
+            f_diretor = st.file_uploader("Selecione a planilha Excel", type=['xlsx'])
+            
+            if f_diretor:
+                try:
+                    df_up = ler_planilha_diretor(f_diretor.getvalue())
+                    # Duplicatas prováveis (ISBN, título/autor normalizados, MinHash), em lote
+                    novos, conflitos = importacao.preparar(df_up, catalogo.df(),
+                                                           parecidos=lambda regs: duplicatas.parecidos_varios(catalogo, regs))
+
+                    completar = st.checkbox("Completar autor/sinopse pendentes pelo ISBN (Google Books)", value=len(novos) <= 500)
+
+                    def importar(registros):
+                        if completar:
+                            with st.spinner("Consultando ISBNs no Google Books..."):
+                                metadados.completar_registros(registros, st.secrets["google"]["books_api_key"], cache_meta)
+                        barra_p = st.progress(0.0, text="Gravando lotes...")
+                        try:
+                            # Direto no banco: com a réplica, o insert iria para a fila e nunca falharia aqui
+                            inseridos = importacao.inserir_em_lotes(
+                                supabase_remoto, registros,
+                                progresso=lambda feitos, total: barra_p.progress(feitos / total, text=f"{feitos}/{total} gravados"))
+                        except RuntimeError:
+                            catalogo.invalidar()  # parte dos lotes pode ter sido gravada
+                            raise
+                        finally:
+                            atualizar_replica("livros_acervo")
+                        registrar_inseridos(inseridos)
+                    
+                    if novos:
+                        st.success(f"✨ {len(novos)} novos livros detectados.")
+                        if st.button("🚀 Confirmar Importação dos Novos"):
+                            importar(novos)
+                            st.success("Importado!"); time.sleep(1); st.rerun()
+                    
+                    if conflitos:
+                        st.warning(f"⚠️ {len(conflitos)} registros já existem (duplicatas prováveis).")
+                        with st.expander("Ver livros ignorados"):
+                            st.dataframe(pd.DataFrame(conflitos)[['titulo', 'isbn', 'duplicata_de', 'similaridade', 'motivo']]
+                                         .sort_values('similaridade'),
+                                         column_config={"duplicata_de": "Já cadastrado como",
+                                                        "similaridade": st.column_config.ProgressColumn("Similaridade", format="%.2f", min_value=0, max_value=1)})
+                        if st.button("➕ Forçar Importação de Duplicados"):
+                            importar(importacao.sem_anotacoes(conflitos))
+                            st.success("Importação forçada concluída!"); time.sleep(1); st.rerun()
+
+                except Exception as e:
+                    st.error(f"❌ Erro ao processar: {e}")
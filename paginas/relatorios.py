@@ -0,0 +1,42 @@
+"""Relatórios de circulação, com os filtros de data rodando no banco."""
+import pandas as pd
+import streamlit as st
+
+from acervo import relatorios
+from paginas.comum import supabase
+
+# =================================================================
+# ABA: RELATÓRIOS DE CIRCULAÇÃO (FILTROS POR DATA NO BANCO)
+# =================================================================
+def exibir():
+    st.header("📅 Relatórios de Circulação")
+    tab_atraso, tab_periodo, tab_cadastro = st.tabs(["⏰ Atrasados", "🔄 Empréstimos no Período", "🆕 Cadastrados no Período"])
+    fmt_data = {c: st.column_config.DateColumn(format="DD/MM/YYYY") for c in ["data_saida", "data_retorno_prevista"]}
+
+    with tab_atraso:
+        df_r, total = relatorios.atrasados(supabase)
+        if df_r.empty: st.success("Nenhum empréstimo em atraso! 🎉")
+        else:
+            st.warning(f"⚠️ {total} empréstimo(s) em atraso.")
+            st.dataframe(df_r.drop(columns=["id"]), hide_index=True, use_container_width=True, column_config=fmt_data)
+
+    hoje = pd.Timestamp.today().date()
+    with tab_periodo:
+        c_ini, c_fim, c_st = st.columns(3)
+        ini = c_ini.date_input("De", hoje.replace(day=1), format="DD/MM/YYYY", key="rel_ini")
+        fim = c_fim.date_input("Até", hoje, format="DD/MM/YYYY", key="rel_fim")
+        status = c_st.selectbox("Situação", ["Todos", "Ativo", "Devolvido"])
+        df_r, total = relatorios.circulacao_periodo(supabase, ini, fim, None if status == "Todos" else status)
+        st.write(f"**{total}** empréstimo(s) no período.")
+        if not df_r.empty:
+            st.dataframe(df_r.drop(columns=["id"]), hide_index=True, use_container_width=True, column_config=fmt_data)
+
+    with tab_cadastro:
+        c_ini, c_fim = st.columns(2)
+        ini = c_ini.date_input("De", hoje.replace(day=1), format="DD/MM/YYYY", key="cad_ini")
+        fim = c_fim.date_input("Até", hoje, format="DD/MM/YYYY", key="cad_fim")
+        df_r, total = relatorios.cadastrados_periodo(supabase, ini, fim)
+        st.write(f"**{total}** título(s) cadastrado(s) no período.")
+        if not df_r.empty:
+            st.dataframe(df_r.drop(columns=["id"]), hide_index=True, use_container_width=True,
+                         column_config={"data_cadastro": st.column_config.DatetimeColumn(format="DD/MM/YYYY HH:mm")})
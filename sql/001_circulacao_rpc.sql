@@ -0,0 +1,77 @@
+-- =================================================================
+-- Empréstimos e devoluções atômicos, com baixa/retorno de estoque no banco.
+-- Executar uma vez no SQL Editor do Supabase.
+-- =================================================================
+
+-- itens: [{"id_livro": 1, "id_usuario": 2, "data_saida": "18/10/2026", "data_retorno_prevista": "02/11/2026"}, ...]
+-- Tudo ou nada: se algum livro não tiver estoque suficiente, nenhum empréstimo é gravado.
+create or replace function registrar_emprestimos(itens jsonb)
+returns table (id_livro bigint, quantidade integer)
+language plpgsql
+as $$
+#variable_conflict use_column
+declare
+    falta text;
+begin
+    -- Trava as linhas dos livros envolvidos até o fim da transação
+    perform 1 from livros_acervo l
+    where l.id in (select (i->>'id_livro')::bigint from jsonb_array_elements(itens) i)
+    for update;
+
+    -- Confere o estoque de uma vez
+    with pedido as (
+        select (i->>'id_livro')::bigint as id_livro, count(*) as n
+        from jsonb_array_elements(itens) i
+        group by 1
+    )
+    select string_agg(l.titulo, ', ') into falta
+    from pedido p
+    join livros_acervo l on l.id = p.id_livro
+    where l.quantidade < p.n;
+
+    if falta is not null then
+        raise exception 'Estoque insuficiente: %', falta;
+    end if;
+
+    insert into emprestimos (id_livro, id_usuario, data_saida, data_retorno_prevista, status)
+    select (i->>'id_livro')::bigint, (i->>'id_usuario')::bigint,
+           i->>'data_saida', i->>'data_retorno_prevista', 'Ativo'
+    from jsonb_array_elements(itens) i;
+
+    return query
+    update livros_acervo l
+    set quantidade = l.quantidade - p.n
+    from (
+        select (i->>'id_livro')::bigint as id_livro, count(*)::integer as n
+        from jsonb_array_elements(itens) i
+        group by 1
+    ) p
+    where l.id = p.id_livro
+    returning l.id::bigint, l.quantidade::integer;
+end;
+$$;
+
+-- Marca os empréstimos como devolvidos e devolve o estoque em uma única transação.
+-- Empréstimos que já não estão ativos são ignorados (evita somar estoque duas vezes).
+create or replace function registrar_devolucoes(ids_emprestimo bigint[])
+returns table (id_livro bigint, quantidade integer)
+language plpgsql
+as $$
+#variable_conflict use_column
+begin
+    return query
+    with devolvidos as (
+        update emprestimos e
+        set status = 'Devolvido'
+        where e.id = any(ids_emprestimo) and e.status = 'Ativo'
+        returning e.id_livro
+    ), por_livro as (
+        select d.id_livro, count(*)::integer as n from devolvidos d group by 1
+    )
+    update livros_acervo l
+    set quantidade = l.quantidade + p.n
+    from por_livro p
+    where l.id = p.id_livro
+    returning l.id::bigint, l.quantidade::integer;
+end;
+$$;
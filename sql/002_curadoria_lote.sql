@@ -0,0 +1,15 @@
+-- =================================================================
+-- Gravação em lote dos dados completados pela Curadoria Inteligente.
+-- Executar uma vez no SQL Editor do Supabase.
+-- =================================================================
+
+-- itens: [{"id": 1, "autor": "...", "sinopse": "...", "genero": "..."}, ...]
+create or replace function atualizar_livros_lote(itens jsonb)
+returns void
+language sql
+as $$
+    update livros_acervo l
+    set autor = i.autor, sinopse = i.sinopse, genero = i.genero
+    from jsonb_to_recordset(itens) as i(id bigint, autor text, sinopse text, genero text)
+    where l.id = i.id;
+$$;
@@ -0,0 +1,21 @@
+-- =================================================================
+-- Ajuste de estoque somado no banco (Entrada: exemplares a mais de um
+-- título já cadastrado), sem ler-modificar-escrever no app.
+-- Executar uma vez no SQL Editor do Supabase.
+-- =================================================================
+
+-- itens: [{"id_livro": 1, "delta": 3}, ...]
+create or replace function ajustar_estoque(itens jsonb)
+returns table (id_livro bigint, quantidade integer)
+language sql
+as $$
+    update livros_acervo l
+    set quantidade = l.quantidade + i.delta
+    from (
+        select x.id_livro, sum(x.delta)::integer as delta
+        from jsonb_to_recordset(itens) as x(id_livro bigint, delta integer)
+        group by x.id_livro
+    ) i
+    where l.id = i.id_livro
+    returning l.id::bigint, l.quantidade::integer;
+$$;
@@ -0,0 +1,12 @@
+-- =================================================================
+-- Faceta de gêneros: contagem agrupada no banco, em vez de baixar a coluna.
+-- Executar uma vez no SQL Editor do Supabase.
+-- =================================================================
+
+create index if not exists livros_acervo_genero_idx on livros_acervo (genero);
+
+create or replace view generos_contagem as
+select genero, count(*)::integer as titulos, coalesce(sum(quantidade), 0)::integer as volumes
+from livros_acervo
+where genero is not null and genero <> ''
+group by genero;
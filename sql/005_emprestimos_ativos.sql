@@ -0,0 +1,16 @@
+-- =================================================================
+-- Empréstimos ativos já com título e nome, para a aba Devolver.
+-- Executar uma vez no SQL Editor do Supabase.
+-- =================================================================
+
+create index if not exists emprestimos_status_idx on emprestimos (status);
+create index if not exists emprestimos_id_livro_idx on emprestimos (id_livro);
+create index if not exists emprestimos_id_usuario_idx on emprestimos (id_usuario);
+
+create or replace view emprestimos_ativos as
+select e.id, e.id_livro, e.id_usuario, e.data_saida, e.data_retorno_prevista,
+       l.titulo, u.nome, u.turma
+from emprestimos e
+join livros_acervo l on l.id = e.id_livro
+join usuarios u on u.id = e.id_usuario
+where e.status = 'Ativo';
@@ -0,0 +1,113 @@
+-- =================================================================
+-- Datas como tipos de verdade (antes eram texto '%d/%m/%Y').
+-- Converte as linhas existentes (backfill), cria índices por data e
+-- refaz a view e a função que dependem dessas colunas.
+-- Executar uma vez no SQL Editor do Supabase, depois dos scripts 001 a 005.
+-- =================================================================
+
+begin;
+
+drop view if exists emprestimos_ativos;
+
+-- Aceita 'dd/mm/aaaa', 'dd/mm/aaaa hh:mi' e ISO; qualquer outra coisa vira null.
+-- Em plpgsql para capturar datas impossíveis ('31/02/2024', '2024-13-01'): to_date
+-- e o cast levantam erro, que abortaria o alter table inteiro.
+create or replace function pg_temp.texto_para_data(v text) returns date language plpgsql stable as $$
+begin
+    return case
+        when v ~ '^\d{2}/\d{2}/\d{4}' then to_date(substr(v, 1, 10), 'DD/MM/YYYY')
+        when v ~ '^\d{4}-\d{2}-\d{2}' then substr(v, 1, 10)::date
+    end;
+exception when others then
+    return null;
+end;
+$$;
+
+create or replace function pg_temp.texto_para_timestamp(v text) returns timestamptz language plpgsql stable as $$
+begin
+    return case
+        when v ~ '^\d{2}/\d{2}/\d{4} \d{2}:\d{2}' then to_timestamp(substr(v, 1, 16), 'DD/MM/YYYY HH24:MI')::timestamp at time zone 'America/Sao_Paulo'
+        when v ~ '^\d{2}/\d{2}/\d{4}' then to_date(substr(v, 1, 10), 'DD/MM/YYYY')::timestamp at time zone 'America/Sao_Paulo'
+        when v ~ '^\d{4}-\d{2}-\d{2}' then v::timestamptz
+    end;
+exception when others then
+    return null;
+end;
+$$;
+
+alter table emprestimos
+    alter column data_saida type date using pg_temp.texto_para_data(data_saida),
+    alter column data_saida set default current_date,
+    alter column data_retorno_prevista type date using pg_temp.texto_para_data(data_retorno_prevista);
+
+alter table livros_acervo
+    alter column data_cadastro type timestamptz using pg_temp.texto_para_timestamp(data_cadastro),
+    alter column data_cadastro set default now();
+
+create index if not exists emprestimos_ativos_prevista_idx on emprestimos (data_retorno_prevista) where status = 'Ativo';
+create index if not exists emprestimos_data_saida_idx on emprestimos (data_saida);
+create index if not exists livros_acervo_data_cadastro_idx on livros_acervo (data_cadastro);
+
+create or replace view emprestimos_ativos as
+select e.id, e.id_livro, e.id_usuario, e.data_saida, e.data_retorno_prevista,
+       greatest(current_date - e.data_retorno_prevista, 0) as dias_atraso,
+       l.titulo, u.nome, u.turma
+from emprestimos e
+join livros_acervo l on l.id = e.id_livro
+join usuarios u on u.id = e.id_usuario
+where e.status = 'Ativo';
+
+-- Todos os empréstimos (qualquer status), para o relatório de circulação
+create or replace view emprestimos_detalhados as
+select e.id, e.id_livro, e.id_usuario, e.data_saida, e.data_retorno_prevista, e.status,
+       l.titulo, l.genero, u.nome, u.turma
+from emprestimos e
+join livros_acervo l on l.id = e.id_livro
+join usuarios u on u.id = e.id_usuario;
+
+-- Datas agora chegam em ISO ('aaaa-mm-dd'); data_saida assume hoje se omitida
+create or replace function registrar_emprestimos(itens jsonb)
+returns table (id_livro bigint, quantidade integer)
+language plpgsql
+as $$
+#variable_conflict use_column
+declare
+    falta text;
+begin
+    perform 1 from livros_acervo l
+    where l.id in (select (i->>'id_livro')::bigint from jsonb_array_elements(itens) i)
+    for update;
+
+    with pedido as (
+        select (i->>'id_livro')::bigint as id_livro, count(*) as n
+        from jsonb_array_elements(itens) i
+        group by 1
+    )
+    select string_agg(l.titulo, ', ') into falta
+    from pedido p
+    join livros_acervo l on l.id = p.id_livro
+    where l.quantidade < p.n;
+
+    if falta is not null then
+        raise exception 'Estoque insuficiente: %', falta;
+    end if;
+
+    insert into emprestimos (id_livro, id_usuario, data_saida, data_retorno_prevista, status)
+    select (i->>'id_livro')::bigint, (i->>'id_usuario')::bigint,
+           coalesce((i->>'data_saida')::date, current_date), (i->>'data_retorno_prevista')::date, 'Ativo'
+    from jsonb_array_elements(itens) i;
+
+    return query
+    update livros_acervo l
+    set quantidade = l.quantidade - p.n
+    from (
+        select (i->>'id_livro')::bigint as id_livro, count(*)::integer as n
+        from jsonb_array_elements(itens) i
+        group by 1
+    ) p
+    where l.id = p.id_livro
+    returning l.id::bigint, l.quantidade::integer;
+end;
+$$;
+
+commit;
@@ -0,0 +1,70 @@
+-- =================================================================
+-- Réplica local (acervo/replica.py): versão crescente em cada linha e
+-- registro das exclusões, para o app baixar só o que mudou.
+-- Executar uma vez no SQL Editor do Supabase.
+-- =================================================================
+
+create sequence if not exists replica_versao;
+
+alter table livros_acervo add column if not exists versao bigint;
+alter table usuarios add column if not exists versao bigint;
+alter table emprestimos add column if not exists versao bigint;
+
+-- Backfill: cada linha existente recebe uma versão distinta
+update livros_acervo set versao = nextval('replica_versao') where versao is null;
+update usuarios set versao = nextval('replica_versao') where versao is null;
+update emprestimos set versao = nextval('replica_versao') where versao is null;
+
+alter table livros_acervo alter column versao set default nextval('replica_versao'), alter column versao set not null;
+alter table usuarios alter column versao set default nextval('replica_versao'), alter column versao set not null;
+alter table emprestimos alter column versao set default nextval('replica_versao'), alter column versao set not null;
+
+create index if not exists livros_acervo_versao_idx on livros_acervo (versao);
+create index if not exists usuarios_versao_idx on usuarios (versao);
+create index if not exists emprestimos_versao_idx on emprestimos (versao);
+
+-- Toda gravação (inclusive pelas funções de circulação e estoque) ganha nova versão
+create or replace function tocar_versao() returns trigger
+language plpgsql
+as $$
+begin
+    new.versao := nextval('replica_versao');
+    return new;
+end;
+$$;
+
+drop trigger if exists livros_acervo_versao on livros_acervo;
+create trigger livros_acervo_versao before insert or update on livros_acervo
+    for each row execute function tocar_versao();
+drop trigger if exists usuarios_versao on usuarios;
+create trigger usuarios_versao before insert or update on usuarios
+    for each row execute function tocar_versao();
+drop trigger if exists emprestimos_versao on emprestimos;
+create trigger emprestimos_versao before insert or update on emprestimos
+    for each row execute function tocar_versao();
+
+-- Exclusões: a réplica apaga localmente o que aparecer aqui
+create table if not exists replica_remocoes (
+    versao bigint primary key default nextval('replica_versao'),
+    tabela text not null,
+    id_registro bigint not null
+);
+
+create or replace function registrar_remocao() returns trigger
+language plpgsql
+as $$
+begin
+    insert into replica_remocoes (tabela, id_registro) values (tg_table_name, old.id);
+    return old;
+end;
+$$;
+
+drop trigger if exists livros_acervo_remocao on livros_acervo;
+create trigger livros_acervo_remocao after delete on livros_acervo
+    for each row execute function registrar_remocao();
+drop trigger if exists usuarios_remocao on usuarios;
+create trigger usuarios_remocao after delete on usuarios
+    for each row execute function registrar_remocao();
+drop trigger if exists emprestimos_remocao on emprestimos;
+create trigger emprestimos_remocao after delete on emprestimos
+    for each row execute function registrar_remocao();
@@ -0,0 +1,159 @@
+-- =================================================================
+-- Estatísticas de circulação pré-agregadas (acervo/estatisticas.py).
+-- Cada empréstimo/devolução soma nos contadores por livro, gênero,
+-- turma e mês, então o painel lê tabelas pequenas em vez de varrer
+-- todo o histórico de `emprestimos`.
+-- Executar uma vez no SQL Editor do Supabase, depois dos scripts 001 a 007.
+-- =================================================================
+
+begin;
+
+create table if not exists estat_livros (
+    id_livro bigint primary key references livros_acervo (id) on delete cascade,
+    emprestimos bigint not null default 0,
+    devolucoes bigint not null default 0,
+    ultimo_emprestimo date
+);
+create index if not exists estat_livros_emprestimos_idx on estat_livros (emprestimos desc);
+
+-- Gênero e turma são os do momento do empréstimo
+create table if not exists estat_generos (
+    genero text primary key,
+    emprestimos bigint not null default 0,
+    devolucoes bigint not null default 0
+);
+
+create table if not exists estat_turmas (
+    turma text primary key,
+    emprestimos bigint not null default 0,
+    devolucoes bigint not null default 0
+);
+
+-- Empréstimos contam no mês da saída; devoluções, no mês em que foram registradas
+create table if not exists estat_meses (
+    mes date primary key,
+    emprestimos bigint not null default 0,
+    devolucoes bigint not null default 0
+);
+
+-- Soma os deltas de um conjunto de movimentos nas quatro tabelas.
+-- movimentos: [{"id_livro", "id_usuario", "mes", "data_saida", "emprestimos", "devolucoes"}, ...]
+create or replace function estat_somar(movimentos jsonb) returns void
+language plpgsql
+as $$
+begin
+    with m as (
+        select * from jsonb_to_recordset(movimentos)
+            as x(id_livro bigint, id_usuario bigint, mes date, data_saida date, emprestimos bigint, devolucoes bigint)
+    )
+    insert into estat_livros as s (id_livro, emprestimos, devolucoes, ultimo_emprestimo)
+    select m.id_livro, sum(m.emprestimos), sum(m.devolucoes), max(m.data_saida) filter (where m.emprestimos > 0)
+    from m join livros_acervo l on l.id = m.id_livro
+    group by 1
+    on conflict (id_livro) do update
+    set emprestimos = s.emprestimos + excluded.emprestimos,
+        devolucoes = s.devolucoes + excluded.devolucoes,
+        ultimo_emprestimo = greatest(s.ultimo_emprestimo, excluded.ultimo_emprestimo);
+
+    with m as (
+        select * from jsonb_to_recordset(movimentos) as x(id_livro bigint, emprestimos bigint, devolucoes bigint)
+    )
+    insert into estat_generos as s (genero, emprestimos, devolucoes)
+    select coalesce(nullif(l.genero, ''), 'Geral'), sum(m.emprestimos), sum(m.devolucoes)
+    from m join livros_acervo l on l.id = m.id_livro
+    group by 1
+    on conflict (genero) do update
+    set emprestimos = s.emprestimos + excluded.emprestimos, devolucoes = s.devolucoes + excluded.devolucoes;
+
+    with m as (
+        select * from jsonb_to_recordset(movimentos) as x(id_usuario bigint, emprestimos bigint, devolucoes bigint)
+    )
+    insert into estat_turmas as s (turma, emprestimos, devolucoes)
+    select coalesce(nullif(trim(u.turma), ''), 'Sem turma'), sum(m.emprestimos), sum(m.devolucoes)
+    from m left join usuarios u on u.id = m.id_usuario
+    group by 1
+    on conflict (turma) do update
+    set emprestimos = s.emprestimos + excluded.emprestimos, devolucoes = s.devolucoes + excluded.devolucoes;
+
+    insert into estat_meses as s (mes, emprestimos, devolucoes)
+    select m.mes, sum(m.emprestimos), sum(m.devolucoes)
+    from jsonb_to_recordset(movimentos) as m(mes date, emprestimos bigint, devolucoes bigint)
+    group by 1
+    on conflict (mes) do update
+    set emprestimos = s.emprestimos + excluded.emprestimos, devolucoes = s.devolucoes + excluded.devolucoes;
+end;
+$$;
+
+-- Triggers por comando (não por linha): um empréstimo de turma inteira
+-- via registrar_emprestimos faz um upsert por tabela, não um por aluno.
+create or replace function estat_emprestimos_inseridos() returns trigger
+language plpgsql
+as $$
+begin
+    perform estat_somar(coalesce((
+        select jsonb_agg(jsonb_build_object(
+            'id_livro', n.id_livro, 'id_usuario', n.id_usuario, 'data_saida', n.data_saida,
+            'mes', date_trunc('month', coalesce(n.data_saida, current_date))::date,
+            'emprestimos', 1, 'devolucoes', (n.status = 'Devolvido')::int))
+        from novos n), '[]'::jsonb));
+    return null;
+end;
+$$;
+
+create or replace function estat_emprestimos_alterados() returns trigger
+language plpgsql
+as $$
+begin
+    -- Ativo -> Devolvido soma uma devolução; a volta (correção manual) desconta
+    perform estat_somar(coalesce((
+        select jsonb_agg(jsonb_build_object(
+            'id_livro', n.id_livro, 'id_usuario', n.id_usuario, 'data_saida', null,
+            'mes', date_trunc('month', current_date)::date, 'emprestimos', 0,
+            'devolucoes', case when n.status = 'Devolvido' then 1 else -1 end))
+        from novos n join antigos a on a.id = n.id
+        where (a.status = 'Devolvido') is distinct from (n.status = 'Devolvido')), '[]'::jsonb));
+    return null;
+end;
+$$;
+
+drop trigger if exists emprestimos_estat_insert on emprestimos;
+create trigger emprestimos_estat_insert after insert on emprestimos
+    referencing new table as novos
+    for each statement execute function estat_emprestimos_inseridos();
+drop trigger if exists emprestimos_estat_update on emprestimos;
+create trigger emprestimos_estat_update after update on emprestimos
+    referencing old table as antigos new table as novos
+    for each statement execute function estat_emprestimos_alterados();
+
+-- Refaz tudo a partir do histórico (backfill e reparo). Devoluções antigas
+-- não têm data registrada: contam no mês da data prevista de retorno.
+create or replace function recalcular_estatisticas() returns void
+language plpgsql
+as $$
+begin
+    truncate estat_livros, estat_generos, estat_turmas, estat_meses;
+    perform estat_somar(coalesce((
+        select jsonb_agg(jsonb_build_object(
+            'id_livro', id_livro, 'id_usuario', id_usuario, 'data_saida', data_saida,
+            'mes', date_trunc('month', coalesce(data_saida, current_date))::date,
+            'emprestimos', 1, 'devolucoes', 0))
+        from emprestimos), '[]'::jsonb));
+    perform estat_somar(coalesce((
+        select jsonb_agg(jsonb_build_object(
+            'id_livro', id_livro, 'id_usuario', id_usuario, 'data_saida', null,
+            'mes', date_trunc('month', least(coalesce(data_retorno_prevista, current_date), current_date))::date,
+            'emprestimos', 0, 'devolucoes', 1))
+        from emprestimos where status = 'Devolvido'), '[]'::jsonb));
+end;
+$$;
+
+select recalcular_estatisticas();
+
+-- Uso por título (inclusive os nunca emprestados), para "mais emprestados" e "parados"
+create or replace view estat_uso_livros as
+select l.id, l.titulo, l.autor, l.genero, l.quantidade, l.data_cadastro,
+       coalesce(s.emprestimos, 0) as emprestimos, s.ultimo_emprestimo
+from livros_acervo l
+left join estat_livros s on s.id_livro = l.id;
+
+commit;
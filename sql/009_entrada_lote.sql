@@ -0,0 +1,56 @@
+-- =================================================================
+-- Entrada de estante em lote (Entrada > Leitura em Lote): soma o
+-- estoque dos títulos já cadastrados e cadastra os novos numa única
+-- transação. A chave do lote, gerada pelo app na leitura, torna o
+-- reenvio (ex.: depois de perder a resposta) inofensivo.
+-- Executar uma vez no SQL Editor do Supabase, depois dos scripts 001 a 008.
+-- =================================================================
+
+create table if not exists entradas_lote (
+    chave text primary key,
+    registrado_em timestamptz not null default now()
+);
+
+-- ajustes: [{"id_livro": 1, "delta": 3}, ...]
+-- novos: [{"isbn", "titulo", "autor", "sinopse", "genero", "quantidade", "data_cadastro"}, ...]
+-- Retorna {"estoque": [{"id_livro", "quantidade"}], "inseridos": [linhas]}, ou null se a chave já foi usada
+create or replace function registrar_entrada_lote(chave text, ajustes jsonb, novos jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    estoque jsonb;
+    inseridos jsonb;
+begin
+    insert into entradas_lote (chave) values (registrar_entrada_lote.chave) on conflict do nothing;
+    if not found then
+        return null;
+    end if;
+
+    with i as (
+        select x.id_livro, sum(x.delta)::integer as delta
+        from jsonb_to_recordset(ajustes) as x(id_livro bigint, delta integer)
+        group by x.id_livro
+    ), alterados as (
+        update livros_acervo l
+        set quantidade = l.quantidade + i.delta
+        from i
+        where l.id = i.id_livro
+        returning l.id, l.quantidade
+    )
+    select coalesce(jsonb_agg(jsonb_build_object('id_livro', a.id, 'quantidade', a.quantidade)), '[]'::jsonb)
+    into estoque
+    from alterados a;
+
+    with criados as (
+        insert into livros_acervo (isbn, titulo, autor, sinopse, genero, quantidade, data_cadastro)
+        select n.isbn, n.titulo, n.autor, n.sinopse, n.genero, n.quantidade, n.data_cadastro
+        from jsonb_to_recordset(novos)
+            as n(isbn text, titulo text, autor text, sinopse text, genero text, quantidade integer, data_cadastro timestamptz)
+        returning *
+    )
+    select coalesce(jsonb_agg(to_jsonb(c)), '[]'::jsonb) into inseridos from criados c;
+
+    return jsonb_build_object('estoque', estoque, 'inseridos', inseridos);
+end;
+$$;
@@ -0,0 +1,69 @@
+-- =================================================================
+-- Escritas da réplica local (acervo/replica.py) com reenvio seguro.
+-- Cada empréstimo, devolução, ajuste de estoque e cadastro feito pelo app
+-- leva uma chave; replica_executar grava a chave e o resultado na mesma
+-- transação da operação, e um reenvio com a mesma chave (ex.: depois de
+-- perder a resposta) só devolve o resultado guardado, sem repetir nada.
+-- Executar uma vez no SQL Editor do Supabase, depois dos scripts 001 a 009.
+-- =================================================================
+
+create table if not exists replica_operacoes (
+    chave text primary key,
+    resultado jsonb,
+    registrado_em timestamptz not null default now()
+);
+
+-- operacoes: [{"chave": "...", "nome": "registrar_emprestimos", "params": {"itens": [...]}},
+--             {"chave": "...", "tabela": "usuarios", "linhas": [{"nome": "...", "turma": "..."}]}, ...]
+-- Executa na ordem, numa única transação. Retorna a lista com o resultado de cada
+-- operação, igual ao que a chamada direta devolveria (linhas de estoque ou linhas inseridas).
+create or replace function replica_executar(operacoes jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    op jsonb;
+    linha jsonb;
+    colunas text;
+    criada jsonb;
+    saida jsonb;
+    resultados jsonb := '[]'::jsonb;
+begin
+    for op in select x from jsonb_array_elements(operacoes) as x loop
+        insert into replica_operacoes (chave) values (op->>'chave') on conflict do nothing;
+        if not found then
+            select r.resultado into saida from replica_operacoes r where r.chave = op->>'chave';
+            resultados := resultados || jsonb_build_array(saida);
+            continue;
+        end if;
+
+        if op->>'nome' = 'registrar_emprestimos' then
+            select coalesce(jsonb_agg(to_jsonb(e)), '[]'::jsonb) into saida
+            from registrar_emprestimos(op->'params'->'itens') e;
+        elsif op->>'nome' = 'registrar_devolucoes' then
+            select coalesce(jsonb_agg(to_jsonb(d)), '[]'::jsonb) into saida
+            from registrar_devolucoes(array(
+                select i::bigint from jsonb_array_elements_text(op->'params'->'ids_emprestimo') as i)) d;
+        elsif op->>'nome' = 'ajustar_estoque' then
+            select coalesce(jsonb_agg(to_jsonb(a)), '[]'::jsonb) into saida
+            from ajustar_estoque(op->'params'->'itens') a;
+        elsif op->>'tabela' in ('livros_acervo', 'usuarios', 'emprestimos') then
+            -- Só as colunas enviadas, como no insert do PostgREST: as demais ficam com o default
+            saida := '[]'::jsonb;
+            for linha in select x from jsonb_array_elements(op->'linhas') as x loop
+                select string_agg(quote_ident(k), ', ') into colunas from jsonb_object_keys(linha) as k;
+                execute format('insert into %1$I (%2$s) select %2$s from jsonb_populate_record(null::%1$I, $1) '
+                               'returning to_jsonb(%1$I.*)', op->>'tabela', colunas)
+                    into criada using linha;
+                saida := saida || jsonb_build_array(criada);
+            end loop;
+        else
+            raise exception 'Operação não suportada na fila da réplica: %', coalesce(op->>'nome', op->>'tabela');
+        end if;
+
+        update replica_operacoes r set resultado = saida where r.chave = op->>'chave';
+        resultados := resultados || jsonb_build_array(saida);
+    end loop;
+    return resultados;
+end;
+$$;
@@ -0,0 +1,7 @@
+"""Roda com `python -m pytest` na raiz do repositório; usa o Supabase em memória de bench/cliente_falso."""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ACERVO_DIR_LOCAL", tempfile.mkdtemp(prefix="acervo_testes_"))
@@ -0,0 +1,98 @@
+import pandas as pd
+
+from acervo.busca import IndiceBusca, IndiceCatalogo, normalizar, parece_isbn, tokenizar
+from acervo.catalogo import CatalogoCache
+from bench.cliente_falso import SupabaseFalso
+
+LIVROS = [
+    {"id": 1, "titulo": "Dom Casmurro", "autor": "Machado de Assis", "genero": "Romance", "isbn": "978-85-359-0277-1"},
+    {"id": 2, "titulo": "1984", "autor": "George Orwell", "genero": "Ficção", "isbn": "9788535902772"},
+    {"id": 3, "titulo": "A Hora da Estrela", "autor": "Clarice Lispector", "genero": "Romance", "isbn": "853590277X"},
+    {"id": 4, "titulo": "Memórias Póstumas de Brás Cubas", "autor": "Machado de Assis", "genero": "Romance", "isbn": ""},
+]
+
+
+def _indice():
+    return IndiceBusca.de_dataframe(pd.DataFrame(LIVROS))
+
+
+def test_normalizar_remove_acentos_e_pontuacao():
+    assert normalizar("Memórias Póstumas, de Brás!") == "memorias postumas de bras"
+    assert normalizar(None) == ""
+    assert tokenizar("Ação e Reação") == ["acao", "e", "reacao"]
+
+
+def test_tokenizar_isbn_vira_um_token():
+    assert tokenizar("978-85-359-0277-1", "isbn") == ["9788535902771"]
+    assert tokenizar("978-85-359-0277-1") == ["978", "85", "359", "0277", "1"]
+
+
+def test_parece_isbn():
+    assert parece_isbn("978-85-359-0277-1")
+    assert parece_isbn("9788535902771")
+    assert parece_isbn("85-359-0277-x")
+    assert not parece_isbn("1984")  # pode ser título
+    assert not parece_isbn("dom casmurro")
+
+
+def test_busca_sem_acento_e_com_erro_de_digitacao():
+    indice = _indice()
+    assert indice.buscar("memorias postumas") == [4]
+    assert indice.buscar("casmuro") == [1]
+    assert set(indice.buscar("machado")) == {1, 4}
+
+
+def test_busca_e_exige_todos_os_termos():
+    assert _indice().buscar("machado casmurro") == [1]
+
+
+def test_busca_isbn_com_hifens():
+    assert _indice().buscar("978-85-359-0277-1") == [1]
+
+
+def test_busca_isbn_nao_acha_isbn_vizinho():
+    # 9788535902771 e 9788535902772 diferem em um dígito: sem "parecidos" para números
+    assert _indice().buscar("9788535902771") == [1]
+
+
+def test_busca_isbn_parcial_por_prefixo():
+    assert set(_indice().buscar("978-85-359")) == {1, 2}
+    assert set(_indice().buscar("97885359")) == {1, 2}
+    assert _indice().buscar("85359-0277-x") == [3]
+
+
+def test_numero_sozinho_ainda_busca_titulo():
+    assert _indice().buscar("1984") == [2]
+
+
+def test_busca_restrita_a_campos():
+    indice = _indice()
+    assert indice.buscar("romance", campos=["genero"]) == indice.buscar("romance")
+    assert indice.buscar("romance", campos=["titulo"]) == []
+    assert indice.buscar("978-85-359-0277-1", campos=["titulo"]) == []
+
+
+def test_remover_e_reindexar():
+    indice = _indice()
+    indice.remover(1)
+    assert indice.buscar("casmurro") == []
+    indice.indexar({"id": 1, "titulo": "Dom Casmurro (edição comentada)", "autor": "Machado de Assis",
+                    "genero": "Romance", "isbn": "9788535902771"})
+    assert indice.buscar("comentada") == [1]
+    assert len(indice) == 4
+
+
+def test_filtrar_devolve_linhas_por_relevancia():
+    df = pd.DataFrame(LIVROS)
+    res = _indice().filtrar(df, "machado")
+    assert sorted(res["id"]) == [1, 4]
+    assert list(_indice().filtrar(df, "casmurro machado")["titulo"]) == ["Dom Casmurro"]
+
+
+def test_indice_catalogo_acompanha_escritas_do_cache():
+    catalogo = CatalogoCache(SupabaseFalso({"livros_acervo": [dict(l) for l in LIVROS]}))
+    indice = IndiceCatalogo()
+    assert list(indice.filtrar(catalogo, "estrela")["id"]) == [3]
+    catalogo.inserir([{"id": 10, "titulo": "A Estrela Sobe", "autor": "Marques Rebelo", "genero": "Romance", "isbn": ""}])
+    catalogo.remover(3)
+    assert list(indice.filtrar(catalogo, "estrela")["id"]) == [10]
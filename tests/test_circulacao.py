@@ -0,0 +1,39 @@
+from acervo import circulacao
+from acervo.catalogo import CatalogoCache
+from bench.cliente_falso import SupabaseFalso
+
+
+def _banco():
+    return SupabaseFalso({"livros_acervo": [{"titulo": f"Livro {i}", "quantidade": 3} for i in range(1, 4)]})
+
+
+def test_ajustar_estoque_soma_sobre_o_valor_do_banco():
+    banco = _banco()
+    catalogo = CatalogoCache(banco)
+    catalogo.df()
+    banco.alterar(banco.tabelas["livros_acervo"][1], {"quantidade": 1})  # empréstimo depois da leitura do cache
+    estoque = circulacao.ajustar_estoque(banco, {1: 2, 2: 0})
+    assert estoque == {1: 3}
+    circulacao.aplicar_estoque(catalogo, estoque)
+    assert catalogo.df().set_index("id").loc[1, "quantidade"] == 3
+    assert circulacao.ajustar_estoque(banco, {}) == {}
+
+
+class _SemView(SupabaseFalso):
+    def table(self, nome):
+        if nome == "emprestimos_ativos":
+            raise Exception('relation "public.emprestimos_ativos" does not exist')
+        return super().table(nome)
+
+
+def test_emprestimos_ativos_sem_a_view_junta_no_app():
+    tabelas = {"livros_acervo": [{"titulo": "Livro 1", "quantidade": 3}, {"titulo": "Livro 2", "quantidade": 3}],
+               "usuarios": [{"nome": "Ana", "turma": "6A"}, {"nome": "Bia", "turma": "7B"}]}
+    com_view, sem_view = SupabaseFalso(tabelas), _SemView(tabelas)
+    for banco in (com_view, sem_view):
+        circulacao.emprestar(banco, [(2, 1), (1, 2)], prazo_dias=7)
+        circulacao.devolver(banco, [1])
+    esperado = circulacao.CacheEmprestimosAtivos(com_view).df()
+    obtido = circulacao.CacheEmprestimosAtivos(sem_view).df()
+    assert obtido.to_dict("records") == esperado.to_dict("records")
+    assert list(obtido["nome"]) == ["Bia"]
@@ -0,0 +1,55 @@
+import pytest
+
+from acervo import curadoria
+from acervo.taxa import LimiteTaxa
+from bench import stubs
+from bench.cliente_falso import SupabaseFalso
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Gemini falso: `respostas` é a lista de status HTTP das próximas chamadas (200 = responde)."""
+    respostas = []
+
+    def post(url, params=None, json=None, **kwargs):
+        status = respostas.pop(0) if respostas else 200
+        return stubs.RespostaFalsa(stubs._gemini(json) if status == 200 else {}, status)
+
+    monkeypatch.setattr(curadoria, "LIMITE_GEMINI", LimiteTaxa(por_segundo=1e9))
+    monkeypatch.setattr(curadoria, "buscar_titulo", lambda *args: None)
+    monkeypatch.setattr(curadoria.requests, "post", post)
+    return respostas
+
+
+def _pendentes(n):
+    return [{"titulo": f"Livro {i}", "autor": "Pendente", "sinopse": "Pendente", "genero": "Geral"} for i in range(n)]
+
+
+def _executar(banco, checkpoint):
+    return curadoria.executar(banco, [dict(l) for l in banco.tabelas["livros_acervo"].values()], "gemini", "google",
+                              checkpoint=checkpoint, trabalhadores=1, tamanho_bloco=1)
+
+
+def test_cota_esgotada_para_e_nao_marca_o_que_falhou(gemini, tmp_path):
+    banco = SupabaseFalso({"livros_acervo": _pendentes(3)})
+    checkpoint = curadoria.Checkpoint(str(tmp_path / "cp.json"))
+    gemini.extend([200, 429])
+    with pytest.raises(curadoria.FalhaCuradoria, match="429") as erro:
+        _executar(banco, checkpoint)
+    assert [r["id"] for r in erro.value.atualizados] == [1]
+    assert checkpoint.feitos == {1}
+    assert [l["autor"] for l in banco.tabelas["livros_acervo"].values()] == ["Autor IA", "Pendente", "Pendente"]
+
+    assert [r["id"] for r in _executar(banco, checkpoint)] == [2, 3]  # retoma só o que faltou
+    assert checkpoint.feitos == set()
+
+
+def test_erro_do_gemini_nao_grava_o_registro_mas_segue(gemini, tmp_path):
+    banco = SupabaseFalso({"livros_acervo": _pendentes(3)})
+    checkpoint = curadoria.Checkpoint(str(tmp_path / "cp.json"))
+    gemini.extend([200, 500])
+    with pytest.raises(curadoria.FalhaCuradoria, match="HTTP 500") as erro:
+        _executar(banco, checkpoint)
+    assert [r["id"] for r in erro.value.atualizados] == [1, 3]
+    assert checkpoint.feitos == {1, 3}
+    assert banco.tabelas["livros_acervo"][2]["autor"] == "Pendente"
@@ -0,0 +1,29 @@
+from datetime import date, datetime
+
+import pandas as pd
+
+from acervo import datas
+
+
+def test_exibir():
+    assert datas.exibir("2026-10-18") == "18/10/2026"
+    assert datas.exibir(date(2026, 1, 2)) == "02/01/2026"
+    assert datas.exibir(pd.Timestamp("2026-03-04 15:00")) == "04/03/2026"
+    assert datas.exibir(None) == datas.exibir(float("nan")) == datas.exibir("lixo") == ""
+
+
+def test_agora_iso_leva_o_fuso():
+    assert datetime.fromisoformat(datas.agora_iso()).utcoffset() is not None
+
+
+def test_colunas_para_data():
+    df = pd.DataFrame({"data_saida": ["2026-02-10", "2024-13-01", None],
+                       "data_cadastro": ["2026-01-01T02:30:00+00:00", "2026-01-01T12:00:00-03:00", None],
+                       "titulo": ["a", "b", "c"]})
+    out = datas.colunas_para_data(df, datas=["data_saida", "ausente"], instantes=["data_cadastro"])
+    assert out["data_saida"].iloc[0] == pd.Timestamp("2026-02-10")
+    assert out["data_saida"].iloc[1:].isna().all()
+    # timestamptz em UTC volta no fuso da escola: 02:30 UTC ainda é 31/12 em São Paulo
+    assert list(out["data_cadastro"].iloc[:2]) == [pd.Timestamp("2025-12-31 23:30"), pd.Timestamp("2026-01-01 12:00")]
+    assert pd.isna(out["data_cadastro"].iloc[2])
+    assert df["data_saida"].iloc[0] == "2026-02-10"  # não altera o original
@@ -0,0 +1,27 @@
+import json
+
+import httpx
+from supabase import create_client
+
+from acervo import diagnostico
+
+LINHAS = [{"id": i, "titulo": f"Livro {i}"} for i in range(30)]
+
+
+def _cliente():
+    corpo = json.dumps(LINHAS).encode()
+    cliente = create_client("https://exemplo.supabase.co", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.x")
+    cliente.postgrest.session._transport = httpx.MockTransport(
+        lambda req: httpx.Response(200, content=corpo, headers={"content-type": "application/json"}))
+    return cliente, len(corpo)
+
+
+def test_bytes_da_resposta_so_do_cliente_instrumentado():
+    metricas = diagnostico.Metricas(arquivo_jsonl=None)
+    cliente, tamanho = _cliente()
+    medido = diagnostico.ClienteInstrumentado(cliente, metricas)
+    assert medido.table("livros_acervo").select("id, titulo").execute().data == LINHAS
+    outro, _ = _cliente()  # outra instância no mesmo processo continua sem medição
+    outro.table("livros_acervo").select("*").execute()
+    assert [(r["alvo"], r["linhas"], r["bytes"]) for r in metricas.registros()] == [("livros_acervo", 30, tamanho)]
+    assert not isinstance(outro.postgrest.session._transport, diagnostico._TransporteMedido)
@@ -0,0 +1,98 @@
+import random
+
+import pandas as pd
+
+from acervo import importacao
+from acervo.catalogo import CatalogoCache
+from acervo.duplicatas import (LOTE_BASE, DuplicatasCatalogo, IndiceDuplicatas, assinaturas, chave_autor, chave_titulo,
+                               chave_titulo_principal, faixas, jaccard)
+from bench.cliente_falso import SupabaseFalso
+
+LIVROS = [
+    {"id": 1, "titulo": "A Hora da Estrela", "autor": "Clarice Lispector", "isbn": "9788532508126"},
+    {"id": 2, "titulo": "Diário de um Banana 1", "autor": "Jeff Kinney", "isbn": ""},
+    {"id": 3, "titulo": "O Pequeno Príncipe: edição de bolso", "autor": "Antoine de Saint-Exupéry", "isbn": ""},
+    {"id": 4, "titulo": "Capitães da Areia", "autor": "Jorge Amado", "isbn": "978-85-359-1406-4"},
+]
+
+
+def _ids(achados):
+    return [a[0] for a in achados]
+
+
+def test_chave_titulo_ignora_acentos_artigos_e_edicao():
+    assert chave_titulo("A Hora da Estrela - 2ª edição") == chave_titulo("hora da estrela")
+    assert chave_titulo("Os Sertões (Edição Revista)") == chave_titulo("Sertões")
+    assert chave_titulo_principal("O Pequeno Príncipe: edição de bolso") == "pequeno principe"
+
+
+def test_chave_autor_em_qualquer_ordem_e_vazios():
+    assert chave_autor("Lispector, Clarice") == chave_autor("Clarice Lispector")
+    assert not chave_autor("Pendente")
+    assert not chave_autor(None)
+
+
+def test_jaccard():
+    assert jaccard({"a", "b"}, {"a", "b"}) == 1.0
+    assert jaccard({"a", "b"}, {"b", "c"}) == 1 / 3
+    assert jaccard(set(), set()) == 0.0
+
+
+def test_faixas_iguais_para_conjuntos_iguais():
+    tris = [{" ab", "abc", "bc "}, {" ab", "abc", "bc "}, {" xy", "xyz", "yz "}]
+    chaves = faixas(assinaturas(tris))
+    assert (chaves[0] == chaves[1]).all()
+    assert not (chaves[0] == chaves[2]).any()
+
+
+def test_parecidos_por_titulo_isbn_e_autor():
+    indice = IndiceDuplicatas.de_dataframe(pd.DataFrame(LIVROS))
+    assert indice.parecidos("Hora da Estrela, A")[0][:2] == (1, 1.0)
+    assert indice.parecidos("Outro título", isbn="9788535914064") == [(4, 1.0, "ISBN")]
+    assert _ids(indice.parecidos("O Pequeno Principe")) == [3]
+    assert _ids(indice.parecidos("Capitaes de Areia", autor="Jorge Amado")) == [4]
+    assert indice.parecidos("Vidas Secas", autor="Graciliano Ramos") == []
+
+
+def test_volumes_diferentes_nao_sao_duplicata():
+    indice = IndiceDuplicatas.de_dataframe(pd.DataFrame(LIVROS))
+    assert indice.parecidos("Diário de um Banana 2", autor="Jeff Kinney") == []
+    assert _ids(indice.parecidos("Diario de um Banana 1")) == [2]
+
+
+def test_lote_grande_vai_para_a_base_ordenada_e_aceita_remocao():
+    rng = random.Random(7)
+    palavras = ["sol", "mar", "rio", "casa", "lua", "vento", "pedra", "flor", "noite", "campo", "ilha", "serra"]
+    registros = [{"id": i, "titulo": " ".join(rng.sample(palavras, 4)) + f" {chr(97 + i % 26)}{i}", "autor": "", "isbn": ""}
+                 for i in range(1, LOTE_BASE + 200)]
+    indice = IndiceDuplicatas()
+    indice.indexar_varios(registros)
+    alvo = registros[500]
+    assert _ids(indice.parecidos(alvo["titulo"]))[0] == alvo["id"]
+    indice.remover(alvo["id"])
+    assert alvo["id"] not in _ids(indice.parecidos(alvo["titulo"]))
+    indice.indexar({**alvo, "titulo": "Título completamente novo"})
+    assert _ids(indice.parecidos("Titulo completamente novo")) == [alvo["id"]]
+    assert len(indice) == len(registros)
+
+
+def test_duplicatas_catalogo_acompanha_o_cache():
+    catalogo = CatalogoCache(SupabaseFalso({"livros_acervo": [dict(l) for l in LIVROS]}))
+    duplicatas = DuplicatasCatalogo()
+    assert list(duplicatas.buscar(catalogo, "Capitães da Areia")["id"]) == [4]
+    catalogo.inserir([{"id": 10, "titulo": "Vidas Secas", "autor": "Graciliano Ramos", "isbn": ""}])
+    catalogo.remover(4)
+    assert list(duplicatas.buscar(catalogo, "vidas secas")["id"]) == [10]
+    assert duplicatas.buscar(catalogo, "Capitães da Areia").empty
+
+
+def test_preparar_importacao_com_duplicatas():
+    catalogo = CatalogoCache(SupabaseFalso({"livros_acervo": [dict(l) for l in LIVROS]}))
+    duplicatas = DuplicatasCatalogo()
+    planilha = pd.DataFrame([{"isbn": None, "titulo": "A hora da estrela", "autor": "Clarice Lispector"},
+                             {"isbn": "9780000000001", "titulo": "Livro Inédito", "autor": "Fulano"},
+                             {"isbn": "9780000000001", "titulo": "Livro Inédito", "autor": "Fulano"}])
+    novos, conflitos = importacao.preparar(planilha, catalogo.df(),
+                                           parecidos=lambda regs: duplicatas.parecidos_varios(catalogo, regs))
+    assert [(r["titulo"], r["quantidade"]) for r in novos] == [("Livro Inédito", 2)]
+    assert [(c["duplicata_de"], c["motivo"]) for c in conflitos] == [("A Hora da Estrela", "título + autor")]
@@ -0,0 +1,52 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from acervo import circulacao, estatisticas
+from acervo.exportacao import parquet_disponivel
+from bench.cliente_falso import SupabaseFalso
+
+
+@pytest.fixture
+def banco():
+    banco = SupabaseFalso({
+        "livros_acervo": [{"titulo": "Livro 1", "genero": "Ficção", "quantidade": 5},
+                          {"titulo": "Livro 2", "genero": "Poesia", "quantidade": 5},
+                          {"titulo": "Livro 3", "genero": "Ficção", "quantidade": 5}],
+        "usuarios": [{"nome": "Ana", "turma": "6A"}, {"nome": "Bia", "turma": ""}],
+    })
+    circulacao.emprestar(banco, [(1, 1), (1, 2), (2, 1)], prazo_dias=7)
+    circulacao.devolver(banco, [1])
+    return banco
+
+
+def test_contadores_por_genero_turma_mes_e_livro(banco):
+    dados = estatisticas.carregar(banco)
+    resumo = dados["resumo"].iloc[0]
+    assert (resumo["emprestimos"], resumo["devolucoes"], resumo["em_aberto"]) == (3, 1, 2)
+    assert dados["generos"].set_index("genero")["emprestimos"].to_dict() == {"Ficção": 2, "Poesia": 1}
+    assert dados["turmas"].set_index("turma")[["emprestimos", "devolucoes"]].to_dict("index") == {
+        "6A": {"emprestimos": 2, "devolucoes": 1}, "Sem turma": {"emprestimos": 1, "devolucoes": 0}}
+    assert list(dados["meses"]["mes"]) == [pd.Timestamp(date.today().replace(day=1))]
+    assert list(dados["mais_emprestados"][["id", "emprestimos"]].itertuples(index=False, name=None)) == [(1, 2), (2, 1)]
+    assert list(dados["parados"]["id"]) == [3] and resumo["parados"] == 1
+
+
+def test_devolucao_repetida_nao_conta_de_novo(banco):
+    circulacao.devolver(banco, [1, 2])
+    resumo = estatisticas.carregar(banco)["resumo"].iloc[0]
+    assert (resumo["emprestimos"], resumo["devolucoes"], resumo["em_aberto"]) == (3, 2, 1)
+
+
+@pytest.mark.skipif(not parquet_disponivel(), reason="sem pyarrow")
+def test_painel_usa_o_ultimo_snapshot_sem_conexao(banco, tmp_path):
+    estatisticas.gravar_snapshot(estatisticas.carregar(banco), str(tmp_path), dia=date(2026, 1, 1))
+
+    class Fora:
+        def table(self, nome):
+            raise ConnectionError("sem rede")
+
+    dados, origem = estatisticas.PainelEstatisticas(Fora(), pasta=str(tmp_path)).dados()
+    assert origem == "2026-01-01"
+    assert int(dados["resumo"]["emprestimos"].iloc[0]) == 3
@@ -0,0 +1,67 @@
+import pandas as pd
+
+from acervo import importacao
+from bench.cliente_falso import SupabaseFalso
+
+BANCO = pd.DataFrame([{"id": 1, "isbn": "978-85-359-0277-8", "titulo": "Capitães da Areia"},
+                      {"id": 2, "isbn": "", "titulo": "Vidas Secas"}])
+
+
+def test_linhas_repetidas_viram_um_registro_com_quantidade():
+    planilha = pd.DataFrame([
+        {"isbn": 9780000000017.0, "titulo": "Livro A", "autor": "Fulano"},
+        {"isbn": "978-0-00-000001-7", "titulo": "Livro A", "autor": "Fulano"},
+        {"isbn": None, "titulo": "Sem ISBN", "autor": None},
+        {"isbn": None, "titulo": "  sem isbn ", "autor": None},
+        {"isbn": None, "titulo": "Sem ISBN", "autor": None},
+        {"isbn": None, "titulo": None, "autor": None},
+        {"isbn": None, "titulo": None, "autor": None},
+    ])
+    novos, conflitos = importacao.preparar(planilha, pd.DataFrame())
+    assert conflitos == []
+    assert [(r["titulo"], r["quantidade"]) for r in novos] == [("Livro A", 2), ("Sem ISBN", 3), ("", 1), ("", 1)]
+    assert novos[0]["isbn"] == "9780000000017" and novos[1]["isbn"].startswith("IMP-")
+    assert novos[1]["autor"] == "Pendente" and novos[1]["genero"] == "Geral"
+
+
+def test_duplicata_por_isbn_ou_titulo():
+    planilha = pd.DataFrame([
+        {"isbn": "9788535902778", "titulo": "Outro título"},
+        {"isbn": None, "titulo": "VIDAS SECAS"},
+        {"isbn": "9780000000017", "titulo": "Livro Novo"},
+    ])
+    novos, conflitos = importacao.preparar(planilha, BANCO)
+    assert [r["titulo"] for r in novos] == ["Livro Novo"]
+    assert [r["titulo"] for r in conflitos] == ["Outro título", "VIDAS SECAS"]
+
+
+class _FalhaDepoisDoCommit(SupabaseFalso):
+    """O primeiro insert em livros_acervo grava e depois falha, como uma resposta perdida."""
+
+    falhas = 1
+
+    def table(self, nome):
+        consulta = super().table(nome)
+        if nome == "livros_acervo" and self.falhas:
+            executar = consulta.execute
+
+            def execute():
+                res = executar()
+                if consulta._acao == "insert":
+                    self.falhas -= 1
+                    raise ConnectionError("resposta perdida")
+                return res
+            consulta.execute = execute
+        return consulta
+
+
+def test_reenvio_apos_commit_parcial_nao_duplica(monkeypatch):
+    monkeypatch.setattr(importacao.time, "sleep", lambda s: None)
+    planilha = pd.DataFrame([{"isbn": None, "titulo": f"Livro {i}"} for i in range(5)]
+                            + [{"isbn": "9780000000017", "titulo": "Com ISBN"}])
+    novos, _ = importacao.preparar(planilha, pd.DataFrame())
+    banco = _FalhaDepoisDoCommit()
+    inseridos = importacao.inserir_em_lotes(banco, novos, tamanho=4)
+    assert len(inseridos) == len(banco.tabelas["livros_acervo"]) == 6
+    assert sorted(r["titulo"] for r in inseridos) == sorted(r["titulo"] for r in novos)
+
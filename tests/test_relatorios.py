@@ -0,0 +1,30 @@
+from datetime import date
+
+import pytest
+
+from acervo import relatorios
+from acervo.datas import inicio_do_dia
+from acervo.replica import ClienteReplica, Replica
+from bench.cliente_falso import SupabaseFalso
+
+# Instantes como o PostgREST devolve timestamptz (UTC)
+LIVROS = [{"titulo": "Véspera", "data_cadastro": "2026-01-01T02:30:00+00:00"},   # 31/12 23:30 em São Paulo
+          {"titulo": "Primeiro dia", "data_cadastro": "2026-01-01T03:00:00+00:00"},
+          {"titulo": "Último dia", "data_cadastro": "2026-01-31T23:59:00-03:00"},
+          {"titulo": "Depois", "data_cadastro": "2026-02-01T03:00:00+00:00"}]
+
+
+def test_inicio_do_dia_no_fuso_da_escola():
+    assert inicio_do_dia(date(2026, 1, 1)) == "2026-01-01T00:00:00-03:00"
+
+
+@pytest.mark.parametrize("com_replica", [False, True])
+def test_cadastrados_periodo_usa_os_dias_de_sao_paulo(com_replica, tmp_path):
+    cliente = SupabaseFalso({"livros_acervo": [dict(l, quantidade=1) for l in LIVROS]})
+    if com_replica:
+        replica = Replica(cliente, caminho=str(tmp_path / "replica.sqlite3"))
+        replica.sincronizar()
+        cliente = ClienteReplica(replica, cliente)
+    df, total = relatorios.cadastrados_periodo(cliente, date(2026, 1, 1), date(2026, 1, 31))
+    assert total == 2
+    assert sorted(df["titulo"]) == ["Primeiro dia", "Último dia"]
@@ -0,0 +1,186 @@
+import httpx
+import pytest
+
+from acervo.replica import ClienteReplica, Replica
+from bench.cliente_falso import SupabaseFalso
+
+
+class Rede:
+    """Repassa ao banco em memória; com `fora = True`, toda chamada falha como sem internet.
+
+    Com `perder_resposta = n`, as próximas `n` chamadas chegam ao banco mas a resposta se perde.
+    """
+
+    def __init__(self, banco):
+        self.banco, self.fora, self.perder_resposta = banco, False, 0
+
+    def _chamar(self, chamada):
+        if self.fora:
+            raise httpx.ConnectError("sem rede")
+        if self.perder_resposta:
+            self.perder_resposta -= 1
+            return _RespostaPerdida(chamada)
+        return chamada
+
+    def table(self, nome):
+        return self._chamar(self.banco.table(nome))
+
+    def rpc(self, nome, params=None):
+        return self._chamar(self.banco.rpc(nome, params))
+
+
+class _RespostaPerdida:
+    """Monta a consulta normalmente; `execute()` grava no banco e falha como se a resposta não tivesse chegado."""
+
+    def __init__(self, chamada):
+        self.chamada = chamada
+
+    def __getattr__(self, nome):
+        metodo = getattr(self.chamada, nome)
+        return lambda *args, **kwargs: _RespostaPerdida(metodo(*args, **kwargs))
+
+    def execute(self):
+        self.chamada.execute()
+        raise httpx.ReadTimeout("resposta perdida")
+
+
+@pytest.fixture
+def ambiente(tmp_path):
+    banco = SupabaseFalso({
+        "livros_acervo": [{"titulo": f"Livro {i}", "autor": "Autor", "isbn": f"97800000000{i:02d}", "genero": "Geral",
+                           "quantidade": 3} for i in range(1, 6)],
+        "usuarios": [{"nome": f"Aluno {i}", "turma": "6A"} for i in range(1, 4)],
+    })
+    rede = Rede(banco)
+    replica = Replica(rede, caminho=str(tmp_path / "replica.sqlite3"))
+    replica.sincronizar()
+    return banco, rede, replica, ClienteReplica(replica, rede)
+
+
+def _desconectar(rede, replica):
+    rede.fora, replica.online = True, False
+
+
+def _reconectar(rede, replica):
+    rede.fora, replica.online = False, True
+
+
+def _emprestar(cliente, id_livro, id_usuario=1):
+    return cliente.rpc("registrar_emprestimos", {"itens": [
+        {"id_livro": id_livro, "id_usuario": id_usuario, "data_retorno_prevista": "2030-01-01"}]}).execute()
+
+
+def test_leitura_local_igual_ao_banco(ambiente):
+    banco, _, _, cliente = ambiente
+    res = cliente.table("livros_acervo").select("id, titulo", count="exact").ilike("titulo", "*livro 2*").execute()
+    assert res.data == [{"id": 2, "titulo": "Livro 2"}]
+    assert cliente.table("livros_acervo").select("id", count="exact").limit(1).execute().count == len(banco.tabelas["livros_acervo"])
+
+
+def test_escrita_online_vai_ao_banco_e_volta_na_replica(ambiente):
+    banco, _, replica, cliente = ambiente
+    _emprestar(cliente, 1)
+    assert banco.tabelas["livros_acervo"][1]["quantidade"] == 2
+    assert cliente.table("livros_acervo").select("quantidade").eq("id", 1).execute().data == [{"quantidade": 2}]
+    assert replica.pendentes() == 0
+
+
+def test_fila_offline_e_reenviada_na_ordem(ambiente):
+    banco, rede, replica, cliente = ambiente
+    _desconectar(rede, replica)
+    novo = cliente.table("livros_acervo").insert({"titulo": "Feito offline", "quantidade": 2}).execute().data[0]
+    assert novo["id"] < 0  # id provisório
+    _emprestar(cliente, novo["id"], 2)
+    _emprestar(cliente, 3)
+    assert replica.pendentes() == 3
+    assert cliente.table("livros_acervo").select("quantidade").eq("id", 3).execute().data == [{"quantidade": 2}]
+
+    _reconectar(rede, replica)
+    assert replica.replicar() == (3, 0)
+    replica.sincronizar()
+    real = [l for l in banco.tabelas["livros_acervo"].values() if l["titulo"] == "Feito offline"][0]
+    assert real["quantidade"] == 1 and banco.tabelas["livros_acervo"][3]["quantidade"] == 2
+    assert [e["id_livro"] for e in banco.tabelas["emprestimos"].values()] == [real["id"], 3]
+    assert cliente.table("livros_acervo").select("id").lt("id", 0).execute().data == []
+
+
+def test_resposta_perdida_depois_do_commit_nao_duplica(ambiente):
+    banco, rede, replica, cliente = ambiente
+    rede.perder_resposta = 2  # a escrita e o primeiro reenvio
+    _emprestar(cliente, 1)
+    assert replica.online and replica.pendentes() == 1
+    assert replica.replicar() == (0, 0)
+    assert replica.replicar() == (1, 0)
+    replica.sincronizar()
+    assert len(banco.tabelas["emprestimos"]) == 1
+    assert banco.tabelas["livros_acervo"][1]["quantidade"] == 2
+    assert cliente.table("emprestimos").select("id_livro").execute().data == [{"id_livro": 1}]
+
+
+def test_edicao_sem_chave_com_resposta_perdida_nao_vai_para_a_fila(ambiente):
+    banco, rede, replica, cliente = ambiente
+    rede.perder_resposta = 1
+    with pytest.raises(httpx.ReadTimeout):
+        cliente.table("usuarios").delete().eq("id", 3).execute()
+    assert replica.pendentes() == 0
+
+
+def test_emprestimo_e_estoque_offline_no_mesmo_livro_nao_e_conflito(ambiente):
+    # O empréstimo enviado antes muda a versão da linha no banco; a edição de estoque não pode acusar conflito
+    banco, rede, replica, cliente = ambiente
+    _desconectar(rede, replica)
+    _emprestar(cliente, 1)
+    cliente.table("livros_acervo").update({"quantidade": 9}).eq("id", 1).execute()
+    _reconectar(rede, replica)
+    assert replica.replicar() == (2, 0)
+    assert replica.conflitos() == []
+    assert banco.tabelas["livros_acervo"][1]["quantidade"] == 9
+
+
+def test_estoque_editado_offline_sobre_mudanca_de_outra_pessoa_e_conflito(ambiente):
+    banco, rede, replica, cliente = ambiente
+    _desconectar(rede, replica)
+    _emprestar(cliente, 1)
+    cliente.table("livros_acervo").update({"quantidade": 9}).eq("id", 1).execute()
+    banco.alterar(banco.tabelas["livros_acervo"][1], {"quantidade": 1})  # outra pessoa, direto no banco
+    _reconectar(rede, replica)
+    assert replica.replicar() == (1, 1)
+    conflitos = replica.conflitos()
+    assert [c["operacao"] for c in conflitos] == ["update em livros_acervo (1 linhas)"]
+    assert banco.tabelas["livros_acervo"][1]["quantidade"] == 0  # o empréstimo passou, a edição não
+    assert cliente.table("livros_acervo").select("quantidade").eq("id", 1).execute().data == [{"quantidade": 0}]
+    replica.descartar(conflitos[0]["id"])
+    assert replica.estado()["conflitos"] == 0
+
+
+def test_emprestimo_sem_estoque_no_banco_vira_conflito_sem_travar_a_fila(ambiente):
+    banco, rede, replica, cliente = ambiente
+    _desconectar(rede, replica)
+    _emprestar(cliente, 2)
+    _emprestar(cliente, 4)  # enviados juntos numa chamada; a falha é isolada reenviando um a um
+    banco.alterar(banco.tabelas["livros_acervo"][2], {"quantidade": 0})
+    _reconectar(rede, replica)
+    enviadas, conflitos = replica.replicar()
+    assert (enviadas, conflitos) == (1, 1) and replica.pendentes() == 0
+    assert banco.tabelas["livros_acervo"][4]["quantidade"] == 2
+    assert "Estoque insuficiente" in replica.conflitos()[0]["erro"]
+
+
+def test_sincronizacao_rele_commit_fora_de_ordem(ambiente):
+    banco, _, replica, cliente = ambiente
+    banco._versao += 1
+    lenta = banco._versao  # transação lenta: pegou a versão mas ainda não fez commit
+    banco.alterar(banco.tabelas["usuarios"][2], {"nome": "Rápido"})
+    assert replica.sincronizar() == {"usuarios": 1}
+    usuario = banco.tabelas["usuarios"][1]
+    usuario["nome"], usuario["versao"] = "Atrasado", lenta  # commit chega depois, com versão menor
+    assert replica.sincronizar() == {"usuarios": 1}
+    assert replica.sincronizar() == {}
+    assert cliente.table("usuarios").select("nome").eq("id", 1).execute().data == [{"nome": "Atrasado"}]
+
+
+def test_remocao_no_banco_some_da_replica(ambiente):
+    banco, _, replica, cliente = ambiente
+    cliente.table("usuarios").delete().eq("id", 3).execute()
+    assert 3 not in banco.tabelas["usuarios"]
+    assert cliente.table("usuarios").select("id").eq("id", 3).execute().data == []
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from acervo.usuarios import aplicar_alteracoes, calcular_alteracoes, vazio
+from bench.cliente_falso import SupabaseFalso
+
+ORIGINAL = pd.DataFrame([
+    {"id": 1, "nome": "Ana Souza", "turma": "6A"},
+    {"id": 2, "nome": "Bruno Lima", "turma": "6B"},
+    {"id": 3, "nome": "Carla Dias", "turma": None},
+])
+
+
+def _editado(*linhas):
+    return pd.DataFrame(list(linhas), columns=["id", "nome", "turma"])
+
+
+def test_sem_mudancas_e_vazio():
+    alteracoes = calcular_alteracoes(ORIGINAL, ORIGINAL.copy())
+    assert alteracoes == {"inserir": [], "atualizar": [], "remover": []}
+    assert vazio(alteracoes)
+
+
+def test_espacos_e_turma_vazia_nao_contam_como_mudanca():
+    editado = _editado({"id": 1, "nome": " Ana Souza ", "turma": "6A"}, {"id": 2, "nome": "Bruno Lima", "turma": "6B"},
+                       {"id": 3, "nome": "Carla Dias", "turma": ""})
+    assert vazio(calcular_alteracoes(ORIGINAL, editado))
+
+
+def test_atualiza_so_linhas_alteradas():
+    editado = ORIGINAL.copy()
+    editado.loc[1, "turma"] = "7B"
+    alteracoes = calcular_alteracoes(ORIGINAL, editado)
+    assert alteracoes["atualizar"] == [{"id": 2, "nome": "Bruno Lima", "turma": "7B"}]
+    assert alteracoes["inserir"] == [] and alteracoes["remover"] == []
+
+
+def test_linha_nova_sem_id_e_inserida_e_sem_nome_ignorada():
+    editado = pd.concat([ORIGINAL, _editado({"id": np.nan, "nome": "Davi Rocha", "turma": "8A"},
+                                            {"id": np.nan, "nome": "  ", "turma": "8A"})], ignore_index=True)
+    alteracoes = calcular_alteracoes(ORIGINAL, editado)
+    assert alteracoes["inserir"] == [{"nome": "Davi Rocha", "turma": "8A"}]
+    assert alteracoes["atualizar"] == [] and alteracoes["remover"] == []
+
+
+def test_linha_apagada_ou_nome_esvaziado_e_remocao():
+    editado = ORIGINAL[ORIGINAL["id"] != 1].copy()
+    editado.loc[editado["id"] == 3, "nome"] = ""
+    alteracoes = calcular_alteracoes(ORIGINAL, editado)
+    assert alteracoes["remover"] == [1, 3]
+    assert alteracoes["atualizar"] == []
+
+
+def test_aplicar_nao_remove_quem_tem_emprestimo_ativo():
+    banco = SupabaseFalso({
+        "usuarios": ORIGINAL.to_dict("records"),
+        "livros_acervo": [{"id": 1, "titulo": "Dom Casmurro", "quantidade": 1}],
+        "emprestimos": [{"id_livro": 1, "id_usuario": 1, "data_saida": "2026-10-01",
+                         "data_retorno_prevista": "2026-10-08", "status": "Ativo"}],
+    })
+    editado = pd.concat([ORIGINAL[ORIGINAL["id"] == 3], _editado({"id": np.nan, "nome": "Davi Rocha", "turma": "8A"})],
+                        ignore_index=True)
+    aplicadas, bloqueados = aplicar_alteracoes(banco, calcular_alteracoes(ORIGINAL, editado))
+    assert bloqueados == [1]
+    assert aplicadas["remover"] == [2]
+    assert sorted(u["nome"] for u in banco.tabelas["usuarios"].values()) == ["Ana Souza", "Carla Dias", "Davi Rocha"]